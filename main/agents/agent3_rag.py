@@ -135,38 +135,19 @@ class Agent3RAG:
     def _rule_based_recommendation(self, symptoms: List[str], additional_info: str) -> Dict[str, Any]:
         """규칙 기반 추천 (RAG 실패 시 폴백)"""
         
-        # 증상별 진료과 매핑 규칙
-        symptom_to_department = {
-            # 관절 관련
-            "무릎": "정형외과", "어깨": "정형외과", "팔꿈치": "정형외과", 
-            "발목": "정형외과", "손목": "정형외과", "허리": "정형외과",
-            "관절": "정형외과", "통증": "정형외과", "부상": "정형외과",
-            
-            # 척추 관련
-            "목": "척추센터", "등": "척추센터", "허리": "척추센터",
-            "디스크": "척추센터", "척추": "척추센터", "요통": "척추센터",
-            
-            # 내과 관련
-            "복통": "내과", "소화": "내과", "위": "내과", "장": "내과",
-            "내시경": "내과", "검진": "내과", "비만": "내과",
-            "당뇨": "내과", "고혈압": "내과", "고지혈": "내과",
-            
-            # 뇌신경 관련
-            "두통": "뇌신경센터", "어지럼": "뇌신경센터", "신경": "뇌신경센터",
-            "치매": "뇌신경센터", "뇌졸중": "뇌신경센터", "뇌": "뇌신경센터",
-            
-            # 응급
-            "응급": "응급의학센터", "긴급": "응급의학센터", "사고": "응급의학센터"
-        }
-        
-        # 증상 분석
+        # 증상 분석 (증상 → 진료과 규칙은 RULE_DEPT_MAP, 미리 컴파일된 공유 matcher 로 한 번에 매칭)
         symptoms_text = " ".join(symptoms).lower()
-        matched_departments = []
-        
-        for symptom, department in symptom_to_department.items():
-            if symptom in symptoms_text:
-                if department not in matched_departments:
-                    matched_departments.append(department)
+        try:
+            from rag_doctor_agent.main.agent.matcher import get_matcher
+            matched_departments = list(get_matcher().match(symptoms_text).rule_depts)
+        except Exception as e:
+            # matcher(yaml / rules.yaml)를 쓸 수 없어도 폴백은 동작해야 하므로 사전을 직접 훑음
+            print(f"⚠️ matcher 사용 불가, 규칙 사전을 직접 검사합니다: {e}")
+            matched_departments = []
+            for symptom, department in self._rule_dept_map().items():
+                if symptom in symptoms_text:
+                    if department not in matched_departments:
+                        matched_departments.append(department)
         
         # 기본 진료과 설정
         if not matched_departments:
@@ -189,6 +170,15 @@ class Agent3RAG:
             "alternative_departments": matched_departments[1:] if len(matched_departments) > 1 else []
         }
     
+    @staticmethod
+    def _rule_dept_map() -> Dict[str, str]:
+        """증상 → 진료과 규칙 (데이터 전용 모듈이라 의존성 없음, 그마저 없으면 빈 규칙 → 기본 진료과)"""
+        try:
+            from rag_doctor_agent.main.agent.keywords import RULE_DEPT_MAP
+            return RULE_DEPT_MAP
+        except Exception:
+            return {}
+
     def _get_doctors_by_department(self, department: str) -> List[Dict[str, Any]]:
         """진료과별 의료진 목록 (가상 데이터)"""
         
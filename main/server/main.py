@@ -3,6 +3,7 @@
 병원 예약 시스템 Chat API 서버
 LangGraph 워크플로우를 사용한 예약 처리 API
 """
+import asyncio
 import os
 import sys
 import uuid
@@ -136,16 +137,19 @@ async def chat(request: ChatRequest):
         print(f"{'='*50}")
         
         # 세션 상태에 따른 워크플로우 실행
+        # 워크플로우(LLM / 임베딩 호출)는 동기 코드이므로 스레드에서 실행해 이벤트 루프를 막지 않음
         if session["current_step"] == "waiting_confirmation":
             # 2차 대화: 세션 데이터를 상태에 추가
-            result = run_hospital_reservation_with_session_data(
+            result = await asyncio.to_thread(
+                run_hospital_reservation_with_session_data,
                 user_query=request.message,
                 session_id=session_id,
                 session_data=session["pending_data"]
             )
         else:
             # 1차 대화: 워크플로우 실행
-            result = run_hospital_reservation(
+            result = await asyncio.to_thread(
+                run_hospital_reservation,
                 user_query=request.message,
                 session_id=session_id
             )
@@ -24,17 +24,22 @@ if PACKAGE_ROOT not in sys.path:
 # 폴더 구조 변경 호환: 우선 main/agent 경로 시도, 실패 시 기존 경로 시도
 build_and_run_agent = None
 OutputSchema = None
+get_shared_retriever = None
 try:
     from rag_doctor_agent.main.agent.graph import build_and_run_agent as _run
     from rag_doctor_agent.main.agent.output_enforcer import OutputSchema as _schema
+    from rag_doctor_agent.main.agent.retriever import get_shared_retriever as _shared
     build_and_run_agent = _run
     OutputSchema = _schema
+    get_shared_retriever = _shared
 except Exception:
     try:
         from rag_doctor_agent.agent.graph import build_and_run_agent as _run
         from rag_doctor_agent.agent.output_enforcer import OutputSchema as _schema
+        from rag_doctor_agent.agent.retriever import get_shared_retriever as _shared
         build_and_run_agent = _run
         OutputSchema = _schema
+        get_shared_retriever = _shared
     except Exception:
         pass
 
@@ -167,11 +172,19 @@ def status():
     """A2A Protocol 상태 체크"""
     try:
         ok = bool(build_and_run_agent and OutputSchema)
+        # 상주 인덱스 정보 (로드 소요 시간, 인덱스 버전)
+        index_info = None
+        if get_shared_retriever is not None:
+            try:
+                index_info = get_shared_retriever().index_status()
+            except Exception as e:
+                index_info = {"loaded": False, "error": str(e)}
         return jsonify({
             "status": "ok" if ok else "warn",
             "success": True,
             "timestamp": datetime.now().isoformat(),
-            "agent": {"name": rag_wrapper.name, "version": rag_wrapper.version}
+            "agent": {"name": rag_wrapper.name, "version": rag_wrapper.version},
+            "index": index_info
         })
     except Exception as e:
         return jsonify({
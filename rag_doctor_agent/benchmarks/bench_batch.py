@@ -0,0 +1,78 @@
+"""
+배치 검색 처리량 벤치마크: 질의별 search() 반복 vs search_many()
+
+  python -m rag_doctor_agent.benchmarks.bench_batch [--docs 20000] [--dim 1024] [--batches 1,8,32,128]
+
+실제 코퍼스 통계를 따르는 합성 문서(common.synth_term_ids)와 임의 단위 벡터로 인덱스를 만들고,
+질의 임베딩은 미리 계산해 두어(요청 지연 제외) 점수 계산 / top-k 비용만 비교한다.
+원격 임베딩을 쓰면 search() 는 질의마다 요청이 한 번씩 추가로 든다.
+"""
+from __future__ import annotations
+import argparse, json, time
+import numpy as np
+
+from ..main.agent.retriever import HybridIndex, InvertedIndex, Doc
+from .common import synth_term_ids, materialize_doc_toks, sample_queries
+
+
+class TableEmbedder:
+    """질의 문자열 → 미리 만든 벡터 (호출 수 기록)"""
+
+    def __init__(self, queries, dim: int, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        V = rng.standard_normal((len(queries), dim), dtype="float32")
+        self.table = dict(zip(queries, V / np.linalg.norm(V, axis=1, keepdims=True)))
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        return np.vstack([self.table[t] for t in texts])
+
+
+def build_index(n: int, dim: int) -> HybridIndex:
+    term_ids, doc_len, vocab = synth_term_ids(n)
+    index = HybridIndex()
+    index.doc_toks = materialize_doc_toks(term_ids, doc_len, vocab)
+    index.N = n
+    index.docs = [Doc(id=str(i), text=" ".join(t), meta={}) for i, t in enumerate(index.doc_toks)]
+    index.inv = InvertedIndex.from_term_ids(term_ids, doc_len, vocab)
+    rng = np.random.default_rng(0)
+    index.set_embeddings(rng.standard_normal((n, dim), dtype="float32"))
+    return index
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=20000)
+    ap.add_argument("--dim", type=int, default=1024)
+    ap.add_argument("--batches", default="1,8,32,128")
+    ap.add_argument("--top-k", type=int, default=8)
+    args = ap.parse_args()
+
+    index = build_index(args.docs, args.dim)
+    base = sample_queries()
+    sizes = [int(x) for x in args.batches.split(",")]
+    queries = [f"{base[i % len(base)]} ; {i}" for i in range(max(sizes))]
+    emb = TableEmbedder(queries, args.dim)
+    index.search_many(queries[:2], emb, top_k=args.top_k)   # warm-up
+
+    for b in sizes:
+        batch = queries[:b]
+        emb.calls = 0
+        t0 = time.perf_counter()
+        for q in batch:
+            index.search(q, emb, top_k=args.top_k)
+        loop_s, loop_calls = time.perf_counter() - t0, emb.calls
+        emb.calls = 0
+        t0 = time.perf_counter()
+        index.search_many(batch, emb, top_k=args.top_k)
+        many_s = time.perf_counter() - t0
+        print(json.dumps({"docs": args.docs, "batch": b,
+                          "loop_qps": round(b / loop_s, 1),
+                          "many_qps": round(b / many_s, 1),
+                          "speedup": round(loop_s / many_s, 2),
+                          "embed_calls": {"loop": loop_calls, "many": emb.calls}}), flush=True)
+
+
+if __name__ == "__main__":
+    main()
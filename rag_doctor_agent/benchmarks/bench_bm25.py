@@ -0,0 +1,65 @@
+"""
+BM25 질의 지연시간 벤치마크: 문서 전체 순회(기존) vs 역색인(CSR) 점수 계산
+
+  python -m rag_doctor_agent.benchmarks.bench_bm25 [--sizes 170,1000,...] [--legacy-max N]
+
+기존 구현은 코퍼스 크기에 선형으로 느려지므로 --legacy-max 이하에서만 측정한다.
+"""
+from __future__ import annotations
+import argparse, json, math, time
+import numpy as np
+
+from ..main.agent.retriever import InvertedIndex
+from ..main.agent.utils import tokenize_ko_en
+from .common import synth_term_ids, materialize_doc_toks, sample_queries, time_per_query
+
+
+def legacy_bm25(doc_toks, df, N, query, k1=1.2, b=0.75):
+    q_toks = tokenize_ko_en(query)
+    avgdl = np.mean([len(t) for t in doc_toks]) + 1e-8
+    idf = {t: math.log((N - df.get(t, 0) + 0.5) / (df.get(t, 0) + 0.5) + 1)
+           for t in set(q_toks)}
+    scores = np.zeros(N, dtype="float32")
+    for i, toks in enumerate(doc_toks):
+        dl = len(toks) + 1e-8
+        tf = {}
+        for t in toks: tf[t] = tf.get(t, 0) + 1
+        s = 0.0
+        for t in q_toks:
+            ft = tf.get(t, 0)
+            if t not in idf or ft == 0: continue
+            s += idf[t] * (ft * (k1 + 1)) / (ft + k1 * (1 - b + b * dl / avgdl))
+        scores[i] = s
+    if scores.max() > 0:
+        scores = scores / (scores.max() + 1e-8)
+    return scores
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="170,1000,10000,100000,1000000")
+    ap.add_argument("--legacy-max", type=int, default=10000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    queries = sample_queries()
+    for n in [int(x) for x in args.sizes.split(",")]:
+        term_ids, doc_len, vocab = synth_term_ids(n)
+        t0 = time.perf_counter()
+        inv = InvertedIndex.from_term_ids(term_ids, doc_len, vocab)
+        build_s = time.perf_counter() - t0
+        row = {"docs": n, "tokens": int(doc_len.sum()), "vocab": len(vocab),
+               "build_s": round(build_s, 3),
+               "inverted_ms": round(time_per_query(
+                   lambda q: inv.score(tokenize_ko_en(q)), queries, args.repeat), 3)}
+        if n <= args.legacy_max:
+            doc_toks = materialize_doc_toks(term_ids, doc_len, vocab)
+            df = {t: int(inv.indptr[i + 1] - inv.indptr[i]) for t, i in vocab.items()}
+            row["legacy_ms"] = round(time_per_query(
+                lambda q: legacy_bm25(doc_toks, df, n, q), queries, 1), 3)
+            row["speedup"] = round(row["legacy_ms"] / max(row["inverted_ms"], 1e-6), 1)
+        print(json.dumps(row, ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    main()
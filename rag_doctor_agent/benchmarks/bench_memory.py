@@ -0,0 +1,84 @@
+"""
+워커 프로세스당 메모리 벤치마크: 벡터를 private 메모리로 로드 vs 읽기 전용 mmap
+
+  python -m rag_doctor_agent.benchmarks.bench_memory [--docs 20000] [--dim 3072] [--workers 4]
+
+합성 vectors.npy 를 임시 디렉터리에 만들고, 모드별로 워커 W 개를 동시에 띄워
+각자 벡터를 로드한 뒤 전체 행렬을 한 번 스캔(dense 검색과 같은 접근)한다.
+모든 워커가 살아 있는 시점에 /proc/self/smaps_rollup 의 RSS / PSS / Private 를 보고한다.
+(PSS 는 공유 페이지를 공유 프로세스 수로 나눈 값이라 mmap 공유 효과가 드러난다. Linux 전용)
+"""
+from __future__ import annotations
+import argparse, json, os, tempfile
+import multiprocessing as mp
+import numpy as np
+
+from ..main.agent.retriever import HybridIndex, load_vectors, save_vectors
+
+
+def _smaps_kb() -> dict:
+    out = {}
+    with open("/proc/self/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[-1] == "kB":
+                out[parts[0].rstrip(":")] = int(parts[1])
+    return out
+
+
+def _worker(path, mmap, barrier, done, queue):
+    base = _smaps_kb()
+    index = HybridIndex()
+    index.set_embeddings(load_vectors(path, mmap=mmap), normalized=mmap)
+    index.N = index.emb_matrix.shape[0]
+    q = np.ones(index.emb_matrix.shape[1], dtype="float32")
+    index._cosine_sim(q, out=np.empty(index.N, dtype="float32"))
+    barrier.wait()                      # 모든 워커가 로드를 마친 상태에서 측정
+    now = _smaps_kb()
+    private = now.get("Private_Clean", 0) + now.get("Private_Dirty", 0)
+    base_private = base.get("Private_Clean", 0) + base.get("Private_Dirty", 0)
+    queue.put({"rss_mb": round((now["Rss"] - base["Rss"]) / 1024, 1),
+               "pss_mb": round((now["Pss"] - base["Pss"]) / 1024, 1),
+               "private_mb": round((private - base_private) / 1024, 1)})
+    done.wait()
+
+
+def run_mode(path: str, mmap: bool, workers: int) -> dict:
+    ctx = mp.get_context("spawn")
+    barrier, done, queue = ctx.Barrier(workers + 1), ctx.Barrier(workers + 1), ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(path, mmap, barrier, done, queue))
+             for _ in range(workers)]
+    for p in procs: p.start()
+    barrier.wait()
+    rows = [queue.get() for _ in procs]
+    done.wait()
+    for p in procs: p.join()
+    return {"mode": "mmap" if mmap else "memory", "workers": workers,
+            "per_worker_rss_mb": max(r["rss_mb"] for r in rows),
+            "per_worker_pss_mb": round(sum(r["pss_mb"] for r in rows) / workers, 1),
+            "per_worker_private_mb": round(sum(r["private_mb"] for r in rows) / workers, 1),
+            "total_pss_mb": round(sum(r["pss_mb"] for r in rows), 1)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=20000)
+    ap.add_argument("--dim", type=int, default=3072)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    M = rng.standard_normal((args.docs, args.dim), dtype="float32")
+    M /= np.linalg.norm(M, axis=1, keepdims=True)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "vectors.npy")
+        save_vectors(path, M)
+        del M
+        print(json.dumps({"docs": args.docs, "dim": args.dim,
+                          "vectors_mb": round(os.path.getsize(path) / 2**20, 1)}))
+        for mmap in (False, True):
+            print(json.dumps(run_mode(path, mmap, args.workers)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+2단계 검색(strategy="two_stage") vs 전체 hybrid 벤치마크: 지연시간 + recall
+
+  python -m rag_doctor_agent.benchmarks.bench_two_stage [--docs 100000] [--pools 64,256,1024] [--ann]
+
+실제 코퍼스 통계를 따르는 합성 문서(common.synth_term_ids)를 로컬 해시 임베딩으로 벡터화해
+dense 점수가 본문과 상관되도록 만든 뒤, 같은 질의에 대해
+  - 질의당 지연시간 중앙값 (질의 임베딩 제외)
+  - IVF 없는 전체 hybrid top-k 대비 recall@k
+를 보고한다. --ann 이면 IVF 를 만들어 두 전략 모두 IVF 가 있는 인덱스에서 비교한다.
+"""
+from __future__ import annotations
+import argparse, json, time
+import numpy as np
+
+from ..main.agent import retriever
+from ..main.agent.ann import IVFIndex
+from ..main.agent.embeddings_local import LocalHashEmbeddingClient
+from .bench_batch import build_index
+from .common import sample_queries
+
+
+class CachedQueries:
+    """질의 임베딩을 미리 계산해 두고 조회만 (지연시간에서 임베딩 비용 제외)"""
+
+    def __init__(self, embedder, queries):
+        self.table = dict(zip(queries, embedder.embed(queries)))
+
+    def embed(self, texts):
+        return np.vstack([self.table[t] for t in texts])
+
+
+def latency_ms(fn, queries, repeat=3) -> float:
+    fn(queries[0])  # warm-up
+    samples = []
+    for _ in range(repeat):
+        for q in queries:
+            t0 = time.perf_counter()
+            fn(q)
+            samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=100000)
+    ap.add_argument("--pools", default="64,256,1024")
+    ap.add_argument("--top-k", type=int, default=8)
+    ap.add_argument("--ann", action="store_true")
+    args = ap.parse_args()
+
+    local = LocalHashEmbeddingClient()
+    index = build_index(args.docs, 8)
+    t0 = time.perf_counter()
+    index.set_embeddings(local.embed([d.text for d in index.docs]))
+    embed_s = time.perf_counter() - t0
+    if args.ann:
+        index.ann = IVFIndex.build(index.emb_matrix)
+
+    queries = sample_queries() + ["허리 통증 ; 정형외과 ; 척추센터", "무릎 관절 ; 관절센터",
+                                  "두통 어지러움 ; 신경과", "어깨 결림 ; 재활"]
+    emb = CachedQueries(local, queries)
+    k = args.top_k
+
+    def run(strategy):
+        return lambda q: index.search(q, emb, top_k=k, strategy=strategy)
+
+    def recall(strategy):
+        out = []
+        for q in queries:
+            got = {d.id for d, _ in index.search(q, emb, top_k=k, strategy=strategy)}
+            out.append(len(got & set(truth[q])) / max(1, len(truth[q])))
+        return {f"recall@{k}": round(float(np.mean(out)), 3),
+                "min_recall": round(float(np.min(out)), 3)}
+
+    # 정답: IVF 없이 전수 dense 로 계산한 hybrid top-k
+    ann, index.ann = index.ann, None
+    truth = {q: [d.id for d, _ in index.search(q, emb, top_k=k, strategy="hybrid")]
+             for q in queries}
+    index.ann = ann
+    print(json.dumps({"docs": args.docs, "dim": local.dim, "ann": args.ann,
+                      "embed_s": round(embed_s, 1), "strategy": "hybrid",
+                      "ms": round(latency_ms(run("hybrid"), queries), 2),
+                      **recall("hybrid")}), flush=True)
+
+    for pool in [int(x) for x in args.pools.split(",")]:
+        retriever.TWO_STAGE_POOL = pool
+        print(json.dumps({"strategy": "two_stage", "pool": pool,
+                          "ms": round(latency_ms(run("two_stage"), queries), 2),
+                          **recall("two_stage")}), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+벤치마크 공통 유틸: 실제 인덱스(db_data/index)의 통계를 따라 합성 코퍼스를 만든다.
+OpenAI 호출 없이 동작한다.
+"""
+from __future__ import annotations
+from typing import Callable, Dict, List, Tuple
+import os, json, time
+import numpy as np
+
+from ..main.agent.retriever import INDEX_DIR, read_index
+from ..main.agent.augmentation import expand_symptoms
+
+SAMPLES_DIR = os.path.join(os.path.dirname(__file__), "..", "tests")
+
+
+def load_real_doc_toks() -> List[List[str]]:
+    return list(read_index(INDEX_DIR, mmap=True).doc_toks)
+
+
+def sample_queries() -> List[str]:
+    """tests/sample_*.json 증상 목록을 Retriever 와 같은 방식으로 질의 문자열로 만든다."""
+    out = []
+    for fn in sorted(os.listdir(SAMPLES_DIR)):
+        if fn.startswith("sample_") and fn.endswith(".json"):
+            with open(os.path.join(SAMPLES_DIR, fn), "r", encoding="utf-8") as f:
+                syms = json.load(f).get("symptoms", [])
+            out.append(" ; ".join(expand_symptoms(syms)))
+    return out
+
+
+def synth_term_ids(n_docs: int, seed: int = 0
+                   ) -> Tuple[np.ndarray, np.ndarray, Dict[str, int]]:
+    """
+    실제 코퍼스의 단어 분포 + 코퍼스 크기에 따라 늘어나는 Zipf 꼬리 어휘로
+    n_docs 개 문서를 합성한다. (문서 순서로 이어 붙인 term id, 문서 길이, vocab)
+    """
+    rng = np.random.default_rng(seed)
+    real = load_real_doc_toks()
+    vocab: Dict[str, int] = {}
+    counts: List[int] = []
+    for toks in real:
+        for t in toks:
+            i = vocab.setdefault(t, len(vocab))
+            if i == len(counts):
+                counts.append(0)
+            counts[i] += 1
+    base_p = np.asarray(counts, dtype="float64")
+    base_p /= base_p.sum()
+
+    # Heaps 법칙 근사: 합성 어휘 수 ~ 40 * sqrt(토큰 수)
+    lens = np.array([max(1, len(t)) for t in real])
+    doc_len = rng.choice(lens, size=n_docs).astype("int64")
+    total = int(doc_len.sum())
+    n_tail = int(40 * np.sqrt(total))
+    base_V = len(vocab)
+    for j in range(n_tail):
+        vocab[f"syn{j}"] = base_V + j
+
+    from_base = rng.random(total) < 0.8
+    term_ids = np.empty(total, dtype="int64")
+    term_ids[from_base] = rng.choice(base_V, size=int(from_base.sum()), p=base_p)
+    n_rest = total - int(from_base.sum())
+    if n_tail:
+        term_ids[~from_base] = base_V + (rng.zipf(1.3, size=n_rest) - 1) % n_tail
+    else:
+        term_ids[~from_base] = rng.choice(base_V, size=n_rest, p=base_p)
+    return term_ids, doc_len, vocab
+
+
+def materialize_doc_toks(term_ids: np.ndarray, doc_len: np.ndarray,
+                         vocab: Dict[str, int]) -> List[List[str]]:
+    inv_vocab = np.array(sorted(vocab, key=vocab.__getitem__), dtype=object)
+    bounds = np.concatenate([[0], np.cumsum(doc_len)])
+    return [inv_vocab[term_ids[bounds[i]:bounds[i + 1]]].tolist()
+            for i in range(len(doc_len))]
+
+
+def time_per_query(fn: Callable[[str], object], queries: List[str],
+                   repeat: int = 3) -> float:
+    """질의당 지연시간(ms) 중앙값"""
+    fn(queries[0])  # warm-up
+    samples = []
+    for _ in range(repeat):
+        for q in queries:
+            t0 = time.perf_counter()
+            fn(q)
+            samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples))
@@ -0,0 +1,101 @@
+from __future__ import annotations
+from typing import Optional
+import os
+import numpy as np
+
+# --------------------------------------------------------------------------- #
+# IVF (inverted file) 근사 최근접 이웃 – 순수 NumPy
+#   - spherical k-means 로 centroid 학습 (행 정규화된 임베딩 → 내적 = cosine)
+#   - 각 문서를 가장 가까운 centroid 의 리스트에 배정 (CSR: list_ptr / list_ids)
+#   - 질의 시 가까운 centroid nprobe 개의 리스트만 후보로 사용
+# --------------------------------------------------------------------------- #
+class IVFIndex:
+    FILE  = "ivf.npz"
+    CHUNK = 8192   # 배정 단계에서 한 번에 (CHUNK x nlist) 점수만 만든다
+
+    def __init__(self, centroids: np.ndarray, list_ptr: np.ndarray,
+                 list_ids: np.ndarray, nprobe: int):
+        self.centroids = centroids
+        self.list_ptr  = list_ptr
+        self.list_ids  = list_ids
+        self.nprobe    = nprobe
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @property
+    def N(self) -> int:
+        return int(self.list_ids.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.centroids.nbytes + self.list_ptr.nbytes + self.list_ids.nbytes)
+
+    # ------------------- build ------------------- #
+    @staticmethod
+    def default_nlist(n: int) -> int:
+        return int(min(max(1, round(4 * np.sqrt(n))), n))
+
+    @classmethod
+    def _assign(cls, M: np.ndarray, C: np.ndarray) -> np.ndarray:
+        out = np.empty(M.shape[0], dtype="int32")
+        for lo in range(0, M.shape[0], cls.CHUNK):
+            out[lo:lo + cls.CHUNK] = np.argmax(np.asarray(M[lo:lo + cls.CHUNK]) @ C.T, axis=1)
+        return out
+
+    @classmethod
+    def build(cls, M: np.ndarray, nlist: Optional[int] = None, nprobe: Optional[int] = None,
+              iters: int = 10, train_per_list: int = 64, seed: int = 0) -> "IVFIndex":
+        n = M.shape[0]
+        nlist = min(nlist or cls.default_nlist(n), n)
+        rng = np.random.default_rng(seed)
+
+        # 학습은 표본으로만 (리스트당 train_per_list 개)
+        n_train = min(n, nlist * train_per_list)
+        sample = np.sort(rng.choice(n, size=n_train, replace=False))
+        X = np.ascontiguousarray(M[sample], dtype="float32")
+        C = X[rng.choice(n_train, size=nlist, replace=False)].copy()
+        for _ in range(iters):
+            assign = cls._assign(X, C)
+            sums = np.zeros_like(C)
+            np.add.at(sums, assign, X)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            # 빈 클러스터는 임의 표본으로 다시 시작
+            sums[empty] = X[rng.choice(n_train, size=int(empty.sum()))]
+            C = sums / (np.linalg.norm(sums, axis=1, keepdims=True) + 1e-8)
+
+        assign = cls._assign(M, C)
+        list_ids = np.argsort(assign, kind="stable").astype("int32")
+        list_ptr = np.zeros(nlist + 1, dtype="int64")
+        np.cumsum(np.bincount(assign, minlength=nlist), out=list_ptr[1:])
+        nprobe = nprobe or int(os.getenv("VECTOR_NPROBE", "0")) or max(1, nlist // 8)
+        return cls(C.astype("float32"), list_ptr, list_ids, min(nprobe, nlist))
+
+    # ------------------- persist ------------------- #
+    def save(self, index_dir: str) -> None:
+        path = os.path.join(index_dir, self.FILE)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, centroids=self.centroids, list_ptr=self.list_ptr,
+                 list_ids=self.list_ids, nprobe=np.array(self.nprobe))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, index_dir: str) -> Optional["IVFIndex"]:
+        path = os.path.join(index_dir, cls.FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as z:
+            nprobe = int(os.getenv("VECTOR_NPROBE", "0")) or int(z["nprobe"])
+            return cls(z["centroids"], z["list_ptr"], z["list_ids"],
+                       min(nprobe, z["centroids"].shape[0]))
+
+    # ------------------- search ------------------- #
+    def candidates(self, qn: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """질의와 가까운 nprobe 개 리스트의 문서 번호(오름차순)"""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        sims = self.centroids @ qn
+        probe = np.argpartition(sims, self.nlist - nprobe)[self.nlist - nprobe:]
+        parts = [self.list_ids[self.list_ptr[c]:self.list_ptr[c + 1]] for c in probe]
+        return np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype="int32")
@@ -1,17 +1,8 @@
 from typing import List, Dict, Tuple
+from .keywords import SYMPTOM_CANON
+from .matcher import get_matcher
 from .utils import normalize_text
 
-SYMPTOM_CANON = {
-    "두통": ["headache", "지끈지끈", "편두통", "migraine", "tension headache"],
-    "편두통": ["migraine", "headache", "광과민성", "photophobia", "오심", "nausea"],
-    "지끈지끈": ["throbbing", "pulsating", "headache"],
-    "메스꺼움": ["nausea", "오심"],
-    "속 울렁거림": ["nausea", "queasy", "오심"],
-    "소화불량": ["indigestion", "dyspepsia"],
-    "명치 통증": ["epigastric pain", "upper abdominal pain", "epigastralgia"],
-    "명치": ["epigastric", "epigastrium"],
-}
-
 DEPT_SYNONYMS = {
     "신경과": ["neurology", "neuro", "신경과학"],
     "신경외과": ["neurosurgery"],
@@ -33,14 +24,14 @@ TITLE_NORMALIZE = {
 }
 
 def expand_symptoms(symptoms: List[str]) -> List[str]:
+    # SYMPTOM_CANON 키/값 매칭은 미리 컴파일된 공유 matcher 로 한 번에 (matcher.py)
+    matcher = get_matcher()
     augmented = []
     for s in symptoms:
         s0 = s.strip()
         augmented.append(s0)
-        s_norm = normalize_text(s0)
-        for k, vals in SYMPTOM_CANON.items():
-            if normalize_text(k) in s_norm or any(normalize_text(v) in s_norm for v in vals):
-                augmented.extend([k] + vals)
+        for k in matcher.match(s0).canon:
+            augmented.extend([k] + SYMPTOM_CANON[k])
     seen = set(); out = []
     for x in augmented:
         if x not in seen:
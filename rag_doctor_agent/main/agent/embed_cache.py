@@ -0,0 +1,138 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import os, hashlib, sqlite3, threading, asyncio
+import numpy as np
+from dotenv import load_dotenv
+
+from .utils import normalize_text
+
+load_dotenv()
+
+class CachedEmbeddingClient:
+    """
+    임베딩 클라이언트 캐시 래퍼. 키 = sha1(model + 정규화된 텍스트).
+      1) 메모리 LRU (EMBED_CACHE_SIZE, 0 이면 비활성)
+      2) 선택적 디스크 계층 sqlite (EMBED_CACHE_PATH 가 설정된 경우)
+    캐시에 없는 텍스트만 모아서 내부 클라이언트에 한 번에 요청한다.
+    """
+
+    def __init__(self, inner, max_items: Optional[int] = None, path: Optional[str] = None):
+        self.inner = inner
+        self.model = getattr(inner, "model", "")
+        self.max_items = int(os.getenv("EMBED_CACHE_SIZE", "4096")) if max_items is None else max_items
+        self.path = path if path is not None else (os.getenv("EMBED_CACHE_PATH") or None)
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS emb "
+                             "(key TEXT PRIMARY KEY, vec BLOB NOT NULL)")
+            self._db.commit()
+
+    # ------------------- keys / tiers ------------------- #
+    def _key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _lru_get(self, key: str) -> Optional[np.ndarray]:
+        v = self._lru.get(key)
+        if v is not None:
+            self._lru.move_to_end(key)
+        return v
+
+    def _lru_put(self, key: str, vec: np.ndarray) -> None:
+        if self.max_items <= 0:
+            return
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def _disk_get(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if self._db is None or not keys:
+            return {}
+        found: Dict[str, np.ndarray] = {}
+        for lo in range(0, len(keys), 500):
+            part = keys[lo:lo + 500]
+            rows = self._db.execute(
+                f"SELECT key, vec FROM emb WHERE key IN ({','.join('?' * len(part))})",
+                part).fetchall()
+            for k, blob in rows:
+                found[k] = np.frombuffer(blob, dtype="float32")
+        return found
+
+    def _disk_put(self, items: Dict[str, np.ndarray]) -> None:
+        if self._db is None or not items:
+            return
+        self._db.executemany("INSERT OR REPLACE INTO emb (key, vec) VALUES (?, ?)",
+                             [(k, np.asarray(v, dtype="float32").tobytes())
+                              for k, v in items.items()])
+        self._db.commit()
+
+    # ------------------- embed ------------------- #
+    def _lookup(self, keys: List[str], texts: List[str]
+                ) -> "Tuple[Dict[str, np.ndarray], OrderedDict[str, str]]":
+        """(캐시에 있는 key → 벡터, 없는 key → 텍스트)"""
+        found: Dict[str, np.ndarray] = {}
+        missing: "OrderedDict[str, str]" = OrderedDict()
+        with self._lock:
+            for k, t in zip(keys, texts):
+                if k in found or k in missing:
+                    continue
+                v = self._lru_get(k)
+                if v is not None:
+                    found[k] = v
+                    self.hits += 1
+                else:
+                    missing[k] = t
+            disk = self._disk_get(list(missing))
+            for k, v in disk.items():
+                found[k] = v
+                self._lru_put(k, v)
+                del missing[k]
+            self.disk_hits += len(disk)
+            self.misses += len(missing)
+        return found, missing
+
+    def _store(self, missing: "OrderedDict[str, str]", vecs) -> Dict[str, np.ndarray]:
+        fresh = {k: np.asarray(v, dtype="float32") for k, v in zip(missing, vecs)}
+        with self._lock:
+            for k, v in fresh.items():
+                self._lru_put(k, v)
+            self._disk_put(fresh)
+        return fresh
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        keys = [self._key(t) for t in texts]
+        found, missing = self._lookup(keys, texts)
+        if missing:
+            # 네트워크 호출은 락 밖에서, 누락분만 한 번의 요청으로
+            found.update(self._store(missing, self.inner.embed(list(missing.values()))))
+        return np.vstack([found[k] for k in keys])
+
+    async def aembed(self, texts: List[str]) -> np.ndarray:
+        """embed 의 비동기 버전. 내부 클라이언트에 aembed 가 없으면 스레드에서 embed."""
+        keys = [self._key(t) for t in texts]
+        found, missing = self._lookup(keys, texts)
+        if missing:
+            pending = list(missing.values())
+            if hasattr(self.inner, "aembed"):
+                vecs = await self.inner.aembed(pending)
+            else:
+                vecs = await asyncio.to_thread(self.inner.embed, pending)
+            found.update(self._store(missing, vecs))
+        return np.vstack([found[k] for k in keys])
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / total, 4) if total else None,
+            "size": len(self._lru), "max_items": self.max_items,
+            "disk_path": self.path,
+        }
@@ -0,0 +1,78 @@
+from __future__ import annotations
+from typing import List, Optional, Tuple
+import os, asyncio
+import numpy as np
+from dotenv import load_dotenv
+
+from .utils import normalize_text
+
+load_dotenv()
+
+# --------------------------------------------------------------------------- #
+# 로컬 임베딩 (네트워크/API 키 불필요) – 해시 문자 n-gram
+#   - 정규화된 텍스트의 문자 n-gram 을 64bit 롤링 해시로 dim 개 버킷에 투영
+#     (signed hashing: 해시 비트로 +1/-1 → 충돌이 서로 상쇄되어 내적 편향 감소)
+#   - 버킷 값은 sublinear TF (sign * log1p|x|) 후 L2 정규화 → 내적 = cosine
+#   - 코퍼스 통계(IDF)를 쓰지 않으므로 같은 텍스트는 언제나 같은 벡터
+#     (content-hash 재사용, 질의/문서 임베딩이 별도 상태 없이 일치)
+# --------------------------------------------------------------------------- #
+class LocalHashEmbeddingClient:
+    CHUNK = 256   # 한 번에 (CHUNK x dim) 행렬만 만든다
+
+    _MULT = np.uint64(0x100000001B3)        # FNV prime
+    _MIX  = np.uint64(0x9E3779B97F4A7C15)   # golden ratio (fibonacci hashing)
+
+    def __init__(self, dim: Optional[int] = None, ngram_range: Tuple[int, int] = (1, 3)):
+        self.dim = dim or int(os.getenv("EMBED_DIM", "1024"))
+        self.ngram_range = ngram_range
+        lo, hi = ngram_range
+        # content-hash / 임베딩 캐시 키가 OpenAI 모델과 섞이지 않도록 설정을 모델명에 포함
+        self.model = f"local-hash-char{lo}{hi}-{self.dim}"
+
+    def _codes(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """텍스트들을 (공백 패딩한) 코드포인트 배열 하나로 이어 붙이고 각 시작 위치를 반환"""
+        padded = [" " + normalize_text(t) + " " for t in texts]
+        codes = np.frombuffer("".join(padded).encode("utf-32-le"), dtype="<u4").astype("uint64")
+        starts = np.zeros(len(padded) + 1, dtype="int64")
+        np.cumsum([len(p) for p in padded], out=starts[1:])
+        return codes, starts
+
+    def _embed_chunk(self, texts: List[str]) -> np.ndarray:
+        codes, starts = self._codes(texts)
+        n_rows, L = len(texts), codes.shape[0]
+        # 각 코드포인트가 속한 텍스트 번호
+        row_of = np.repeat(np.arange(n_rows, dtype="int64"), np.diff(starts))
+        acc = np.zeros(n_rows * self.dim, dtype="float64")
+        lo, hi = self.ngram_range
+        h = np.zeros(L, dtype="uint64")
+        for n in range(1, hi + 1):
+            # h[i] = 위치 i 에서 시작하는 길이 n n-gram 의 해시 (롤링, uint64 wrap-around)
+            m = L - n + 1
+            if m <= 0:
+                break
+            h = h[:m] * self._MULT + codes[n - 1:n - 1 + m]
+            if n < lo:
+                continue
+            # 텍스트 경계를 넘는 n-gram 은 제외
+            valid = row_of[:m] == row_of[n - 1:n - 1 + m]
+            mixed = (h[valid] ^ np.uint64(n)) * self._MIX
+            bucket = (mixed >> np.uint64(33)) % np.uint64(self.dim)
+            sign = np.where((mixed >> np.uint64(17)) & np.uint64(1), 1.0, -1.0)
+            acc += np.bincount(row_of[:m][valid] * self.dim + bucket.astype("int64"),
+                               weights=sign, minlength=n_rows * self.dim)
+        X = acc.reshape(n_rows, self.dim)
+        X = np.sign(X) * np.log1p(np.abs(X))
+        X /= np.linalg.norm(X, axis=1, keepdims=True) + 1e-8
+        return X.astype("float32")
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype="float32")
+        return np.vstack([self._embed_chunk(texts[lo:lo + self.CHUNK])
+                          for lo in range(0, len(texts), self.CHUNK)])
+
+    async def aembed(self, texts: List[str]) -> np.ndarray:
+        # 한 chunk 이하는 바로 계산, 그보다 크면 이벤트 루프를 막지 않도록 스레드에서
+        if len(texts) <= self.CHUNK:
+            return self.embed(texts)
+        return await asyncio.to_thread(self.embed, texts)
@@ -1,6 +1,7 @@
 from __future__ import annotations
-from typing import List, Optional
-import os
+from typing import Any, Dict, List, Optional
+import os, time, random, shutil, hashlib, asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
 from dotenv import load_dotenv
 
@@ -11,6 +12,21 @@ try:
 except Exception:  # pragma: no cover
     OpenAI = None
 
+try:
+    from openai import AsyncOpenAI
+except Exception:  # pragma: no cover
+    AsyncOpenAI = None
+
+try:
+    from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+except Exception:  # pragma: no cover
+    APIConnectionError = APIStatusError = APITimeoutError = RateLimitError = None
+
+try:
+    import tiktoken
+except Exception:  # pragma: no cover
+    tiktoken = None
+
 class OpenAIEmbeddingClient:
     def __init__(self, model: Optional[str] = None):
         self.model = model or os.getenv("EMBED_MODEL", "text-embedding-3-large")
@@ -18,11 +34,133 @@ class OpenAIEmbeddingClient:
         if not api_key or OpenAI is None:
             raise RuntimeError("OPENAI_API_KEY is missing or openai package not available.")
         self.client = OpenAI()
+        self._aclient = None   # AsyncOpenAI – aembed 첫 호출 때 생성
+        self.last_bulk_stats: Dict[str, Any] = {}
 
-    def embed(self, texts: List[str]) -> np.ndarray:
-        # Batching is handled implicitly by OpenAI client; keep small batches if needed
-        res = self.client.embeddings.create(model=self.model, input=texts)
+    @staticmethod
+    def _to_matrix(res) -> np.ndarray:
         vecs = [np.array(d.embedding, dtype="float32") for d in res.data]
         # normalize
         vecs = [v / (np.linalg.norm(v) + 1e-8) for v in vecs]
         return np.vstack(vecs)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        # Batching is handled implicitly by OpenAI client; keep small batches if needed
+        res = self.client.embeddings.create(model=self.model, input=texts)
+        return self._to_matrix(res)
+
+    async def aembed(self, texts: List[str]) -> np.ndarray:
+        """embed 의 비동기 버전 (이벤트 루프를 막지 않음). AsyncOpenAI 가 없으면 스레드에서 embed."""
+        if AsyncOpenAI is None:
+            return await asyncio.to_thread(self.embed, texts)
+        if self._aclient is None:
+            self._aclient = AsyncOpenAI()
+        res = await self._aclient.embeddings.create(model=self.model, input=texts)
+        return self._to_matrix(res)
+
+    # ------------------- bulk ------------------- #
+    def count_tokens(self, text: str) -> int:
+        if tiktoken is not None:
+            try:
+                return len(tiktoken.encoding_for_model(self.model).encode(text))
+            except Exception:
+                pass
+        # 보수적 추정: 한글은 음절당 1~2 토큰 → UTF-8 바이트 / 2
+        return len(text.encode("utf-8")) // 2 + 1
+
+    def plan_batches(self, texts: List[str], max_tokens: int, max_items: int) -> List[List[int]]:
+        """입력 순서를 유지하면서 토큰 수 / 개수 상한을 넘지 않도록 묶는다."""
+        batches: List[List[int]] = []
+        cur: List[int] = []
+        cur_tokens = 0
+        for i, t in enumerate(texts):
+            n = self.count_tokens(t)
+            if cur and (cur_tokens + n > max_tokens or len(cur) >= max_items):
+                batches.append(cur)
+                cur, cur_tokens = [], 0
+            cur.append(i)
+            cur_tokens += n
+        if cur:
+            batches.append(cur)
+        return batches
+
+    @staticmethod
+    def _is_transient(e: Exception) -> bool:
+        """재시도할 오류: rate limit / 연결 / 타임아웃 / 5xx. 그 밖(4xx, 입력 오류 등)은 바로 실패"""
+        transient = tuple(c for c in (RateLimitError, APIConnectionError, APITimeoutError) if c is not None)
+        if transient and isinstance(e, transient):
+            return True
+        if APIStatusError is not None and isinstance(e, APIStatusError):
+            return (getattr(e, "status_code", 0) or 0) >= 500
+        return False
+
+    def _embed_with_retry(self, texts: List[str], max_retries: int) -> np.ndarray:
+        for attempt in range(max_retries + 1):
+            try:
+                return self.embed(texts)
+            except Exception as e:
+                if attempt == max_retries or not self._is_transient(e):
+                    raise
+                # 지수 백오프 + jitter (rate limit / 일시적 네트워크 오류)
+                time.sleep(min(60.0, 2 ** attempt) + random.random())
+        raise RuntimeError("unreachable")
+
+    def embed_bulk(self, texts: List[str], checkpoint_dir: Optional[str] = None,
+                   max_tokens: Optional[int] = None, max_items: Optional[int] = None,
+                   max_workers: Optional[int] = None, max_retries: int = 5) -> np.ndarray:
+        """
+        대량 임베딩: 토큰 상한으로 나눈 배치를 스레드 풀로 동시에 요청하고,
+        실패한 배치는 백오프 후 재시도한다. checkpoint_dir 가 있으면 완료된 배치를
+        디스크에 저장해 중단된 실행을 같은 입력으로 다시 돌리면 이어서 진행한다.
+        처리량 등은 self.last_bulk_stats 에 남긴다.
+        """
+        max_tokens = max_tokens or int(os.getenv("EMBED_BATCH_TOKENS", "100000"))
+        max_items = max_items or int(os.getenv("EMBED_BATCH_SIZE", "512"))
+        max_workers = max_workers or int(os.getenv("EMBED_WORKERS", "4"))
+        t0 = time.perf_counter()
+        batches = self.plan_batches(texts, max_tokens, max_items)
+
+        ckpt = None
+        if checkpoint_dir:
+            # 입력/모델/배치 구성이 같을 때만 이어받기
+            h = hashlib.sha1(f"{self.model}\x00{max_tokens}\x00{max_items}".encode("utf-8"))
+            for t in texts:
+                h.update(t.encode("utf-8")); h.update(b"\x1e")
+            ckpt = os.path.join(checkpoint_dir, h.hexdigest())
+            os.makedirs(ckpt, exist_ok=True)
+
+        results: Dict[int, np.ndarray] = {}
+        if ckpt:
+            for b in range(len(batches)):
+                p = os.path.join(ckpt, f"batch_{b:06d}.npy")
+                if os.path.exists(p):
+                    results[b] = np.load(p)
+        resumed = len(results)
+
+        def run(b: int) -> np.ndarray:
+            vecs = self._embed_with_retry([texts[i] for i in batches[b]], max_retries)
+            if ckpt:
+                p = os.path.join(ckpt, f"batch_{b:06d}.npy")
+                with open(p + ".tmp", "wb") as f:
+                    np.save(f, vecs)
+                os.replace(p + ".tmp", p)
+            return vecs
+
+        todo = [b for b in range(len(batches)) if b not in results]
+        if todo:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as ex:
+                futures = {ex.submit(run, b): b for b in todo}
+                for fut in as_completed(futures):
+                    results[futures[fut]] = fut.result()
+
+        out = np.vstack([results[b] for b in range(len(batches))]) if batches \
+            else np.zeros((0, 0), dtype="float32")
+        if ckpt:
+            shutil.rmtree(ckpt, ignore_errors=True)
+        seconds = time.perf_counter() - t0
+        self.last_bulk_stats = {
+            "texts": len(texts), "batches": len(batches), "resumed_batches": resumed,
+            "seconds": round(seconds, 3),
+            "docs_per_sec": round(len(texts) / seconds, 1) if seconds > 0 else None,
+        }
+        return out
@@ -1,6 +1,6 @@
 
 from __future__ import annotations
-import os, json, re
+import os, json, re, asyncio
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 load_dotenv()
@@ -9,6 +9,7 @@ from .retriever import get_shared_retriever
 from .rules import AdminRules
 from .llm import LLMClient
 from .augmentation import expand_symptoms
+from .matcher import get_matcher
 from .output_enforcer import enforce_output, OutputSchema
 from .utils import normalize_text
 
@@ -99,13 +100,12 @@ def _select_with_rules(query: Dict[str, Any], retrieved: List[Dict[str, Any]], r
             })
 
     if not candidates:
-        fbmap = rules.get_fallback_depts_map()
+        # fallback_depts_map 키 매칭은 rules.yaml 로 컴파일된 공유 matcher 사용
+        matcher = get_matcher(rules.path)
         dept_score = {}
         for s in aug_syms:
-            for key, depts in fbmap.items():
-                if key in s:
-                    for d in depts:
-                        dept_score[d] = dept_score.get(d, 0) + 1
+            for d in matcher.match(s).fallback_depts:
+                dept_score[d] = dept_score.get(d, 0) + 1
         sel_dept = sorted(dept_score.items(), key=lambda x: -x[1])[0][0] if dept_score else ""
         candidates.append({"doctor_name": "", "dept": sel_dept, "title": "", "score": 0.1, "evidence_id": "", "evidence_text": "", "matched_symptoms": aug_syms[:3]})
 
@@ -257,22 +257,16 @@ def _select_with_rules(query: Dict[str, Any], retrieved: List[Dict[str, Any]], r
     }
     return out
 
-def build_and_run_agent(input_json: Dict[str, Any]) -> OutputSchema:
-    """Prefer LangGraph when available; otherwise fallback pipeline."""
-    if HAS_LANGGRAPH:
-        graph = build_langgraph_agent()
-        if graph is not None:
-            app = graph.compile()
-            state = {"input_json": input_json, "retrieved": [], "retrieval_ok": False, "llm_ok": True, "draft_output": {}, "output": {}, "logs": [], "errors": []}
-            final = app.invoke(state)
-            return enforce_output(final["output"])
-    # Fallback path
-    retriever = get_shared_retriever()
-    rules = AdminRules()
-    top_k = int(os.getenv("TOP_K", str(rules.get_top_k())))
-    retrieved = retriever.retrieve(input_json.get("symptoms", []), top_k=max(12, top_k*3))
-    llm = LLMClient()
-    llm_output = llm.structured_select(input_json, retrieved, rules)
+def _availability_filter(rules: AdminRules) -> Optional[Dict[str, Any]]:
+    """예약 불가(doctor_availability: false) 의료진 문서는 검색 점수 계산 전에 제외"""
+    off = [name for name, ok in (rules.get_doctor_availability() or {}).items() if not ok]
+    return {"doctor_name": {"not_in": off}} if off else None
+
+def _initial_state(input_json: Dict[str, Any]) -> Dict[str, Any]:
+    return {"input_json": input_json, "retrieved": [], "retrieval_ok": False, "llm_ok": True, "draft_output": {}, "output": {}, "logs": [], "errors": []}
+
+def _fallback_output(input_json: Dict[str, Any], retrieved: List[Dict[str, Any]],
+                     llm_output: Optional[Dict[str, Any]], rules: AdminRules) -> OutputSchema:
     if llm_output:
         payload = {
             "patient_name": input_json.get("patient_name", ""),
@@ -291,7 +285,47 @@ def build_and_run_agent(input_json: Dict[str, Any]) -> OutputSchema:
     payload = _select_with_rules(input_json, retrieved, rules)
     return enforce_output(payload)
 
-def build_langgraph_agent():
+def build_and_run_agent(input_json: Dict[str, Any]) -> OutputSchema:
+    """Prefer LangGraph when available; otherwise fallback pipeline."""
+    if HAS_LANGGRAPH:
+        graph = build_langgraph_agent()
+        if graph is not None:
+            app = graph.compile()
+            final = app.invoke(_initial_state(input_json))
+            return enforce_output(final["output"])
+    # Fallback path
+    retriever = get_shared_retriever()
+    rules = AdminRules()
+    top_k = int(os.getenv("TOP_K", str(rules.get_top_k())))
+    retrieved = retriever.retrieve(input_json.get("symptoms", []), top_k=max(12, top_k*3),
+                                   filter=_availability_filter(rules))
+    llm = LLMClient()
+    llm_output = llm.structured_select(input_json, retrieved, rules)
+    return _fallback_output(input_json, retrieved, llm_output, rules)
+
+async def abuild_and_run_agent(input_json: Dict[str, Any]) -> OutputSchema:
+    """
+    build_and_run_agent 의 비동기 버전. 검색은 Retriever.aretrieve, 동기 LLM 호출은
+    스레드에서 실행하므로 한 프로세스에서 여러 추천 요청을 동시에 처리할 수 있다.
+    """
+    if HAS_LANGGRAPH:
+        graph = build_langgraph_agent(use_async=True)
+        if graph is not None:
+            app = graph.compile()
+            final = await app.ainvoke(_initial_state(input_json))
+            return enforce_output(final["output"])
+    # Fallback path
+    retriever = get_shared_retriever()
+    rules = AdminRules()
+    top_k = int(os.getenv("TOP_K", str(rules.get_top_k())))
+    retrieved = await retriever.aretrieve(input_json.get("symptoms", []), top_k=max(12, top_k*3),
+                                          filter=_availability_filter(rules))
+    llm = LLMClient()
+    llm_output = await asyncio.to_thread(llm.structured_select, input_json, retrieved, rules)
+    return _fallback_output(input_json, retrieved, llm_output, rules)
+
+def build_langgraph_agent(use_async: bool = False):
+    """use_async=True 면 retrieve / select_llm 노드를 async 로 등록 (ainvoke 용)"""
     if not HAS_LANGGRAPH:
         return None
     from typing import TypedDict
@@ -322,20 +356,39 @@ def build_langgraph_agent():
         out.update(log(state, "prepare"))
         return out
 
-    def node_retrieve(state):
+    def retrieve_top_k():
         top_k = int(os.getenv("TOP_K", str(rules.get_top_k())))
-        try:
-            hits = retriever.retrieve(state["input_json"].get("symptoms", []), top_k=max(12, top_k*3))
-        except Exception as e:
-            errs = state.get("errors", []); errs.append(f"retrieve_error:{type(e).__name__}")
-            out = {"retrieved": [], "retrieval_ok": False, "errors": errs}
-            out.update(log(state, "retrieve_fail"))
-            return out
+        return max(12, top_k*3)
+
+    def retrieve_fail(state, e: Exception):
+        errs = state.get("errors", []); errs.append(f"retrieve_error:{type(e).__name__}")
+        out = {"retrieved": [], "retrieval_ok": False, "errors": errs}
+        out.update(log(state, "retrieve_fail"))
+        return out
+
+    def retrieve_ok(state, hits):
         provider_hits = [h for h in hits if (h.get("meta", {}).get("doctor_name") and h.get("meta", {}).get("dept"))]
         out = {"retrieved": hits, "retrieval_ok": len(provider_hits) > 0}
         out.update(log(state, f"retrieve_ok:{len(hits)}"))
         return out
 
+    def node_retrieve(state):
+        try:
+            hits = retriever.retrieve(state["input_json"].get("symptoms", []), top_k=retrieve_top_k(),
+                                      filter=_availability_filter(rules))
+        except Exception as e:
+            return retrieve_fail(state, e)
+        return retrieve_ok(state, hits)
+
+    async def anode_retrieve(state):
+        # 시간 초과(RETRIEVE_TIMEOUT)는 검색 실패로 처리, 취소(CancelledError)는 그대로 전파
+        try:
+            hits = await retriever.aretrieve(state["input_json"].get("symptoms", []), top_k=retrieve_top_k(),
+                                             filter=_availability_filter(rules))
+        except Exception as e:
+            return retrieve_fail(state, e)
+        return retrieve_ok(state, hits)
+
     def branch_select(state):
         if state.get("llm_ok", False):
             return "llm"
@@ -385,6 +438,10 @@ def build_langgraph_agent():
             out.update(log(state, "select_llm_error_fallback_rules"))
             return out
 
+    async def anode_select_llm(state):
+        # LLMClient 는 동기 OpenAI 클라이언트 → 이벤트 루프를 막지 않도록 스레드에서
+        return await asyncio.to_thread(node_select_llm, state)
+
     def node_select_rules(state):
         # 처음부터 규칙 기반 선택을 사용하는 경우 (LLM 비활성화 상태)
         # print("🔧 규칙 기반 의료진 선택 수행 (LLM 미사용)")
@@ -416,8 +473,8 @@ def build_langgraph_agent():
         return out
 
     graph.add_node("prepare", node_prepare)
-    graph.add_node("retrieve", node_retrieve)
-    graph.add_node("select_llm", node_select_llm)
+    graph.add_node("retrieve", anode_retrieve if use_async else node_retrieve)
+    graph.add_node("select_llm", anode_select_llm if use_async else node_select_llm)
     graph.add_node("select_rules", node_select_rules)
     graph.add_node("validate", node_validate)
     graph.add_node("repair_with_rules", node_repair_with_rules)
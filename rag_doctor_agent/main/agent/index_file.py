@@ -0,0 +1,198 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+import os, json, bisect, struct
+import numpy as np
+
+# --------------------------------------------------------------------------- #
+# 단일 파일 바이너리 인덱스 컨테이너 (index.bin)
+#
+#   [0:8)    MAGIC
+#   [8:12)   format version (uint32 LE)
+#   [12:16)  header 길이 (uint32 LE)
+#   [16:..)  header JSON {"meta": {...}, "sections": {name: {offset, dtype, shape}}}
+#   이후     64바이트 정렬된 섹션들 (offset 은 데이터 영역 시작 기준)
+#
+# 파일 전체를 읽기 전용 memmap 으로 열고 섹션은 복사 없이 view 로 꺼낸다.
+# 문자열(문서 JSON, 어휘)은 offsets(int64, n+1) + blob(uint8) 문자열 테이블로 저장하고
+# 필요한 항목만 그때그때 디코딩한다.
+# --------------------------------------------------------------------------- #
+MAGIC          = b"RAGIDX\x00\x01"
+FORMAT_VERSION = 1
+ALIGN          = 64
+_PREFIX        = struct.Struct("<8sII")
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def pack_strings(items: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """문자열 목록 → (offsets int64[n+1], utf-8 blob uint8)"""
+    encoded = [s.encode("utf-8") for s in items]
+    offsets = np.zeros(len(encoded) + 1, dtype="int64")
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype="uint8")
+
+
+def write_index_file(path: str, sections: Dict[str, np.ndarray],
+                     meta: Optional[Dict[str, Any]] = None) -> int:
+    """섹션들을 한 파일로 기록 (tmp → os.replace 로 원자적 교체). 기록한 바이트 수 반환."""
+    layout: Dict[str, Dict[str, Any]] = {}
+    arrays: List[Tuple[int, np.ndarray]] = []
+    off = 0
+    for name, arr in sections.items():
+        arr = np.ascontiguousarray(arr)
+        layout[name] = {"offset": off, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+        arrays.append((off, arr))
+        off = _align(off + arr.nbytes)
+    header = json.dumps({"meta": meta or {}, "sections": layout},
+                        ensure_ascii=False).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(header))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for rel, arr in arrays:
+            f.seek(data_start + rel)
+            f.write(arr.tobytes(order="C"))
+        total = data_start + off
+        f.truncate(total)
+    os.replace(tmp, path)
+    return total
+
+
+class IndexFile:
+    """index.bin 읽기 전용 뷰"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, hlen = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a RAG index file: {path}")
+            if version > FORMAT_VERSION:
+                raise ValueError(f"Unsupported index format version {version} "
+                                 f"(supported <= {FORMAT_VERSION}): {path}")
+            header = json.loads(f.read(hlen).decode("utf-8"))
+        self.version  = version
+        self.meta: Dict[str, Any] = header.get("meta", {})
+        self.sections: Dict[str, Dict[str, Any]] = header["sections"]
+        self._data_start = _align(_PREFIX.size + hlen)
+        self._mm = np.memmap(path, dtype="uint8", mode="r")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sections
+
+    def array(self, name: str, mmap: bool = True) -> np.ndarray:
+        """섹션 배열. mmap=False 면 메모리로 복사."""
+        s = self.sections[name]
+        dtype = np.dtype(s["dtype"])
+        lo = self._data_start + s["offset"]
+        n = int(np.prod(s["shape"], dtype="int64")) * dtype.itemsize
+        arr = self._mm[lo:lo + n].view(dtype).reshape(s["shape"])
+        return arr if mmap else np.array(arr)
+
+    def strings(self, name: str) -> "StringTable":
+        return StringTable(self.array(name + "_off"), self.array(name + "_blob"))
+
+
+# --------------------------------------------------------------------------- #
+# Lazy views
+# --------------------------------------------------------------------------- #
+class StringTable(Sequence):
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob    = blob
+
+    def __len__(self) -> int:
+        return int(self.offsets.shape[0]) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+
+class SortedVocab(Mapping):
+    """
+    사전순으로 정렬된 어휘 테이블 → term id 매핑 (dict 를 만들지 않고 이분 탐색).
+    Python 문자열 비교(코드포인트 순)는 UTF-8 바이트 순서와 같다.
+    """
+
+    def __init__(self, terms: StringTable):
+        self.terms = terms
+
+    def get(self, term: str, default=None):
+        i = bisect.bisect_left(self.terms, term)
+        return i if i < len(self.terms) and self.terms[i] == term else default
+
+    def __getitem__(self, term: str) -> int:
+        i = self.get(term)
+        if i is None:
+            raise KeyError(term)
+        return i
+
+    def __contains__(self, term) -> bool:
+        return self.get(term) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+
+class LazyRecords(Sequence):
+    """JSON 레코드 문자열 테이블 – 접근한 항목만 json.loads → factory"""
+
+    def __init__(self, table: StringTable, factory: Callable[[Dict[str, Any]], Any] = dict):
+        self.table   = table
+        self.factory = factory
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return self.factory(json.loads(self.table[i]))
+
+
+class LazyDocToks(Sequence):
+    """문서별 토큰 목록 (CSR: tok_ptr / tok_ids → 어휘 테이블)"""
+
+    def __init__(self, ptr: np.ndarray, ids: np.ndarray, terms: StringTable):
+        self.ptr   = ptr
+        self.ids   = ids
+        self.terms = terms
+
+    def __len__(self) -> int:
+        return int(self.ptr.shape[0]) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return [self.terms[t] for t in self.ids[self.ptr[i]:self.ptr[i + 1]].tolist()]
+
+
+class LazyDf(Mapping):
+    """term → document frequency (역색인 indptr 의 차분)"""
+
+    def __init__(self, vocab: SortedVocab, indptr: np.ndarray):
+        self.vocab  = vocab
+        self.indptr = indptr
+
+    def __getitem__(self, term: str) -> int:
+        t = self.vocab[term]
+        return int(self.indptr[t + 1] - self.indptr[t])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.vocab)
+
+    def __len__(self) -> int:
+        return len(self.vocab)
@@ -0,0 +1,53 @@
+import os
+
+# --------------------------------------------------------------------------- #
+# 증상 / 진료과 키워드 사전 (데이터 전용 – 패키지 안의 다른 모듈을 import 하지 않음)
+#   augmentation(expand_symptoms) 과 matcher(오토마톤 컴파일) 가 함께 쓴다.
+#   rules → augmentation → matcher 순서로 import 되므로 규칙 파일 경로도 여기 둔다.
+# --------------------------------------------------------------------------- #
+
+# 관리자 규칙 파일 (fallback_depts_map 등) – rules.AdminRules 와 matcher 가 함께 사용
+RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "rules.yaml")
+
+SYMPTOM_CANON = {
+    "두통": ["headache", "지끈지끈", "편두통", "migraine", "tension headache"],
+    "편두통": ["migraine", "headache", "광과민성", "photophobia", "오심", "nausea"],
+    "지끈지끈": ["throbbing", "pulsating", "headache"],
+    "메스꺼움": ["nausea", "오심"],
+    "속 울렁거림": ["nausea", "queasy", "오심"],
+    "소화불량": ["indigestion", "dyspepsia"],
+    "명치 통증": ["epigastric pain", "upper abdominal pain", "epigastralgia"],
+    "명치": ["epigastric", "epigastrium"],
+}
+
+# 검색 질의에 덧붙일 진료과 키워드 (증상마다 처음 맞은 그룹 하나만 – Retriever._build_query)
+DEPT_KEYWORD_ROUTES = [
+    (["허리", "척추", "디스크", "관절"], ["정형외과", "척추센터", "척추비수술클리닉"]),
+    (["두통", "머리", "어지러움"], ["신경과", "신경외과"]),
+    (["소화", "배", "명치", "위"], ["내과", "소화기내과"]),
+    (["무릎", "어깨", "팔", "다리"], ["정형외과", "관절센터"]),
+]
+
+# 규칙 기반 추천(RAG 실패 시 Agent3RAG 폴백)의 증상 → 진료과
+RULE_DEPT_MAP = {
+    # 관절 관련
+    "무릎": "정형외과", "어깨": "정형외과", "팔꿈치": "정형외과",
+    "발목": "정형외과", "손목": "정형외과",
+    "관절": "정형외과", "통증": "정형외과", "부상": "정형외과",
+
+    # 척추 관련
+    "목": "척추센터", "등": "척추센터", "허리": "척추센터",
+    "디스크": "척추센터", "척추": "척추센터", "요통": "척추센터",
+
+    # 내과 관련
+    "복통": "내과", "소화": "내과", "위": "내과", "장": "내과",
+    "내시경": "내과", "검진": "내과", "비만": "내과",
+    "당뇨": "내과", "고혈압": "내과", "고지혈": "내과",
+
+    # 뇌신경 관련
+    "두통": "뇌신경센터", "어지럼": "뇌신경센터", "신경": "뇌신경센터",
+    "치매": "뇌신경센터", "뇌졸중": "뇌신경센터", "뇌": "뇌신경센터",
+
+    # 응급
+    "응급": "응급의학센터", "긴급": "응급의학센터", "사고": "응급의학센터"
+}
@@ -0,0 +1,154 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os, threading
+import yaml
+
+from .keywords import SYMPTOM_CANON, DEPT_KEYWORD_ROUTES, RULE_DEPT_MAP, RULES_PATH
+from .utils import normalize_text
+
+# --------------------------------------------------------------------------- #
+# 증상 / 진료과 키워드 다중 패턴 매칭 (Aho-Corasick)
+#
+#   SYMPTOM_CANON 키·값, DEPT_KEYWORD_ROUTES 키워드, RULE_DEPT_MAP 키,
+#   rules.yaml 의 fallback_depts_map 키를 한 오토마톤으로 컴파일해 두고
+#   입력 문자열을 한 번만 훑어서 맞은 canon 용어 / 진료과를 모두 돌려준다.
+#   패턴과 입력은 모두 normalize_text (NFKC + 소문자) 기준으로 부분 문자열 매칭.
+#   get_matcher() 는 rules.yaml 의 mtime / 크기가 바뀔 때만 다시 만든다.
+#   같은 문자열(확장된 canon 용어 등)은 반복해서 들어오므로 결과를 MATCH_CACHE 개까지 캐시.
+# --------------------------------------------------------------------------- #
+CANON, ROUTE, FALLBACK, RULE = "canon", "route", "fallback", "rule"
+MATCH_CACHE = int(os.getenv("MATCH_CACHE", "4096"))
+
+
+class AhoCorasick:
+    """문자열 패턴 집합 → 입력에 부분 문자열로 등장하는 패턴 번호 (한 번의 선형 탐색)"""
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.out: List[Tuple[int, ...]] = [()]
+        for pid, p in enumerate(self.patterns):
+            if not p:
+                continue
+            s = 0
+            for ch in p:
+                nxt = self.goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[s][ch] = nxt
+                    self.goto.append({})
+                    self.out.append(())
+                s = nxt
+            self.out[s] += (pid,)
+        # 실패 링크 (BFS) – 출력은 실패 링크를 따라 합쳐 둔다
+        self.fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for s in queue:
+            for ch, t in self.goto[s].items():
+                f = self.fail[s]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[t] = self.goto[f].get(ch, 0)
+                self.out[t] += self.out[self.fail[t]]
+                queue.append(t)
+
+    def find(self, text: str) -> set:
+        """text 에 등장하는 패턴 번호 집합"""
+        goto, fail, out = self.goto, self.fail, self.out
+        hits: set = set()
+        s = 0
+        for ch in text:
+            while s and ch not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(ch, 0)
+            if out[s]:
+                hits.update(out[s])
+        return hits
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    canon: Tuple[str, ...] = ()            # SYMPTOM_CANON 키 (사전 순서)
+    route_depts: Tuple[str, ...] = ()      # 처음 맞은 DEPT_KEYWORD_ROUTES 그룹의 진료과
+    fallback_depts: Tuple[str, ...] = ()   # 맞은 fallback_depts_map 키별 진료과 (중복 포함)
+    rule_depts: Tuple[str, ...] = ()       # RULE_DEPT_MAP 진료과 (키 순서, 중복 제거)
+
+
+class SymptomMatcher:
+    def __init__(self, fallback_depts_map: Optional[Dict[str, List[str]]] = None):
+        self.canon_keys = list(SYMPTOM_CANON)
+        self.fallback = dict(fallback_depts_map or {})
+        self.fallback_keys = list(self.fallback)
+        self.rule_keys = list(RULE_DEPT_MAP)
+
+        payloads: Dict[str, List[Tuple[str, int]]] = {}
+        def add(term: Any, kind: str, i: int) -> None:
+            t = normalize_text(term)
+            if t:
+                payloads.setdefault(t, []).append((kind, i))
+        for i, (k, vals) in enumerate(SYMPTOM_CANON.items()):
+            for term in [k] + list(vals):
+                add(term, CANON, i)
+        for i, (keywords, _) in enumerate(DEPT_KEYWORD_ROUTES):
+            for term in keywords:
+                add(term, ROUTE, i)
+        for i, k in enumerate(self.fallback_keys):
+            add(k, FALLBACK, i)
+        for i, k in enumerate(self.rule_keys):
+            add(k, RULE, i)
+        self.terms = list(payloads)
+        self.payloads = [payloads[t] for t in self.terms]
+        self.automaton = AhoCorasick(self.terms)
+        self.match = lru_cache(maxsize=MATCH_CACHE)(self._match)
+
+    def _match(self, text: str) -> MatchResult:
+        """text 한 번 탐색 → 종류별 결과 (인스턴스마다 lru_cache 로 감싼 self.match 로 호출)"""
+        hit: Dict[str, set] = {CANON: set(), ROUTE: set(), FALLBACK: set(), RULE: set()}
+        for pid in self.automaton.find(normalize_text(text)):
+            for kind, i in self.payloads[pid]:
+                hit[kind].add(i)
+        return MatchResult(
+            canon=tuple(self.canon_keys[i] for i in sorted(hit[CANON])),
+            # if/elif 순서: 가장 앞 그룹 하나만
+            route_depts=tuple(DEPT_KEYWORD_ROUTES[min(hit[ROUTE])][1]) if hit[ROUTE] else (),
+            fallback_depts=tuple(d for i in sorted(hit[FALLBACK])
+                                 for d in self.fallback[self.fallback_keys[i]] or []),
+            rule_depts=tuple(dict.fromkeys(RULE_DEPT_MAP[self.rule_keys[i]]
+                                           for i in sorted(hit[RULE]))),
+        )
+
+
+# ------------------- shared instance ------------------- #
+_LOCK = threading.Lock()
+_CACHE: Dict[str, Tuple[Optional[Tuple[int, int]], SymptomMatcher]] = {}
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load_fallback_map(path: str) -> Dict[str, List[str]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return (yaml.safe_load(f) or {}).get("fallback_depts_map") or {}
+
+
+def get_matcher(rules_path: str = RULES_PATH) -> SymptomMatcher:
+    """공유 matcher – rules.yaml 이 바뀐 경우에만 다시 컴파일"""
+    stamp = _stat(rules_path)
+    cached = _CACHE.get(rules_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with _LOCK:
+        cached = _CACHE.get(rules_path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, SymptomMatcher(_load_fallback_map(rules_path)))
+            _CACHE[rules_path] = cached
+        return cached[1]
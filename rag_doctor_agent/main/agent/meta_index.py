@@ -0,0 +1,138 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import re
+import numpy as np
+
+# --------------------------------------------------------------------------- #
+# 메타데이터 prefilter 색인 (dept / type / doctor_name / provider)
+#
+#   필드마다 값 → 문서 행 번호 postings (CSR: values, indptr, rows)
+#   "정형외과/O.P", "김재훈/D001" 같은 라벨은 전체 문자열과 '/', '|' 로 나눈 각 부분을
+#   모두 키로 등록해 "정형외과", "김재훈" 으로도 찾을 수 있다.
+#   provider: doctor_name 과 dept 가 모두 있는 문서 (graph 의 의료진 후보 조건과 같음)
+#
+# 필터 식 (dict, 필드끼리는 AND):
+#   {"dept": "정형외과"}                         값 일치
+#   {"dept": ["정형외과", "신경과"]}              하나라도 일치
+#   {"doctor_name": {"not_in": ["홍길동"]}}      제외 ({"in": [...]} 도 가능)
+#   {"provider": True}
+# --------------------------------------------------------------------------- #
+META_FIELDS = ("dept", "type", "doctor_name", "provider")
+# Doc.meta 에서 값을 찾을 키 (graph._select_with_rules 와 같은 별칭)
+META_KEYS = {"dept": ("dept", "진료과"),
+             "doctor_name": ("doctor_name", "의료진명"),
+             "type": ("type",)}
+FILTER_OPS = ("in", "not_in")
+
+
+def label_keys(value: Any) -> List[str]:
+    """라벨 값 → 색인 키 (전체 문자열 + '/', '|' 로 나눈 부분)"""
+    if value is None:
+        return []
+    s = str(value).strip()
+    if not s:
+        return []
+    keys = [s] + [p.strip() for p in re.split(r"[\|/]+", s) if p.strip()]
+    return list(dict.fromkeys(keys))
+
+
+def doc_meta_keys(doc) -> Dict[str, List[str]]:
+    """문서 하나의 필드별 색인 키"""
+    meta = doc.meta or {}
+    out: Dict[str, List[str]] = {}
+    for field, names in META_KEYS.items():
+        value = next((meta[k] for k in names if meta.get(k)), None)
+        if value is None and field == "type":
+            value = getattr(doc, "type", None)
+        out[field] = label_keys(value)
+    out["provider"] = ["1"] if out["dept"] and out["doctor_name"] else []
+    return out
+
+
+class MetaIndex:
+    """필드별 값 → 행 postings. append 된 행은 CSR 을 다시 만들지 않고 extra 에 보관."""
+
+    def __init__(self, N: int, fields: Dict[str, Tuple[Mapping[str, int], np.ndarray, np.ndarray]]):
+        self.N = N
+        self.fields = fields
+        self.extra: Dict[str, Dict[str, List[int]]] = {f: {} for f in fields}
+
+    @classmethod
+    def build(cls, docs: Sequence) -> "MetaIndex":
+        postings: Dict[str, Dict[str, List[int]]] = {f: {} for f in META_FIELDS}
+        for i, d in enumerate(docs):
+            for field, keys in doc_meta_keys(d).items():
+                for k in keys:
+                    postings[field].setdefault(k, []).append(i)
+        fields = {}
+        for field, by_key in postings.items():
+            values = sorted(by_key)
+            indptr = np.zeros(len(values) + 1, dtype="int64")
+            np.cumsum([len(by_key[v]) for v in values], out=indptr[1:])
+            rows = np.fromiter((r for v in values for r in by_key[v]),
+                               dtype="int32", count=int(indptr[-1]))
+            fields[field] = ({v: i for i, v in enumerate(values)}, indptr, rows)
+        return cls(len(docs), fields)
+
+    def values(self, field: str) -> List[str]:
+        vocab = self.fields[field][0]
+        return sorted(set(vocab) | set(self.extra[field]))
+
+    def arrays(self, field: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """(정렬된 값, indptr, rows) – index.bin 저장용 (extra 는 compact 후에만 비어 있음)"""
+        vocab, indptr, rows = self.fields[field]
+        return sorted(vocab, key=vocab.__getitem__), indptr, rows
+
+    # ------------------- incremental ------------------- #
+    def append(self, docs: Iterable) -> None:
+        for d in docs:
+            for field, keys in doc_meta_keys(d).items():
+                for k in keys:
+                    self.extra[field].setdefault(k, []).append(self.N)
+            self.N += 1
+
+    def clone(self) -> "MetaIndex":
+        c = MetaIndex(self.N, self.fields)
+        c.extra = {f: {k: list(v) for k, v in e.items()} for f, e in self.extra.items()}
+        return c
+
+    # ------------------- filter ------------------- #
+    def rows(self, field: str, key: str) -> np.ndarray:
+        vocab, indptr, rows = self.fields[field]
+        i = vocab.get(key)
+        base = rows[indptr[i]:indptr[i + 1]] if i is not None else np.zeros(0, dtype="int32")
+        extra = self.extra[field].get(key)
+        return base if not extra else np.concatenate([base, np.asarray(extra, dtype="int32")])
+
+    def _any(self, field: str, keys: Iterable[Any]) -> np.ndarray:
+        m = np.zeros(self.N, dtype=bool)
+        for k in keys:
+            if isinstance(k, bool):
+                # {"provider": True / False} – 플래그 필드
+                hit = np.zeros(self.N, dtype=bool)
+                hit[self.rows(field, "1")] = True
+                m |= hit if k else ~hit
+                continue
+            m[self.rows(field, str(k).strip())] = True
+        return m
+
+    def mask(self, flt: Mapping[str, Any]) -> np.ndarray:
+        """필터 식에 맞는 행 = True 인 bool 배열"""
+        m = np.ones(self.N, dtype=bool)
+        for field, cond in flt.items():
+            if field not in self.fields:
+                raise ValueError(f"Unknown filter field: {field!r} (supported: {META_FIELDS})")
+            if isinstance(cond, Mapping):
+                bad = set(cond) - set(FILTER_OPS)
+                if bad:
+                    raise ValueError(f"Unknown filter op {sorted(bad)} for {field!r} "
+                                     f"(supported: {FILTER_OPS})")
+                if "in" in cond:
+                    m &= self._any(field, cond["in"])
+                if "not_in" in cond:
+                    m &= ~self._any(field, cond["not_in"])
+            elif isinstance(cond, (list, tuple, set, frozenset)):
+                m &= self._any(field, cond)
+            else:
+                m &= self._any(field, [cond])
+        return m
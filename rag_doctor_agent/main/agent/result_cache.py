@@ -0,0 +1,72 @@
+from __future__ import annotations
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from collections import OrderedDict
+import os, copy, threading, time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class ResultCache:
+    """
+    검색 결과 캐시 (Retriever.retrieve 앞단). 메모리 LRU + TTL.
+      - 크기: RESULT_CACHE_SIZE (0 이면 비활성), 만료: RESULT_CACHE_TTL 초 (0 이면 만료 없음)
+      - 키에 인덱스 버전이 들어가고, 인덱스 교체 시 clear() 로 비운다.
+    값은 결과 dict 목록이며 넣을 때와 꺼낼 때 모두 깊은 복사(meta 등 중첩 dict / list 포함)를 하므로
+    호출자가 결과를 고쳐도 캐시 항목이나 다른 호출자의 결과는 바뀌지 않는다.
+    """
+
+    def __init__(self, max_items: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_items = int(os.getenv("RESULT_CACHE_SIZE", "1024")) if max_items is None else max_items
+        self.ttl = float(os.getenv("RESULT_CACHE_TTL", "300")) if ttl is None else ttl
+        self._lru: "OrderedDict[Hashable, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_items > 0
+
+    def get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._lru.get(key)
+            if item is not None and self.ttl > 0 and time.monotonic() - item[0] > self.ttl:
+                del self._lru[key]
+                self.expired += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._lru.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(item[1])
+
+    def put(self, key: Hashable, hits: List[Dict[str, Any]]) -> None:
+        if not self.enabled:
+            return
+        snapshot = copy.deepcopy(hits)   # 락 밖에서 복사
+        with self._lock:
+            self._lru[key] = (time.monotonic(), snapshot)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_items:
+                self._lru.popitem(last=False)
+
+    def clear(self) -> None:
+        """인덱스 교체 시 호출 – 이전 버전 결과를 모두 버림"""
+        with self._lock:
+            if self._lru:
+                self.invalidations += 1
+            self._lru.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits, "misses": self.misses, "expired": self.expired,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "size": len(self._lru), "max_items": self.max_items,
+            "ttl": self.ttl, "invalidations": self.invalidations,
+        }
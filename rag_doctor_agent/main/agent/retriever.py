@@ -1,12 +1,16 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional, Tuple
-import os, json, math, glob, re
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import os, json, math, glob, re, time, uuid, threading, hashlib, shutil, asyncio
 import numpy as np
 from dotenv import load_dotenv
 
 from .utils import normalize_text, tokenize_ko_en, uniq_keep_order
 from .augmentation import expand_symptoms
+from .matcher import get_matcher
+from .result_cache import ResultCache
+from .ann import IVFIndex
+from .meta_index import MetaIndex, META_FIELDS
 
 load_dotenv()
 
@@ -16,10 +20,56 @@ DB_DIR    = os.path.join(RAG_DATA_DIR, "db_data")
 INDEX_DIR = os.path.join(DB_DIR, "index")
 PREPROC_DIR = os.path.join(DB_DIR, "preprocessed")
 
+# 벡터를 읽기 전용 mmap 으로 열지 여부 (멀티 워커에서 page cache 공유)
+VECTOR_MMAP = os.getenv("VECTOR_MMAP", "0").lower() in ("1", "true", "yes")
+# 압축 벡터 후보 생성 ("" | "fp16" | "int8") 및 float32 재채점 후보 수
+VECTOR_QUANT   = os.getenv("VECTOR_QUANT", "").lower()
+VECTOR_RESCORE = int(os.getenv("VECTOR_RESCORE", "256"))
+# dense 검색 백엔드: exact(전수 내적, 기본) | ivf(근사 최근접 이웃, ann.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "exact").lower()
+VECTOR_BACKENDS = ("exact", "ivf")
+# tombstone + 미병합 추가 행이 이 비율을 넘으면 백그라운드 compaction
+INDEX_COMPACT_RATIO = float(os.getenv("INDEX_COMPACT_RATIO", "0.2"))
+# 버전 GC 시 (CURRENT 외에) 남겨 둘 최근 버전 수 – 롤백용
+INDEX_KEEP_VERSIONS = int(os.getenv("INDEX_KEEP_VERSIONS", "2"))
+# 새 버전이 publish 되었을 때 요청 스레드에서 기다리며 로드할지 (기본: 백그라운드 교체)
+INDEX_RELOAD_WAIT = os.getenv("INDEX_RELOAD_WAIT", "0").lower() in ("1", "true", "yes")
+# 검색 전략: hybrid(전체 dense + BM25, 기본) | two_stage(BM25 후보 → 후보만 dense 재채점)
+SEARCH_STRATEGY   = os.getenv("SEARCH_STRATEGY", "hybrid").lower()
+SEARCH_STRATEGIES = ("hybrid", "two_stage")
+# two_stage: BM25 상위 후보 수, IVF 가 있을 때 recall 보강용으로 추가 probe 할 리스트 수(0 이면 끔)
+TWO_STAGE_POOL   = int(os.getenv("TWO_STAGE_POOL", "256"))
+TWO_STAGE_NPROBE = int(os.getenv("TWO_STAGE_NPROBE", "2"))
+# aretrieve: 문서 수가 이 값 이상이면 점수 계산을 스레드 풀로 넘김 (이벤트 루프 보호)
+ASYNC_OFFLOAD_DOCS = int(os.getenv("ASYNC_OFFLOAD_DOCS", "5000"))
+# aretrieve 기본 제한 시간(초, 0 이면 없음)
+RETRIEVE_TIMEOUT = float(os.getenv("RETRIEVE_TIMEOUT", "0"))
+# 대량 임베딩 중단 시 이어받기용 배치 체크포인트 (완료되면 삭제됨)
+EMBED_CHECKPOINT_DIR = ".embed_checkpoints"
+# ingest 시 한 번에 읽어 토큰화하는 문서 수, 예전 pipeline.index() staging 파일(인덱싱 제외)
+INGEST_CHUNK_DOCS   = int(os.getenv("INGEST_CHUNK_DOCS", "5000"))
+LEGACY_STAGING_FILE = "all_docs.jsonl"
+
 # --------------------------------------------------------------------------- #
-# Embeddings (OpenAI)
+# Embeddings (OpenAI | local)
 # --------------------------------------------------------------------------- #
 from .embeddings_openai import OpenAIEmbeddingClient
+from .embeddings_local import LocalHashEmbeddingClient
+from .embed_cache import CachedEmbeddingClient
+from .index_file import (IndexFile, write_index_file, pack_strings, SortedVocab,
+                         LazyRecords, LazyDocToks, LazyDf)
+
+# openai(기본) | local(해시 n-gram, 네트워크/API 키 불필요 – 벤치마크/폐쇄망용)
+EMBED_BACKEND  = os.getenv("EMBED_BACKEND", "openai").lower()
+EMBED_BACKENDS = ("openai", "local")
+
+def make_embedder(backend: Optional[str] = None):
+    backend = (backend or EMBED_BACKEND).lower()
+    if backend == "local":
+        return LocalHashEmbeddingClient()
+    if backend == "openai":
+        return OpenAIEmbeddingClient()
+    raise ValueError(f"Unknown EMBED_BACKEND: {backend}")
 
 @dataclass
 class Doc:
@@ -29,9 +79,442 @@ class Doc:
     source: str = ""
     type: str   = ""
 
+# --------------------------------------------------------------------------- #
+# Vector file I/O
+# --------------------------------------------------------------------------- #
+def load_vectors(path: str, mmap: bool = False) -> np.ndarray:
+    """
+    vectors.npy 로드. mmap=True 이면 읽기 전용 memmap 을 그대로 돌려주므로
+    같은 파일을 여는 모든 프로세스가 page cache 를 공유한다.
+    """
+    if mmap:
+        return np.load(path, mmap_mode="r")
+    return np.load(path)
+
+def save_vectors(path: str, M: np.ndarray) -> None:
+    """
+    임시 파일에 쓴 뒤 os.replace 로 교체.
+    제자리 덮어쓰기(truncate)는 이 파일을 mmap 중인 프로세스를 SIGBUS 로 죽인다.
+    """
+    save_vectors_raw(path, np.ascontiguousarray(M, dtype="float32"))
+
+def save_vectors_raw(path: str, M: np.ndarray) -> None:
+    """dtype 변환 없이 save_vectors 와 같은 방식(임시 파일 + os.replace)으로 저장"""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, M)
+    os.replace(tmp, path)
+
+def content_hash(text: str, model: str) -> str:
+    """임베딩 재사용 키: 같은 모델 + 같은 문서 텍스트면 같은 벡터"""
+    return hashlib.sha1(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+class EmbeddingReuse:
+    """
+    직전 인덱스의 content_hashes.npy(벡터 행과 같은 순서) + vectors.npy 로 만든
+    content-hash → 벡터 저장소. ingest 시 바뀌지 않은 문서는 벡터를 그대로 재사용하고
+    새로 추가/수정된 텍스트만 임베딩한다.
+    """
+    FILE = "content_hashes.npy"
+
+    def __init__(self, index_dir: str, model: str):
+        self.model = model
+        self.rows: Dict[str, int] = {}
+        self.vectors: Optional[np.ndarray] = None
+        vectors, hashes = load_index_vectors(index_dir)
+        if vectors is not None and hashes is not None and hashes.shape[0] == vectors.shape[0]:
+            self.rows = {h: i for i, h in enumerate(hashes.astype(str).tolist())}
+            self.vectors = vectors
+
+    def embed(self, texts: List[str], embedder,
+              checkpoint_dir: Optional[str] = None) -> Tuple[np.ndarray, List[str], Dict[str, Any]]:
+        """
+        (벡터, 문서별 hash, {"reused": 재사용 문서 수, "embedded": 새로 임베딩한 텍스트 수, ...})
+        누락 텍스트는 중복 없이 한 번만 요청한다. embedder 가 embed_bulk 를 지원하면
+        배치 분할/동시 요청/체크포인트(checkpoint_dir)를 사용하고 처리량을 함께 돌려준다.
+        """
+        hashes = [content_hash(t, self.model) for t in texts]
+        todo: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in self.rows and h not in todo:
+                todo[h] = t
+        fresh: Dict[str, np.ndarray] = {}
+        bulk: Dict[str, Any] = {}
+        if todo:
+            if hasattr(embedder, "embed_bulk"):
+                vecs = embedder.embed_bulk(list(todo.values()), checkpoint_dir=checkpoint_dir)
+                st = getattr(embedder, "last_bulk_stats", {})
+                bulk = {"embed_batches": st.get("batches"),
+                        "embed_resumed_batches": st.get("resumed_batches"),
+                        "embed_seconds": st.get("seconds"),
+                        "embed_docs_per_sec": st.get("docs_per_sec")}
+            else:
+                vecs = embedder.embed(list(todo.values()))
+            fresh = dict(zip(todo, vecs))
+        dim = next(iter(fresh.values())).shape[0] if fresh else self.vectors.shape[1]
+        out = np.empty((len(texts), dim), dtype="float32")
+        reused = 0
+        for i, h in enumerate(hashes):
+            if h in fresh:
+                out[i] = fresh[h]
+            else:
+                out[i] = self.vectors[self.rows[h]]
+                reused += 1
+        return out, hashes, {"reused": reused, "embedded": len(todo), **bulk}
+
+# --------------------------------------------------------------------------- #
+# Quantized vectors (float16 / per-dimension int8)
+# --------------------------------------------------------------------------- #
+class QuantizedVectors:
+    """
+    후보 생성용 압축 임베딩 행렬. 근사 cosine 만 계산하고,
+    최종 점수는 HybridIndex 가 float32 원본(mmap)에서 후보만 다시 계산한다.
+      fp16 : 원본의 1/2 크기 (NumPy 의 float16→float32 변환이 느려 메모리 절감용)
+      int8 : 차원별 scale(= max|x_d| / 127) 로 대칭 양자화, 원본의 1/4 크기
+    """
+    KINDS      = ("fp16", "int8")
+    FILES      = {"fp16": "vectors.f16.npy", "int8": "vectors.i8.npy"}
+    SCALE_FILE = "vectors.i8.scale.npy"
+    CHUNK      = 8192   # quantize 시 한 번에 처리하는 행 수
+    SCAN_ROWS  = 64     # 검색 시 캐시에 들어가는 작은 블록만 float32 로 변환
+
+    def __init__(self, kind: str, codes: np.ndarray, scale: Optional[np.ndarray] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown VECTOR_QUANT: {kind}")
+        self.kind  = kind
+        self.codes = codes
+        self.scale = scale
+
+    @classmethod
+    def quantize(cls, M: np.ndarray, kind: str) -> "QuantizedVectors":
+        n = M.shape[0]
+        if kind == "fp16":
+            codes = np.empty(M.shape, dtype="float16")
+            for lo in range(0, n, cls.CHUNK):
+                codes[lo:lo + cls.CHUNK] = M[lo:lo + cls.CHUNK]
+            return cls(kind, codes)
+        amax = np.zeros(M.shape[1], dtype="float32")
+        for lo in range(0, n, cls.CHUNK):
+            np.maximum(amax, np.abs(M[lo:lo + cls.CHUNK]).max(axis=0), out=amax)
+        scale = (np.where(amax > 0, amax, 1.0) / 127.0).astype("float32")
+        codes = np.empty(M.shape, dtype="int8")
+        for lo in range(0, n, cls.CHUNK):
+            codes[lo:lo + cls.CHUNK] = np.clip(
+                np.rint(M[lo:lo + cls.CHUNK] / scale), -127, 127)
+        return cls(kind, codes, scale)
+
+    def save(self, index_dir: str) -> None:
+        save_vectors_raw(os.path.join(index_dir, self.FILES[self.kind]), self.codes)
+        if self.scale is not None:
+            save_vectors_raw(os.path.join(index_dir, self.SCALE_FILE), self.scale)
+
+    @classmethod
+    def load(cls, index_dir: str, kind: str, mmap: bool = False) -> Optional["QuantizedVectors"]:
+        path = os.path.join(index_dir, cls.FILES.get(kind, ""))
+        if kind not in cls.KINDS or not os.path.exists(path):
+            return None
+        codes = np.load(path, mmap_mode="r" if mmap else None)
+        scale = None
+        if kind == "int8":
+            scale_path = os.path.join(index_dir, cls.SCALE_FILE)
+            if not os.path.exists(scale_path):
+                return None
+            scale = np.load(scale_path)
+        return cls(kind, codes, scale)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + (self.scale.nbytes if self.scale is not None else 0))
+
+    def scores(self, qn: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """정규화된 질의 qn 에 대한 근사 cosine 을 out 에 채운다."""
+        qs = (qn * self.scale).astype("float32") if self.scale is not None else qn
+        buf = np.empty((self.SCAN_ROWS, self.codes.shape[1]), dtype="float32")
+        for lo in range(0, self.codes.shape[0], self.SCAN_ROWS):
+            block = self.codes[lo:lo + self.SCAN_ROWS]
+            m = block.shape[0]
+            np.copyto(buf[:m], block, casting="unsafe")
+            np.dot(buf[:m], qs, out=out[lo:lo + m])
+        return out
+
+# --------------------------------------------------------------------------- #
+# BM25 inverted index (term → postings, CSR)
+# --------------------------------------------------------------------------- #
+class InvertedIndex:
+    """
+    term-major CSR 역색인.
+    postings[indptr[t]:indptr[t+1]] 는 term t 가 등장하는 문서 번호(오름차순),
+    tfs 는 같은 위치의 term frequency, doc_len 은 문서별 토큰 수.
+    질의 시에는 질의 term 의 postings 만 모아서 점수를 계산한다.
+    빌드 이후의 증분 변경은 CSR 을 다시 만들지 않고
+      - append: 새 문서의 postings 를 delta(term id → (문서 번호들, tf들))에 추가
+      - remove: tombstone(alive=False) – 점수/df/평균 길이에서 제외
+    로 반영하고, HybridIndex.compact() 에서 CSR 로 합친다.
+    rerank 의 overlap 은 문서별 고유 term id 집합(postings 를 전치한 doc-major CSR,
+    처음 쓸 때 한 번 생성 + append 된 문서는 tail_terms)과의 교집합으로 계산한다.
+    """
+    FILE = "bm25.npz"
+
+    def __init__(self, vocab: Dict[str, int], indptr: np.ndarray,
+                 postings: np.ndarray, tfs: np.ndarray, doc_len: np.ndarray):
+        self.vocab    = vocab
+        self.indptr   = indptr
+        self.postings = postings
+        self.tfs      = tfs
+        self.doc_len  = doc_len
+        self.N        = int(doc_len.shape[0])
+        self.avgdl    = (float(doc_len.mean()) if self.N else 0.0) + 1e-8
+        self.delta: Dict[int, Tuple[List[int], List[float]]] = {}
+        self.alive: Optional[np.ndarray] = None
+        self.n_live   = self.N
+        self.len_sum  = float(doc_len.sum()) if self.N else 0.0
+        # 문서 → 고유 term id (CSR 행 n_base 개는 _fwd, 이후 append 분은 tail_terms)
+        self.n_base   = self.N
+        self._fwd: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self.tail_terms: List[np.ndarray] = []
+
+    # ------------------- build ------------------- #
+    @classmethod
+    def build(cls, doc_toks: List[List[str]]) -> "InvertedIndex":
+        vocab: Dict[str, int] = {}
+        term_ids: List[int] = []
+        for toks in doc_toks:
+            for t in toks:
+                term_ids.append(vocab.setdefault(t, len(vocab)))
+        doc_len = np.fromiter((len(t) for t in doc_toks), dtype="int64",
+                              count=len(doc_toks))
+        return cls.from_term_ids(np.asarray(term_ids, dtype="int64"), doc_len, vocab)
+
+    @classmethod
+    def from_term_ids(cls, term_ids: np.ndarray, doc_len: np.ndarray,
+                      vocab: Dict[str, int]) -> "InvertedIndex":
+        """문서 순서로 이어 붙인 term id 배열과 문서 길이로부터 CSR 을 만든다."""
+        N, V = int(doc_len.shape[0]), len(vocab)
+        doc_ids = np.repeat(np.arange(N, dtype="int64"), doc_len)
+        # (term, doc) 쌍을 하나의 키로 묶어 정렬 → term-major, doc 오름차순
+        keys, counts = np.unique(term_ids.astype("int64") * max(N, 1) + doc_ids,
+                                 return_counts=True)
+        terms = keys // max(N, 1)
+        indptr = np.zeros(V + 1, dtype="int64")
+        np.cumsum(np.bincount(terms, minlength=V), out=indptr[1:])
+        return cls(vocab, indptr,
+                   (keys % max(N, 1)).astype("int32"),
+                   counts.astype("float32"),
+                   doc_len.astype("float32"))
+
+    # ------------------- persist ------------------- #
+    def save(self, path: str) -> None:
+        terms = sorted(self.vocab, key=self.vocab.__getitem__)
+        np.savez(path, terms=np.array(terms, dtype=str), indptr=self.indptr,
+                 postings=self.postings, tfs=self.tfs, doc_len=self.doc_len)
+
+    @classmethod
+    def load(cls, path: str) -> "InvertedIndex":
+        with np.load(path, allow_pickle=False) as z:
+            vocab = {t: i for i, t in enumerate(z["terms"].tolist())}
+            return cls(vocab, z["indptr"], z["postings"], z["tfs"], z["doc_len"])
+
+    # ------------------- incremental ------------------- #
+    def clone(self) -> "InvertedIndex":
+        """CSR 배열은 공유하고 변경되는 구조(vocab / delta / alive)만 복사"""
+        c = InvertedIndex.__new__(InvertedIndex)
+        c.__dict__.update(self.__dict__)
+        c.vocab = dict(self.vocab)
+        c.delta = {t: (list(d), list(f)) for t, (d, f) in self.delta.items()}
+        c.alive = None if self.alive is None else self.alive.copy()
+        c.tail_terms = list(self.tail_terms)
+        return c
+
+    def _update_avgdl(self) -> None:
+        self.avgdl = (self.len_sum / self.n_live if self.n_live else 0.0) + 1e-8
+
+    def append(self, doc_toks: List[List[str]]) -> None:
+        """문서 번호 N, N+1, … 로 새 문서 추가"""
+        if not isinstance(self.vocab, dict):
+            self.vocab = dict(self.vocab)   # index.bin 의 SortedVocab 은 읽기 전용
+        for j, toks in enumerate(doc_toks):
+            tf: Dict[int, int] = {}
+            for t in toks:
+                tid = self.vocab.setdefault(t, len(self.vocab))
+                tf[tid] = tf.get(tid, 0) + 1
+            for tid, c in tf.items():
+                docs, tfs = self.delta.setdefault(tid, ([], []))
+                docs.append(self.N + j)
+                tfs.append(float(c))
+            self.tail_terms.append(np.fromiter(tf, dtype="int32", count=len(tf)))
+        lens = np.fromiter((len(t) for t in doc_toks), dtype="float32", count=len(doc_toks))
+        self.doc_len = np.concatenate([self.doc_len, lens])
+        if self.alive is not None:
+            self.alive = np.concatenate([self.alive, np.ones(len(doc_toks), dtype=bool)])
+        self.N += len(doc_toks)
+        self.n_live += len(doc_toks)
+        self.len_sum += float(lens.sum())
+        self._update_avgdl()
+
+    def remove(self, doc: int) -> None:
+        if self.alive is None:
+            self.alive = np.ones(self.N, dtype=bool)
+        if not self.alive[doc]:
+            return
+        self.alive[doc] = False
+        self.n_live -= 1
+        self.len_sum -= float(self.doc_len[doc])
+        self._update_avgdl()
+
+    def _postings(self, tid: int) -> Tuple[np.ndarray, np.ndarray]:
+        """term 의 (살아 있는 문서 번호, tf) – CSR + delta"""
+        docs = np.zeros(0, dtype="int32")
+        tfs  = np.zeros(0, dtype="float32")
+        if tid < self.indptr.shape[0] - 1:
+            lo, hi = self.indptr[tid], self.indptr[tid + 1]
+            docs, tfs = self.postings[lo:hi], self.tfs[lo:hi]
+        if tid in self.delta:
+            d, f = self.delta[tid]
+            docs = np.concatenate([docs, np.asarray(d, dtype="int32")])
+            tfs  = np.concatenate([tfs, np.asarray(f, dtype="float32")])
+        if self.alive is not None and docs.size:
+            keep = self.alive[docs]
+            docs, tfs = docs[keep], tfs[keep]
+        return docs, tfs
+
+    # ------------------- forward (doc → term ids) ------------------- #
+    def doc_terms(self) -> Tuple[np.ndarray, np.ndarray]:
+        """CSR 행 문서별 고유 term id (ptr, ids) – postings 를 전치해 처음 한 번만 만든다"""
+        if self._fwd is None:
+            V = self.indptr.shape[0] - 1
+            terms = np.repeat(np.arange(V, dtype="int32"), np.diff(self.indptr))
+            order = np.argsort(self.postings, kind="stable")
+            ptr = np.zeros(self.n_base + 1, dtype="int64")
+            np.cumsum(np.bincount(self.postings, minlength=self.n_base), out=ptr[1:])
+            self._fwd = (ptr, terms[order])
+        return self._fwd
+
+    def overlap(self, q_toks: List[str], rows: np.ndarray) -> np.ndarray:
+        """질의 토큰 집합과 각 문서(rows) 토큰 집합의 Jaccard – term id 교집합으로 계산"""
+        out = np.zeros(len(rows), dtype="float64")
+        at = set(q_toks)
+        if not at or not len(rows):
+            return out
+        q = np.fromiter((t for t in (self.vocab.get(w) for w in at) if t is not None),
+                        dtype="int32")
+        ptr, ids = self.doc_terms()
+        segs = [ids[ptr[r]:ptr[r + 1]] if r < self.n_base else self.tail_terms[r - self.n_base]
+                for r in rows.tolist()]
+        nb = np.fromiter((x.size for x in segs), dtype="int64", count=len(segs))
+        hit = np.isin(np.concatenate(segs), q)
+        cs = np.zeros(hit.size + 1, dtype="int64")
+        np.cumsum(hit, out=cs[1:])
+        ends = np.cumsum(nb)
+        inter = (cs[ends] - cs[ends - nb]).astype("float64")
+        np.divide(inter, len(at) + nb - inter + 1e-8, out=out, where=nb > 0)
+        return out
+
+    # ------------------- scoring ------------------- #
+    def _term_weights(self, term: str, k1: float, b: float
+                      ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """term 하나의 (문서 번호, 질의 tf=1 기준 BM25 기여도). 없는 term 이면 None."""
+        tid = self.vocab.get(term)
+        if tid is None:
+            return None
+        docs, ft = self._postings(tid)
+        ft = ft.astype("float64")
+        df = docs.shape[0]
+        if df == 0:
+            return None
+        idf = math.log((self.n_live - df + 0.5) / (df + 0.5) + 1)
+        denom = ft + k1 * (1 - b + b * (self.doc_len[docs] + 1e-8) / self.avgdl)
+        return docs, idf * (ft * (k1 + 1)) / denom
+
+    @staticmethod
+    def _query_tf(q_toks: List[str]) -> Dict[str, int]:
+        q_tf: Dict[str, int] = {}
+        for t in q_toks:
+            q_tf[t] = q_tf.get(t, 0) + 1
+        return q_tf
+
+    def score(self, q_toks: List[str], k1=1.2, b=0.75,
+              out: Optional[np.ndarray] = None) -> np.ndarray:
+        """out 을 주면 그 버퍼에 점수를 채워 반환 (질의마다 새 배열을 만들지 않음)"""
+        scores = np.zeros(self.N, dtype="float32") if out is None else out
+        scores[:] = 0.0
+        if self.N == 0:
+            return scores
+        for t, qc in self._query_tf(q_toks).items():
+            tw = self._term_weights(t, k1, b)
+            if tw is None:
+                continue
+            docs, w = tw
+            # 한 term 의 postings 안에서 문서 번호는 중복되지 않음
+            scores[docs] += qc * w
+        top = scores.max()
+        if top > 0:
+            np.divide(scores, top + 1e-8, out=scores)
+        return scores
+
+    def score_many(self, q_toks_list: List[List[str]], k1=1.2, b=0.75) -> np.ndarray:
+        """
+        여러 질의의 점수 행렬 (질의 수 x N). 배치 안에서 겹치는 term 은
+        postings 조회 / 가중치 계산을 한 번만 하고 해당 질의 행들에 함께 더한다.
+        각 행은 score() 와 같은 방식으로 최대값 정규화.
+        """
+        scores = np.zeros((len(q_toks_list), self.N), dtype="float32")
+        if self.N == 0:
+            return scores
+        users: Dict[str, List[Tuple[int, int]]] = {}
+        for r, q_toks in enumerate(q_toks_list):
+            for t, qc in self._query_tf(q_toks).items():
+                users.setdefault(t, []).append((r, qc))
+        for t, rows in users.items():
+            tw = self._term_weights(t, k1, b)
+            if tw is None:
+                continue
+            docs, w = tw
+            if len(rows) == 1:
+                r, qc = rows[0]
+                scores[r, docs] += qc * w
+            else:
+                rs = np.array([r for r, _ in rows])
+                qcs = np.array([qc for _, qc in rows], dtype="float64")
+                scores[np.ix_(rs, docs)] += qcs[:, None] * w[None, :]
+        top = scores.max(axis=1, keepdims=True)
+        np.divide(scores, top + 1e-8, out=scores, where=top > 0)
+        return scores
+
 # --------------------------------------------------------------------------- #
 # Hybrid Vector + BM25-like Index
 # --------------------------------------------------------------------------- #
+class SearchStats:
+    """
+    검색 단계별 누적 호출 수 / 시간 (Retriever.index_status 의 search_timings).
+      bm25   : 질의 BM25 점수 (search_many 는 배치 단위 시간을 질의 수로 나눠 기록)
+      dense  : dense 점수 + hybrid 결합 + 후보 top-k 선택
+      rerank : overlap 재채점 + 상위 후보 Doc 디코딩
+    """
+    STAGES = ("bm25", "dense", "rerank")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = {s: 0 for s in self.STAGES}
+            self.seconds = {s: 0.0 for s in self.STAGES}
+
+    def add(self, stage: str, seconds: float, n: int = 1) -> None:
+        with self._lock:
+            self.calls[stage] += n
+            self.seconds[stage] += seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {s: {"calls": self.calls[s],
+                        "total_ms": round(self.seconds[s] * 1000, 3),
+                        "avg_ms": round(self.seconds[s] * 1000 / self.calls[s], 4)
+                                  if self.calls[s] else None}
+                    for s in self.STAGES}
+
+
 class HybridIndex:
     def __init__(self):
         self.docs: List[Doc]         = []
@@ -39,187 +522,1339 @@ class HybridIndex:
         self.doc_toks: List[List[str]] = []
         self.df: Dict[str, int]      = {}
         self.N: int                  = 0
+        self.inv: Optional[InvertedIndex] = None
+        # 압축 벡터가 있으면 후보 생성에 사용하고 상위 rescore_k 개만 float32 로 재채점
+        self.quant: Optional[QuantizedVectors] = None
+        self.rescore_k: int = VECTOR_RESCORE
+        # ANN 백엔드가 있으면 probe 된 리스트의 문서만 dense 점수를 계산
+        self.ann: Optional[IVFIndex] = None
+        # 스레드별로 재사용하는 점수 버퍼 (질의마다 N 크기 배열을 새로 만들지 않음)
+        self._buffers = threading.local()
+        # 증분 변경: emb_matrix(기준 행렬, mmap 가능) 뒤에 붙는 행은 용량을 두 배씩
+        # 늘리는 emb_tail 버퍼에 쌓고, 삭제/교체된 행은 alive=False (tombstone)
+        self.emb_tail: Optional[np.ndarray] = None
+        self.n_tail: int = 0
+        self.alive: Optional[np.ndarray] = None
+        self.n_dead: int = 0
+        self._id_rows: Optional[Dict[str, List[int]]] = None
+        # 메타데이터 prefilter 색인 (search(filter=...) 첫 호출 때 구축, index.bin 에 저장)
+        self.meta_index: Optional[MetaIndex] = None
+        # 단계별 검색 시간 (clone / compact 된 인덱스와 공유)
+        self.stats = SearchStats()
 
     # ------------------- utilities ------------------- #
     def _tokenize(self, text: str) -> List[str]:
         return tokenize_ko_en(text)
 
-    def _update_df(self, toks: List[str]):
+    def _update_df(self, toks: List[str], sign: int = 1):
         for t in set(toks):
-            self.df[t] = self.df.get(t, 0) + 1
+            c = self.df.get(t, 0) + sign
+            if c > 0:
+                self.df[t] = c
+            else:
+                self.df.pop(t, None)
+
+    def set_embeddings(self, M: np.ndarray, normalized: bool = False) -> None:
+        """
+        임베딩 행렬을 C-contiguous float32, 행 단위 L2 정규화 상태로 한 번만 보관.
+        (임베더가 이미 정규화해서 주면 복사/재정규화를 생략)
+        normalized=True 는 검사도 생략 – mmap 벡터를 private 메모리로 복사하지 않기 위함.
+        """
+        self.emb_tail, self.n_tail = None, 0
+        if normalized and isinstance(M, np.memmap) and M.dtype == np.float32 \
+                and M.flags.c_contiguous:
+            self.emb_matrix = M
+            return
+        self.emb_matrix = self._normalize_rows(M, normalized)
+
+    @staticmethod
+    def _normalize_rows(M: np.ndarray, normalized: bool = False) -> np.ndarray:
+        M = np.ascontiguousarray(M, dtype="float32")
+        if not normalized:
+            norms = np.linalg.norm(M, axis=1)
+            if M.shape[0] and not np.allclose(norms, 1.0, atol=1e-3):
+                M = M / (norms[:, None] + 1e-8)
+        return M
 
-    # ------------------- add docs ------------------- #
-    def add_docs(self, docs: List[Doc], embedder: OpenAIEmbeddingClient):
+    def _append_embeddings(self, embs: np.ndarray) -> None:
+        """기준 행렬은 그대로 두고 tail 버퍼에 추가 (용량 부족 시에만 두 배로 재할당)"""
+        embs = self._normalize_rows(embs)
+        if self.emb_matrix is None:
+            self.set_embeddings(embs, normalized=True)
+            return
+        need = self.n_tail + embs.shape[0]
+        if self.emb_tail is None or self.emb_tail.shape[0] < need:
+            cap = max(need, 2 * (self.emb_tail.shape[0] if self.emb_tail is not None else 0), 64)
+            tail = np.empty((cap, self.emb_matrix.shape[1]), dtype="float32")
+            if self.n_tail:
+                tail[:self.n_tail] = self.emb_tail[:self.n_tail]
+            self.emb_tail = tail
+        # 공유된 tail 버퍼라도 n_tail 이후 행은 이전 사본(clone 원본)이 보지 않는다
+        self.emb_tail[self.n_tail:need] = embs
+        self.n_tail = need
+
+    def embeddings(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """기준 행렬 + tail 을 합친 벡터 (rows 를 주면 해당 행만)"""
+        if self.n_tail == 0:
+            return self.emb_matrix if rows is None else np.asarray(self.emb_matrix[rows])
+        nb = self.emb_matrix.shape[0]
+        if rows is None:
+            return np.vstack([self.emb_matrix, self.emb_tail[:self.n_tail]])
+        return np.vstack([np.asarray(self.emb_matrix[rows[rows < nb]]),
+                          self.emb_tail[rows[rows >= nb] - nb]])
+
+    def _score_buffers(self) -> Tuple[np.ndarray, np.ndarray]:
+        """현재 스레드의 (dense, lexical) 점수 버퍼. 문서 수가 바뀔 때만 재할당."""
+        bufs = getattr(self._buffers, "arrays", None)
+        if bufs is None or bufs[0].shape[0] != self.N:
+            bufs = (np.empty(self.N, dtype="float32"), np.empty(self.N, dtype="float32"))
+            self._buffers.arrays = bufs
+        return bufs
+
+    @staticmethod
+    def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+        """점수 상위 k 개 위치(내림차순). 전체 정렬 대신 부분 선택 후 k 개만 정렬."""
+        n = scores.shape[0]
+        k = min(k, n)
+        if k <= 0:
+            return np.zeros(0, dtype="int64")
+        idx = np.argpartition(scores, n - k)[n - k:] if k < n else np.arange(n)
+        return idx[np.argsort(-scores[idx], kind="stable")]
+
+    # ------------------- add / upsert / delete ------------------- #
+    def _prepare_mutation(self) -> None:
+        if not isinstance(self.docs, list):
+            # index.bin 에서 읽은 lazy 뷰는 읽기 전용 → 변경 시 리스트로 materialize
+            self.docs, self.doc_toks = list(self.docs), list(self.doc_toks)
+            self.df = dict(self.df)
+        if self.N and (self.inv is None or self.inv.N != self.N):
+            self.inv = InvertedIndex.build(self.doc_toks)
+        if self._id_rows is None:
+            self._id_rows = {}
+            for i, d in enumerate(self.docs):
+                if self.alive is None or self.alive[i]:
+                    self._id_rows.setdefault(d.id, []).append(i)
+        # 압축 벡터 / IVF 는 행 구성이 바뀌면 맞지 않으므로 compact 전까지 전수 내적 사용
+        self.quant = None
+        self.ann = None
+
+    def add_docs(self, docs: List[Doc], embedder: OpenAIEmbeddingClient,
+                 embs: Optional[np.ndarray] = None, toks: Optional[List[List[str]]] = None):
+        """
+        embs 를 주면(재사용된 벡터 등) 임베딩 요청을 생략, toks 를 주면(ingest 중 미리 토큰화)
+        다시 토큰화하지 않는다. 같은 id 가 있어도 덧붙인다.
+        """
         if not docs: return
+        self._prepare_mutation()
+        start = self.N
         self.docs.extend(docs)
         self.N = len(self.docs)
 
-        new_toks = [self._tokenize(d.text) for d in docs]
+        new_toks = toks if toks is not None else [self._tokenize(d.text) for d in docs]
         for ts in new_toks:
             self._update_df(ts)
         self.doc_toks.extend(new_toks)
+        if start == 0:
+            self.inv = InvertedIndex.build(new_toks)
+        else:
+            self.inv.append(new_toks)
+        for j, d in enumerate(docs):
+            self._id_rows.setdefault(d.id, []).append(start + j)
+        if self.meta_index is not None and self.meta_index.N == start:
+            self.meta_index.append(docs)
+        if self.alive is not None:
+            self.alive = np.concatenate([self.alive, np.ones(len(docs), dtype=bool)])
+
+        if embs is None:
+            embs = embedder.embed([d.text for d in docs])
+        self._append_embeddings(embs)
+
+    def delete_docs(self, ids: List[str]) -> int:
+        """id 가 같은 모든 행을 tombstone 처리. 삭제된 행 수 반환."""
+        self._prepare_mutation()
+        n = 0
+        for doc_id in ids:
+            for row in self._id_rows.pop(doc_id, []):
+                if self.alive is None:
+                    self.alive = np.ones(self.N, dtype=bool)
+                self.alive[row] = False
+                self.n_dead += 1
+                self._update_df(self.doc_toks[row], sign=-1)
+                self.inv.remove(row)
+                n += 1
+        return n
+
+    def upsert_docs(self, docs: List[Doc], embedder: OpenAIEmbeddingClient,
+                    embs: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """id 기준 교체/추가 (기존 행은 tombstone, 새 행은 끝에 추가). 배치 안 중복 id 는 마지막 것."""
+        last = {d.id: i for i, d in enumerate(docs)}
+        keep = sorted(last.values())
+        docs = [docs[i] for i in keep]
+        if embs is not None:
+            embs = np.asarray(embs)[keep]
+        replaced = self.delete_docs([d.id for d in docs])
+        self.add_docs(docs, embedder, embs=embs)
+        return {"upserted": len(docs), "replaced": replaced}
+
+    def clone(self) -> "HybridIndex":
+        """
+        변경용 사본. 벡터(기준 행렬 / tail 버퍼)와 CSR 은 공유하고 변경되는 구조만 복사하므로
+        원본으로 진행 중인 검색은 영향을 받지 않는다.
+        """
+        c = HybridIndex()
+        c.docs, c.doc_toks, c.df = list(self.docs), list(self.doc_toks), dict(self.df)
+        c.N = self.N
+        c.emb_matrix, c.emb_tail, c.n_tail = self.emb_matrix, self.emb_tail, self.n_tail
+        c.alive = None if self.alive is None else self.alive.copy()
+        c.n_dead = self.n_dead
+        c.inv = None if self.inv is None else self.inv.clone()
+        c._id_rows = None if self._id_rows is None else \
+                     {k: list(v) for k, v in self._id_rows.items()}
+        c.quant, c.ann, c.rescore_k = self.quant, self.ann, self.rescore_k
+        c.meta_index = None if self.meta_index is None else self.meta_index.clone()
+        c.stats = self.stats
+        return c
 
-        embs = embedder.embed([d.text for d in docs])
-        self.emb_matrix = embs if self.emb_matrix is None \
-            else np.vstack([self.emb_matrix, embs])
+    def needs_compaction(self, ratio: float) -> bool:
+        """tombstone + tail(CSR/기준 행렬 밖) 행 비율이 ratio 를 넘으면 True"""
+        return self.N > 0 and (self.n_dead + self.n_tail) / self.N > ratio
+
+    def compact(self) -> "HybridIndex":
+        """살아 있는 행만 (순서 유지) 모아 CSR / 벡터 행렬을 새로 만든 인덱스"""
+        live = np.arange(self.N) if self.alive is None else np.flatnonzero(self.alive)
+        c = HybridIndex()
+        c.docs = [self.docs[i] for i in live]
+        c.doc_toks = [self.doc_toks[i] for i in live]
+        c.N = len(c.docs)
+        c.df = dict(self.df)
+        c.inv = InvertedIndex.build(c.doc_toks)
+        if c.N:
+            c.set_embeddings(self.embeddings(live), normalized=True)
+        c.rescore_k = self.rescore_k
+        c.stats = self.stats
+        return c
 
     # ------------------- scoring ------------------- #
-    def _cosine_sim(self, q: np.ndarray) -> np.ndarray:
+    @staticmethod
+    def _unit(q: np.ndarray) -> np.ndarray:
+        """질의 벡터 L2 정규화 (float32) – 질의마다 한 번만 해서 각 점수 경로에 넘긴다"""
+        return (q / (np.linalg.norm(q) + 1e-8)).astype("float32", copy=False)
+
+    def _cosine_sim(self, q: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self._dense_scores(self._unit(q), out=out)
+
+    def _dense_scores(self, qn: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """정규화된 질의 qn 과 전체 행의 cosine"""
+        # emb_matrix 는 set_embeddings 에서 이미 행 정규화됨
         if self.emb_matrix is None:
             return np.zeros(0, dtype="float32")
-        qn = q / (np.linalg.norm(q) + 1e-8)
-        Mn = self.emb_matrix / (
-              np.linalg.norm(self.emb_matrix, axis=1, keepdims=True) + 1e-8)
-        return (Mn @ qn.reshape(-1, 1)).ravel()
+        if self.n_tail:
+            out = np.empty(self.N, dtype="float32") if out is None else out
+            nb = self.emb_matrix.shape[0]
+            np.dot(self.emb_matrix, qn, out=out[:nb])
+            np.dot(self.emb_tail[:self.n_tail], qn, out=out[nb:])
+            return out
+        if out is None:
+            return self.emb_matrix @ qn
+        return np.dot(self.emb_matrix, qn, out=out)
 
-    def _bm25_like(self, query: str, k1=1.2, b=0.75) -> np.ndarray:
+    def _bm25_like(self, query: str, k1=1.2, b=0.75,
+                   out: Optional[np.ndarray] = None) -> np.ndarray:
         if self.N == 0: return np.zeros(0, dtype="float32")
-        q_toks = self._tokenize(query)
-        avgdl  = np.mean([len(t) for t in self.doc_toks]) + 1e-8
-        idf = {t: math.log((self.N - self.df.get(t,0) + 0.5) /
-                           (self.df.get(t,0) + 0.5) + 1)
-               for t in set(q_toks)}
-
-        scores = np.zeros(self.N, dtype="float32")
-        for i, toks in enumerate(self.doc_toks):
-            dl = len(toks) + 1e-8
-            tf = {}
-            for t in toks: tf[t] = tf.get(t,0) + 1
-            s = 0.0
-            for t in q_toks:
-                if t not in idf: continue
-                ft = tf.get(t,0)
-                if ft == 0:     continue
-                denom = ft + k1 * (1 - b + b * dl / avgdl)
-                s += idf[t] * (ft*(k1+1)) / denom
-            scores[i] = s
-        if scores.max() > 0:
-            scores = scores / (scores.max() + 1e-8)
-        return scores
+        if self.inv is None or self.inv.N != self.N:
+            # bm25.npz 가 없는 구버전 인덱스: 메모리에서 한 번만 구축
+            self.inv = InvertedIndex.build(self.doc_toks)
+        return self.inv.score(self._tokenize(query), k1=k1, b=b, out=out)
+
+    def _cosine_sim_many(self, Q: np.ndarray) -> np.ndarray:
+        """질의 행렬 Q (B x D) → cosine 행렬 (B x N). 행렬-행렬 곱 한 번."""
+        Qn = (Q / (np.linalg.norm(Q, axis=1, keepdims=True) + 1e-8)).astype("float32", copy=False)
+        if not self.n_tail:
+            return Qn @ self.emb_matrix.T
+        out = np.empty((Qn.shape[0], self.N), dtype="float32")
+        nb = self.emb_matrix.shape[0]
+        out[:, :nb] = Qn @ self.emb_matrix.T
+        out[:, nb:] = Qn @ self.emb_tail[:self.n_tail].T
+        return out
+
+    def _bm25_many(self, queries: List[str], k1=1.2, b=0.75) -> np.ndarray:
+        if self.inv is None or self.inv.N != self.N:
+            self.inv = InvertedIndex.build(self.doc_toks)
+        return self.inv.score_many([self._tokenize(q) for q in queries], k1=k1, b=b)
 
     # ------------------- search ------------------- #
+    SEARCH_BATCH = 64   # search_many 가 한 번에 점수 행렬을 만드는 질의 수 (B x N 메모리 상한)
+    # 필터에 맞는 행이 N / 이 값 이하일 때만 해당 행을 모아서 내적 (그 이상은 전수 내적 후 마스킹)
+    FILTER_GATHER_RATIO = 5
+
     def search(self, query: str, embedder: OpenAIEmbeddingClient,
-               alpha=0.65, top_k=8) -> List[Tuple[Doc, float]]:
+               alpha=0.65, top_k=8, filter: Optional[Dict[str, Any]] = None,
+               strategy: Optional[str] = None) -> List[Tuple[Doc, float]]:
+        """
+        filter: 메타데이터 필터 식 (meta_index.py) – 맞는 행만 점수 계산 / 후보로 사용
+        strategy: "hybrid" | "two_stage" (기본 SEARCH_STRATEGY)
+        """
+        if self.N == 0: return []
+        return self.search_embedded(query, embedder.embed([query])[0], alpha=alpha,
+                                    top_k=top_k, filter=filter, strategy=strategy)
+
+    def search_embedded(self, query: str, qv: np.ndarray, alpha=0.65, top_k=8,
+                        filter: Optional[Dict[str, Any]] = None,
+                        strategy: Optional[str] = None) -> List[Tuple[Doc, float]]:
+        """질의 벡터를 이미 구한 경우의 search (aretrieve 에서 비동기 임베딩 후 사용)"""
         if self.N == 0: return []
-        qv = embedder.embed([query])[0]
-        hybrid = alpha * self._cosine_sim(qv) \
-               + (1 - alpha) * self._bm25_like(query)
+        strategy = self._strategy(strategy)
+        mask = self.filter_mask(filter)
+        dense_buf, lex_buf = self._score_buffers()
+        t0 = time.perf_counter()
+        lexical = self._bm25_like(query, out=lex_buf)
+        self.stats.add("bm25", time.perf_counter() - t0)
+        return self._rank(query, qv, lexical, alpha, top_k, dense_buf, mask=mask,
+                          strategy=strategy)
+
+    @staticmethod
+    def _strategy(strategy: Optional[str]) -> str:
+        strategy = (strategy or SEARCH_STRATEGY).lower()
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {strategy!r} (supported: {SEARCH_STRATEGIES})")
+        return strategy
+
+    def filter_mask(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """필터 식 → 살아 있고 조건에 맞는 행 = True (필터가 없으면 None)"""
+        if not filter:
+            return None
+        if self.meta_index is None or self.meta_index.N != self.N:
+            self.meta_index = MetaIndex.build(self.docs)
+        mask = self.meta_index.mask(filter)
+        if self.alive is not None:
+            mask &= self.alive
+        return mask
 
-        idx = np.argsort(-hybrid)[:max(top_k*3, top_k)]
+    def search_many(self, queries: List[str], embedder: OpenAIEmbeddingClient,
+                    alpha=0.65, top_k=8, filter: Optional[Dict[str, Any]] = None,
+                    strategy: Optional[str] = None) -> List[List[Tuple[Doc, float]]]:
+        """
+        여러 질의를 한 번에 검색. 임베딩은 요청 한 번, dense 점수는 (B x D)·(D x N)
+        행렬 곱, BM25 는 배치 단위 postings 계산으로 구한 뒤 질의별 top-k 를 고른다.
+        결과는 질의마다 search() 와 같다.
+        """
+        if not queries: return []
+        if self.N == 0: return [[] for _ in queries]
+        strategy = self._strategy(strategy)
+        mask = self.filter_mask(filter)
+        Q = np.asarray(embedder.embed(list(queries)), dtype="float32")
+        dense_buf, _ = self._score_buffers()
+        out: List[List[Tuple[Doc, float]]] = []
+        for lo in range(0, len(queries), self.SEARCH_BATCH):
+            batch = queries[lo:lo + self.SEARCH_BATCH]
+            t0 = time.perf_counter()
+            lexical = self._bm25_many(batch)
+            t1 = time.perf_counter()
+            # 압축 벡터 / IVF / two_stage 는 질의별 후보 선택 경로를 그대로 사용
+            dense = self._cosine_sim_many(Q[lo:lo + len(batch)]) \
+                    if self.ann is None and self.quant is None and strategy == "hybrid" else None
+            self.stats.add("bm25", t1 - t0, n=len(batch))
+            self.stats.add("dense", time.perf_counter() - t1, n=0)
+            for i, q in enumerate(batch):
+                out.append(self._rank(q, Q[lo + i], lexical[i], alpha, top_k, dense_buf,
+                                      dense=None if dense is None else dense[i], mask=mask,
+                                      strategy=strategy))
+        return out
 
-        def overlap(a,b):
-            at,bt = set(tokenize_ko_en(a)), set(tokenize_ko_en(b))
-            return len(at & bt)/(len(at|bt)+1e-8) if at and bt else 0.0
+    def _rank(self, query: str, qv: np.ndarray, lexical: np.ndarray, alpha: float,
+              top_k: int, dense_buf: np.ndarray, dense: Optional[np.ndarray] = None,
+              mask: Optional[np.ndarray] = None, strategy: str = "hybrid"
+              ) -> List[Tuple[Doc, float]]:
+        """BM25 점수(lexical, 덮어씀)와 질의 벡터로 후보를 고르고 overlap rerank.
+        dense 를 주면 이미 계산된 cosine 점수를 사용. mask 가 있으면 True 인 행만 후보."""
+        t0 = time.perf_counter()
+        lexical *= (1 - alpha)
+        pool = max(top_k*3, top_k)
+        rows = None if mask is None else np.flatnonzero(mask)
+        if rows is not None:
+            if rows.size == 0:
+                return []
+            pool = min(pool, rows.size)
+        qn = self._unit(qv)
+        cand = self._two_stage_candidates(qn, lexical, mask, pool) \
+               if strategy == "two_stage" else None
 
-        rescored = [(self.docs[i],
-                     float(hybrid[i] + 0.05*overlap(query, self.docs[i].text)))
-                    for i in idx]
+        if cand is not None:
+            # two_stage: BM25 (+ IVF probe) 후보만 dense 내적 → 전체 dense 점수 계산 생략
+            hybrid = alpha * (self.embeddings(cand) @ qn) + lexical[cand]
+            sel = self._top_indices(hybrid, pool)
+            idx, scores = cand[sel], hybrid[sel]
+        elif rows is not None and rows.size * self.FILTER_GATHER_RATIO <= self.N:
+            # 선택적인 필터: 맞는 행만 모아서 dense 내적 (비용 ∝ 필터된 행 수).
+            # 그보다 넓은 필터는 행 모으기(복사)가 연속 전수 내적보다 느리므로 아래 경로에서
+            # 점수 계산 후 마스킹. BM25 는 postings 기반이라 전체 기준 정규화 점수에서 해당 행만 사용
+            sims = dense[rows] if dense is not None else self.embeddings(rows) @ qn
+            hybrid = alpha * sims + lexical[rows]
+            sel = self._top_indices(hybrid, pool)
+            idx, scores = rows[sel], hybrid[sel]
+        elif self.ann is not None:
+            # probe 되지 않은 문서는 dense 점수 0 (BM25 로만 후보에 오를 수 있음)
+            cand = self.ann.candidates(qn)
+            hybrid = dense_buf
+            hybrid[:] = 0.0
+            if cand.size:
+                hybrid[cand] = self.emb_matrix[cand] @ qn
+            hybrid *= alpha
+            hybrid += lexical
+            if mask is not None:
+                hybrid[~mask] = -np.inf
+            idx = self._top_indices(hybrid, pool)
+            scores = hybrid[idx]
+        elif self.quant is None:
+            hybrid = self._dense_scores(qn, out=dense_buf) if dense is None else dense
+            hybrid *= alpha
+            hybrid += lexical
+            if mask is not None:
+                # 필터에 맞지 않거나 tombstone 인 행은 후보에서 제외
+                hybrid[~mask] = -np.inf
+            elif self.n_dead:
+                # tombstone 행은 후보에서 제외
+                hybrid[~self.alive] = -np.inf
+                pool = min(pool, self.N - self.n_dead)
+            idx = self._top_indices(hybrid, pool)
+            scores = hybrid[idx]
+        else:
+            # 1) 압축 행렬 근사 점수로 후보 선택
+            approx = self.quant.scores(qn, out=dense_buf)
+            approx *= alpha
+            approx += lexical
+            n_cand = max(self.rescore_k, pool)
+            if mask is not None:
+                approx[~mask] = -np.inf
+                n_cand = min(n_cand, rows.size)
+            cand = np.sort(self._top_indices(approx, n_cand))
+            # 2) 후보만 float32 원본으로 정확히 재채점 (행 순서대로 읽어 mmap 접근 지역성 유지)
+            exact = alpha * (self.emb_matrix[cand] @ qn) + lexical[cand]
+            sel = self._top_indices(exact, pool)
+            idx, scores = cand[sel], exact[sel]
+
+        t1 = time.perf_counter()
+        hits = self._rerank(query, idx, scores, top_k)
+        self.stats.add("dense", t1 - t0)
+        self.stats.add("rerank", time.perf_counter() - t1)
+        return hits
+
+    def _two_stage_candidates(self, qn: np.ndarray, lexical: np.ndarray,
+                              mask: Optional[np.ndarray], pool: int) -> Optional[np.ndarray]:
+        """
+        two_stage 1단계 후보 (오름차순 행 번호): BM25 상위 TWO_STAGE_POOL 개
+        + IVF 가 있으면 정규화된 질의 qn 과 가까운 TWO_STAGE_NPROBE 개 리스트 (어휘가 겹치지 않는 문서 recall 보강).
+        BM25 가 맞는 문서가 pool 보다 적어 후보가 모자라면 None → 전체 hybrid 로 처리.
+        """
+        live = mask if mask is not None else self.alive
+        hit = lexical > 0
+        if live is not None:
+            hit &= live
+        n_hit = int(np.count_nonzero(hit))
+        k = min(max(TWO_STAGE_POOL, pool), n_hit)
+        if n_hit > k:
+            lex = np.where(hit, lexical, -np.inf)
+            cand = self._top_indices(lex, k)
+        else:
+            cand = np.flatnonzero(hit)
+        if self.ann is not None and TWO_STAGE_NPROBE > 0:
+            probe = self.ann.candidates(qn, TWO_STAGE_NPROBE)
+            if live is not None:
+                probe = probe[live[probe]]
+            cand = np.union1d(cand, probe)
+        if cand.size < pool:
+            return None
+        return np.sort(cand)
+
+    def _rerank(self, query: str, idx: np.ndarray, scores: np.ndarray,
+                top_k: int) -> List[Tuple[Doc, float]]:
+        # overlap: 후보 본문을 다시 토큰화하지 않고 색인의 문서별 term id 집합과 교집합
+        ov = self.inv.overlap(self._tokenize(query), idx)
+        rescored = []
+        for i, s, o in zip(idx, scores, ov.tolist()):
+            d = self.docs[i]   # LazyRecords 면 여기서 상위 후보만 디코딩
+            rescored.append((d, float(s + 0.05*o)))
         rescored.sort(key=lambda x: -x[1])
         return rescored[:top_k]
 
+# --------------------------------------------------------------------------- #
+# Index storage: index.bin (단일 파일, mmap) | 구버전 다중 파일 레이아웃
+# --------------------------------------------------------------------------- #
+INDEX_FILE = "index.bin"
+# index.bin 하나로 대체된 구버전 파일들
+LEGACY_INDEX_FILES = ("vectors.npy", "docs.jsonl", "doc_toks.jsonl", "df.json",
+                      InvertedIndex.FILE, EmbeddingReuse.FILE)
+
+def save_index_file(index_dir: str, index: HybridIndex, hashes: Optional[List[str]] = None,
+                    meta: Optional[Dict[str, Any]] = None) -> int:
+    """
+    HybridIndex → index.bin. 어휘는 사전순으로 정렬해 term id 를 매기고
+    문서 토큰은 term id 배열(CSR)로, BM25 역색인도 같은 term id 로 저장한다.
+    tombstone / 추가분이 남아 있으면 compact 한 결과를 저장한다.
+    """
+    if index.n_dead or index.n_tail:
+        index = index.compact()
+    terms = sorted({t for toks in index.doc_toks for t in toks})
+    tid = {t: i for i, t in enumerate(terms)}
+    doc_len = np.fromiter((len(t) for t in index.doc_toks), dtype="int64", count=index.N)
+    tok_ids = np.fromiter((tid[t] for toks in index.doc_toks for t in toks),
+                          dtype="int32", count=int(doc_len.sum()))
+    tok_ptr = np.zeros(index.N + 1, dtype="int64")
+    np.cumsum(doc_len, out=tok_ptr[1:])
+    inv = InvertedIndex.from_term_ids(tok_ids, doc_len, tid)
+    docs_off, docs_blob = pack_strings([json.dumps(d.__dict__, ensure_ascii=False)
+                                        for d in index.docs])
+    vocab_off, vocab_blob = pack_strings(terms)
+    sections = {
+        "vectors":       np.asarray(index.emb_matrix, dtype="float32"),
+        "docs_off":      docs_off,  "docs_blob":  docs_blob,
+        "vocab_off":     vocab_off, "vocab_blob": vocab_blob,
+        "tok_ptr":       tok_ptr,   "tok_ids":    tok_ids,
+        "bm25_indptr":   inv.indptr,
+        "bm25_postings": inv.postings,
+        "bm25_tfs":      inv.tfs,
+        "bm25_doc_len":  inv.doc_len,
+    }
+    # 메타데이터 prefilter postings (필드별 값 문자열 테이블 + CSR 행 번호)
+    meta_index = MetaIndex.build(index.docs)
+    for field in META_FIELDS:
+        values, indptr, rows = meta_index.arrays(field)
+        sections[f"meta_{field}_off"], sections[f"meta_{field}_blob"] = pack_strings(values)
+        sections[f"meta_{field}_indptr"] = indptr
+        sections[f"meta_{field}_rows"] = rows
+    if hashes is not None:
+        sections["content_hashes"] = np.array(hashes, dtype="S40")
+    return write_index_file(os.path.join(index_dir, INDEX_FILE), sections, meta)
+
+def _read_binary_index(path: str, mmap: bool) -> HybridIndex:
+    f = IndexFile(path)
+    terms = f.strings("vocab")
+    vocab = SortedVocab(terms)
+    index = HybridIndex()
+    # 문서/토큰은 접근할 때만 디코딩 (검색 결과 상위 후보만 Doc 으로 만들어짐)
+    index.docs = LazyRecords(f.strings("docs"), lambda d: Doc(**d))
+    index.doc_toks = LazyDocToks(f.array("tok_ptr"), f.array("tok_ids"), terms)
+    index.N = len(index.docs)
+    # 저장된 벡터는 이미 행 정규화됨
+    index.set_embeddings(f.array("vectors", mmap=mmap), normalized=True)
+    index.inv = InvertedIndex(vocab, f.array("bm25_indptr"), f.array("bm25_postings"),
+                              f.array("bm25_tfs"), f.array("bm25_doc_len"))
+    index.df = LazyDf(vocab, index.inv.indptr)
+    if all(f"meta_{field}_indptr" in f for field in META_FIELDS):
+        index.meta_index = MetaIndex(index.N, {
+            field: (SortedVocab(f.strings(f"meta_{field}")),
+                    f.array(f"meta_{field}_indptr"), f.array(f"meta_{field}_rows"))
+            for field in META_FIELDS})
+    return index
+
+def _read_legacy_index(index_dir: str, mmap: bool) -> Optional[HybridIndex]:
+    vec  = os.path.join(index_dir, "vectors.npy")
+    docs = os.path.join(index_dir, "docs.jsonl")
+    toks = os.path.join(index_dir, "doc_toks.jsonl")
+    df   = os.path.join(index_dir, "df.json")
+    if not all(os.path.exists(p) for p in [vec, docs, toks, df]):
+        return None
+    index = HybridIndex()
+    with open(docs, "r", encoding="utf-8") as f:
+        index.docs = [Doc(**json.loads(l)) for l in f]
+    index.set_embeddings(load_vectors(vec, mmap=mmap), normalized=mmap)
+    with open(toks, "r", encoding="utf-8") as f:
+        index.doc_toks = [json.loads(l) for l in f]
+    index.N = len(index.docs)
+    with open(df, "r", encoding="utf-8") as f:
+        index.df = json.load(f)
+    bm25 = os.path.join(index_dir, InvertedIndex.FILE)
+    if os.path.exists(bm25):
+        index.inv = InvertedIndex.load(bm25)
+    return index
+
+def read_index(index_dir: str, mmap: bool = False) -> Optional[HybridIndex]:
+    """index.bin 이 있으면 우선 사용, 없으면 구버전 레이아웃. 둘 다 없으면 None."""
+    path = os.path.join(index_dir, INDEX_FILE)
+    if os.path.exists(path):
+        return _read_binary_index(path, mmap)
+    return _read_legacy_index(index_dir, mmap)
+
+def load_index_vectors(index_dir: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """(mmap 벡터, content hash) – 없는 항목은 None"""
+    path = os.path.join(index_dir, INDEX_FILE)
+    if os.path.exists(path):
+        f = IndexFile(path)
+        return (f.array("vectors"),
+                f.array("content_hashes") if "content_hashes" in f else None)
+    vp, hp = os.path.join(index_dir, "vectors.npy"), os.path.join(index_dir, EmbeddingReuse.FILE)
+    return (load_vectors(vp, mmap=True) if os.path.exists(vp) else None,
+            np.load(hp) if os.path.exists(hp) else None)
+
+def convert_legacy_index(index_dir: str) -> Dict[str, Any]:
+    """구버전 레이아웃(vectors.npy / docs.jsonl / doc_toks.jsonl / df.json) → index.bin"""
+    # mmap=False: 정규화되지 않은 벡터가 있으면 여기서 정규화해서 저장
+    index = _read_legacy_index(index_dir, mmap=False)
+    if index is None:
+        raise FileNotFoundError(f"No legacy index files in {index_dir}")
+    hp = os.path.join(index_dir, EmbeddingReuse.FILE)
+    hashes = np.load(hp) if os.path.exists(hp) else None
+    if hashes is not None and hashes.shape[0] != index.N:
+        hashes = None
+    meta_path = os.path.join(index_dir, "index_meta.json")
+    meta = {}
+    if os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    written = save_index_file(index_dir, index,
+                              hashes=hashes.astype(str).tolist() if hashes is not None else None,
+                              meta=meta)
+    legacy = sum(os.path.getsize(os.path.join(index_dir, fn)) for fn in LEGACY_INDEX_FILES
+                 if os.path.exists(os.path.join(index_dir, fn)))
+    return {"docs": index.N, "index_bytes": written, "legacy_bytes": legacy}
+
+class DeltaLog:
+    """
+    저장된 인덱스 위에 쌓이는 append-only 증분 변경 로그 (단일 writer 가정).
+      delta.log : JSONL. 첫 줄 {"op": "base", "version": 기준 인덱스 버전, "dim": D},
+                  이후 {"op": "upsert", "docs": [...], "vec": 시작 행, "n": 행 수}
+                     | {"op": "delete", "ids": [...]}
+      delta.vec : upsert 문서 벡터 (float32 행을 이어 붙인 raw 파일)
+    벡터를 먼저 기록/fsync 한 뒤 로그 줄을 기록하므로 중간에 끊겨도 완성된 줄까지만 반영된다.
+    """
+    LOG = "delta.log"
+    VEC = "delta.vec"
+
+    def __init__(self, index_dir: str):
+        self.log_path = os.path.join(index_dir, self.LOG)
+        self.vec_path = os.path.join(index_dir, self.VEC)
+        self.dim = 0
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.log_path)
+        except OSError:
+            return 0
+
+    def read(self, pos: int = 0) -> Tuple[Optional[str], List[Dict[str, Any]], int]:
+        """pos 이후의 완성된 줄 → (기준 버전 – pos 0 에서만, 변경 목록, 다음 pos)"""
+        if not os.path.exists(self.log_path):
+            return None, [], 0
+        with open(self.log_path, "rb") as f:
+            f.seek(pos)
+            data = f.read()
+        data = data[:data.rfind(b"\n") + 1]
+        base, ops = None, []
+        for line in data.splitlines():
+            rec = json.loads(line)
+            if rec["op"] == "base":
+                base, self.dim = rec["version"], int(rec["dim"])
+            else:
+                ops.append(rec)
+        return base, ops, pos + len(data)
+
+    @staticmethod
+    def _write(path: str, data: bytes, mode: str) -> int:
+        with open(path, mode) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def start(self, version: str, dim: int) -> None:
+        self.dim = dim
+        self._write(self.vec_path, b"", "wb")
+        line = json.dumps({"op": "base", "version": version, "dim": dim}) + "\n"
+        self._write(self.log_path, line.encode("utf-8"), "wb")
+
+    def append(self, op: Dict[str, Any], vecs: Optional[np.ndarray] = None) -> int:
+        """변경 한 줄 기록 후 로그 크기 반환"""
+        if vecs is not None:
+            vecs = np.ascontiguousarray(vecs, dtype="float32")
+            start = os.path.getsize(self.vec_path) // (4 * self.dim)
+            self._write(self.vec_path, vecs.tobytes(), "ab")
+            op = {**op, "vec": start, "n": int(vecs.shape[0])}
+        line = json.dumps(op, ensure_ascii=False) + "\n"
+        return self._write(self.log_path, line.encode("utf-8"), "ab")
+
+    def vectors(self, start: int, n: int, dim: int) -> np.ndarray:
+        with open(self.vec_path, "rb") as f:
+            f.seek(start * dim * 4)
+            return np.frombuffer(f.read(n * dim * 4), dtype="float32").reshape(n, dim)
+
+    def remove(self) -> None:
+        for p in (self.log_path, self.vec_path):
+            if os.path.exists(p):
+                os.remove(p)
+
+# --------------------------------------------------------------------------- #
+# Versioned publish: index/versions/<version>/ + index/CURRENT (원자적 포인터)
+#   빌드는 새 버전 디렉터리에만 쓰고, 완료 후 CURRENT 를 os.replace 로 교체한다.
+#   CURRENT 가 없으면 index/ 바로 아래의 구버전(flat) 레이아웃을 그대로 사용.
+#   버전을 로드한 프로세스는 versions/<v>/.holders/<pid>-<token> 을 만들어 두고,
+#   GC 는 살아 있는 holder 가 없는 오래된 버전만 지운다.
+# --------------------------------------------------------------------------- #
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+HOLDERS_DIR  = ".holders"
+
+def resolve_index_dir(root: str) -> Tuple[str, Optional[str]]:
+    """(현재 인덱스 디렉터리, 버전 이름 – flat 레이아웃이면 None)"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            version = f.read().strip()
+    except OSError:
+        return root, None
+    vdir = os.path.join(root, VERSIONS_DIR, version)
+    return (vdir, version) if version and os.path.isdir(vdir) else (root, None)
+
+def new_version_dir(root: str) -> Tuple[str, str]:
+    # 이름 순서 = 생성 순서 (GC 가 최근 버전을 이름으로 판단) – 마이크로초까지 포함
+    now = time.time()
+    version = time.strftime("%Y%m%d%H%M%S", time.localtime(now)) + \
+              f"{int(now * 1e6) % 1000000:06d}-{uuid.uuid4().hex[:8]}"
+    vdir = os.path.join(root, VERSIONS_DIR, version)
+    os.makedirs(vdir)
+    return vdir, version
+
+def publish_version(root: str, version: str) -> None:
+    """CURRENT 를 원자적으로 교체 – 읽는 쪽은 이전 버전 또는 새 버전 중 하나만 본다."""
+    tmp = os.path.join(root, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def hold_version(vdir: str) -> str:
+    """이 프로세스가 vdir 을 사용 중임을 기록하고 holder 파일 경로 반환"""
+    hdir = os.path.join(vdir, HOLDERS_DIR)
+    os.makedirs(hdir, exist_ok=True)
+    path = os.path.join(hdir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+    open(path, "w").close()
+    return path
+
+def release_version(holder: Optional[str]) -> None:
+    if holder:
+        try:
+            os.remove(holder)
+        except OSError:
+            pass
+
+def gc_versions(root: str, keep: Optional[int] = None) -> List[str]:
+    """
+    CURRENT 와 최근 keep 개를 제외하고, 살아 있는 holder 가 없는 버전 디렉터리 삭제.
+    (종료된 프로세스의 holder 파일은 함께 정리) 삭제한 버전 목록 반환.
+    """
+    keep = INDEX_KEEP_VERSIONS if keep is None else keep
+    vroot = os.path.join(root, VERSIONS_DIR)
+    if not os.path.isdir(vroot):
+        return []
+    _, current = resolve_index_dir(root)
+    versions = sorted(os.listdir(vroot))   # 이름이 타임스탬프로 시작 → 시간순
+    protected = set(versions[-keep:]) if keep > 0 else set()
+    removed = []
+    for v in versions:
+        if v == current or v in protected:
+            continue
+        hdir = os.path.join(vroot, v, HOLDERS_DIR)
+        held = False
+        for h in (os.listdir(hdir) if os.path.isdir(hdir) else []):
+            try:
+                alive = _pid_alive(int(h.split("-", 1)[0]))
+            except ValueError:
+                alive = False
+            if alive:
+                held = True
+            else:
+                release_version(os.path.join(hdir, h))
+        if not held:
+            shutil.rmtree(os.path.join(vroot, v), ignore_errors=True)
+            removed.append(v)
+    return removed
+
 # --------------------------------------------------------------------------- #
 # Retriever facade
 # --------------------------------------------------------------------------- #
 class Retriever:
-    def __init__(self):
+    def __init__(self, mmap: Optional[bool] = None, quant: Optional[str] = None,
+                 backend: Optional[str] = None, embed_backend: Optional[str] = None,
+                 index_dir: Optional[str] = None):
         self.index    = HybridIndex()
-        self.embedder = OpenAIEmbeddingClient()
+        # index_dir: 루트 (CURRENT / versions/ 또는 flat 레이아웃), active_dir: 로드한 버전
+        self.index_dir  = index_dir or INDEX_DIR
+        self.active_dir = self.index_dir
+        self._holder: Optional[str] = None
+        self._reloader: Optional[threading.Thread] = None
+        self._reloader_lock = threading.Lock()
+        self.reload_error: Optional[str] = None
+        # 질의 임베딩은 캐시를 거치고, 문서 임베딩(ingest)은 내부 클라이언트를 직접 사용
+        self.embed_backend = (embed_backend or EMBED_BACKEND).lower()
+        self.embedder = CachedEmbeddingClient(make_embedder(self.embed_backend))
+        # 검색 결과 캐시 (정규화된 확장 증상 + alpha/top_k/… + 인덱스 버전, 교체 시 비움)
+        self.results = ResultCache()
+        self.mmap     = VECTOR_MMAP if mmap is None else mmap
+        self.quant    = VECTOR_QUANT if quant is None else quant
+        self.backend  = VECTOR_BACKEND if backend is None else backend
+        if self.backend not in VECTOR_BACKENDS:
+            raise ValueError(f"Unknown VECTOR_BACKEND: {self.backend}")
+        # 프로세스 상주 인덱스 상태 (index_meta.json 기준으로 stale 여부 판단)
+        self._lock = threading.Lock()
+        self._meta_stamp: Optional[Tuple[int, int]] = None
+        self.base_version: Optional[str] = None
+        self.index_version: Optional[str] = None
+        self.load_seconds: float = 0.0
+        self.loaded_at: Optional[float] = None
+        # 증분 변경 로그 상태: 반영한 위치 / 마지막으로 본 크기 / 현재 기준 버전의 로그인지
+        self._delta = DeltaLog(self.index_dir)
+        self._delta_pos = 0
+        self._delta_size = 0
+        self._delta_ours = False
+        self.delta_ops = 0
+        # 변경(upsert/delete)마다 증가 – 백그라운드 compaction 결과가 최신인지 확인
+        self._generation = 0
+        self._compact_lock = threading.Lock()
 
     # ------------- load / ingest ------------- #
-    def load_index(self) -> bool:
-        meta = os.path.join(INDEX_DIR, "index_meta.json")
-        vec  = os.path.join(INDEX_DIR, "vectors.npy")
-        docs = os.path.join(INDEX_DIR, "docs.jsonl")
-        toks = os.path.join(INDEX_DIR, "doc_toks.jsonl")
-        df   = os.path.join(INDEX_DIR, "df.json")
-
-        if not all(os.path.exists(p) for p in [meta,vec,docs,toks,df]):
+    def _embed_model(self) -> Tuple[Any, str]:
+        doc_embedder = getattr(self.embedder, "inner", self.embedder)
+        return doc_embedder, getattr(doc_embedder, "model", "")
+
+    def _stat_meta(self) -> Optional[Tuple[int, int]]:
+        # versioned 레이아웃이면 CURRENT 포인터, 아니면 flat index_meta.json
+        for name in (CURRENT_FILE, "index_meta.json"):
+            try:
+                st = os.stat(os.path.join(self.index_dir, name))
+            except OSError:
+                continue
+            return (st.st_mtime_ns, st.st_size)
+        return None
+
+    def _mark_loaded(self, meta: Dict[str, Any], stamp: Optional[Tuple[int, int]],
+                     seconds: float) -> None:
+        # 구버전 index_meta.json 에는 version 이 없으므로 mtime 으로 대체
+        self.base_version = str(meta.get("version") or
+                                (f"mtime-{stamp[0]}" if stamp else "unknown"))
+        self._meta_stamp = stamp
+        self.load_seconds = seconds
+        self.loaded_at = time.time()
+        self._delta_pos = self._delta_size = self.delta_ops = 0
+        self._delta_ours = False
+        self._set_version()
+
+    def _set_version(self) -> None:
+        # 증분 변경이 반영된 인덱스는 기준 버전 + 반영한 변경 수로 구분
+        self.index_version = self.base_version + (f"+{self.delta_ops}" if self.delta_ops else "")
+
+    def load_index(self, mmap: Optional[bool] = None) -> bool:
+        """
+        mmap=True: vectors.npy 를 읽기 전용으로 memory-map (디스크 벡터는 ingest 시
+        이미 정규화되어 저장됨). None 이면 Retriever 생성 시 설정(VECTOR_MMAP)을 따른다.
+        같은 기준 버전의 delta log 가 있으면 이어서 반영한다.
+        """
+        mmap = self.mmap if mmap is None else mmap
+        # 압축 벡터 모드에서는 float32 원본을 재채점에만 쓰므로 항상 mmap
+        mmap = mmap or bool(self.quant)
+        t0 = time.perf_counter()
+        stamp = self._stat_meta()
+        vdir, version = resolve_index_dir(self.index_dir)
+        meta = os.path.join(vdir, "index_meta.json")
+        if not os.path.exists(meta):
             return False
+        # GC 가 지우지 않도록 읽기 전에 holder 등록
+        holder = hold_version(vdir) if version else None
+        try:
+            index = read_index(vdir, mmap=mmap)
+            if index is None:
+                release_version(holder)
+                return False
+            with open(meta, "r", encoding="utf-8") as f:
+                m = json.load(f)
+        except Exception:
+            release_version(holder)
+            raise
+        # 다른 임베딩 공간의 벡터와 질의를 비교하면 dense 점수가 무의미
+        built_with = m.get("embed_model")
+        dim = getattr(getattr(self.embedder, "inner", self.embedder), "dim", None)
+        if (built_with and built_with != self.embedder.model) or \
+           (dim is not None and dim != index.emb_matrix.shape[1]):
+            release_version(holder)
+            raise RuntimeError(f"Index was built with embed_model={built_with!r} "
+                               f"(dim={index.emb_matrix.shape[1]}) but the current embedder "
+                               f"is {self.embedder.model!r} (EMBED_BACKEND="
+                               f"{self.embed_backend}); rebuild the index")
+
+        prev = self.base_version
+        self._delta = DeltaLog(vdir)
+        self._mark_loaded(m, stamp, 0.0)
+        size = self._delta.size()
+        base, ops, pos = self._delta.read(0)
+        self._delta_pos, self._delta_size = pos, size
+        self._delta_ours = base == self.base_version
+        if self._delta_ours and ops:
+            self._apply_delta(index, ops)
+            self.delta_ops = len(ops)
+            self._set_version()
+
+        # 증분 변경이 반영되지 않은 행 구성에서만 압축 벡터 / IVF 사용
+        if not (index.n_dead or index.n_tail):
+            if self.quant:
+                index.quant = QuantizedVectors.load(vdir, self.quant) or \
+                              QuantizedVectors.quantize(index.emb_matrix, self.quant)
+            if self.backend == "ivf":
+                ivf = IVFIndex.load(vdir)
+                index.ann = ivf if ivf is not None and ivf.N == index.N \
+                            else IVFIndex.build(index.emb_matrix)
 
-        with open(docs, "r", encoding="utf-8") as f:
-            self.index.docs = [Doc(**json.loads(l)) for l in f]
-        self.index.emb_matrix = np.load(vec)
-        with open(toks, "r", encoding="utf-8") as f:
-            self.index.doc_toks = [json.loads(l) for l in f]
-        self.index.N = len(self.index.docs)
-        self.index.df = json.load(open(df, "r", encoding="utf-8"))
+        self._adopt(index, vdir, holder)
+        self.load_seconds = time.perf_counter() - t0
+        if prev != self.base_version:
+            self._generation += 1
         return True
 
-    def ingest_from_db_data(self) -> Dict[str, Any]:
-        # db_data/** 내 *.json/JSONL
+    def _adopt(self, index: HybridIndex, vdir: str, holder: Optional[str]) -> None:
+        # 참조 교체는 원자적이므로 진행 중인 검색은 이전 인덱스를 그대로 사용
+        self.index = index
+        self.active_dir = vdir
+        self.results.clear()
+        old, self._holder = self._holder, holder
+        if old != holder:
+            release_version(old)
+
+    def is_stale(self) -> bool:
+        """디스크의 CURRENT(또는 index_meta.json) / delta log 가 로드 시점과 달라졌는지 여부"""
+        if self.loaded_at is None:
+            return True
+        stamp = self._stat_meta()
+        # 인덱스가 지워진 경우에는 기존 메모리 인덱스로 계속 서비스
+        if stamp is None:
+            return False
+        return stamp != self._meta_stamp or self._delta.size() != self._delta_size
+
+    def reload_if_stale(self, wait: Optional[bool] = None) -> bool:
+        """
+        인덱스가 아직 로드되지 않았거나 디스크 인덱스가 바뀐 경우에만 다시 로드.
+        기준 버전이 같고 delta log 만 늘어났으면 새로 추가된 변경만 반영한다.
+        이미 서비스 중인 인덱스가 있고 wait=False(기본: INDEX_RELOAD_WAIT)면 백그라운드
+        스레드에서 로드 후 교체하고, 그동안 요청은 기존 인덱스로 바로 처리한다.
+        실제로 (재)로드/반영했으면 True.
+        """
+        if not self.is_stale():
+            return False
+        wait = INDEX_RELOAD_WAIT if wait is None else wait
+        if self.loaded_at is not None and not wait:
+            self._reload_in_background()
+            return False
+        with self._lock:
+            if not self.is_stale():          # 다른 스레드가 이미 로드
+                return False
+            if self.loaded_at is not None:
+                # mtime 만 바뀌고 version 이 같으면 다시 읽지 않음
+                stamp = self._stat_meta()
+                try:
+                    vdir, _ = resolve_index_dir(self.index_dir)
+                    with open(os.path.join(vdir, "index_meta.json"),
+                              "r", encoding="utf-8") as f:
+                        version = json.load(f).get("version")
+                except Exception:
+                    version = None
+                if stamp == self._meta_stamp or \
+                   (version and str(version) == self.base_version):
+                    self._meta_stamp = stamp
+                    return self._replay_delta_tail()
+            return self.load_index()
+
+    def _reload_in_background(self) -> None:
+        # self._lock 은 로드 중 잡혀 있으므로 별도 lock 으로 스레드만 하나 띄운다
+        with self._reloader_lock:
+            if self._reloader is not None and self._reloader.is_alive():
+                return
+            self._reloader = threading.Thread(target=self._background_reload,
+                                              name="index-reload", daemon=True)
+            self._reloader.start()
+
+    def _background_reload(self) -> None:
+        try:
+            self.reload_if_stale(wait=True)
+            self.reload_error = None
+        except Exception as e:   # 새 버전을 못 읽어도 기존 인덱스로 계속 서비스
+            self.reload_error = f"{type(e).__name__}: {e}"
+
+    # ------------- incremental updates ------------- #
+    def _apply_delta(self, index: HybridIndex, ops: List[Dict[str, Any]]) -> None:
+        dim = index.emb_matrix.shape[1] if index.emb_matrix is not None else 0
+        for op in ops:
+            if op["op"] == "upsert":
+                docs = [Doc(**d) for d in op["docs"]]
+                index.upsert_docs(docs, None, embs=self._delta.vectors(op["vec"], op["n"], dim))
+            elif op["op"] == "delete":
+                index.delete_docs(op["ids"])
+
+    def _replay_delta_tail(self) -> bool:
+        """다른 프로세스가 delta log 에 덧붙인 변경만 현재 인덱스 사본에 반영"""
+        size = self._delta.size()
+        if size < self._delta_pos:
+            return self.load_index()         # 로그가 새로 시작됨
+        base, ops, pos = self._delta.read(self._delta_pos)
+        if self._delta_pos == 0:
+            self._delta_ours = base == self.base_version
+        self._delta_size = size
+        if not (self._delta_ours and ops):
+            self._delta_pos = pos
+            return False
+        index = self.index.clone()
+        self._apply_delta(index, ops)
+        self._delta_pos = pos
+        self._swap_mutated(index, len(ops))
+        return True
+
+    def _swap_mutated(self, index: HybridIndex, n_ops: int) -> None:
+        self.index = index
+        self.delta_ops += n_ops
+        self._generation += 1
+        self._set_version()
+        self.results.clear()
+
+    def _log_delta(self, op: Dict[str, Any], vecs: Optional[np.ndarray] = None) -> None:
+        if not self._delta_ours:
+            # 현재 기준 버전의 로그가 아니면 새로 시작
+            self._delta.start(self.base_version, int(self.index.emb_matrix.shape[1]))
+            self._delta_ours = True
+        self._delta_pos = self._delta_size = self._delta.append(op, vecs)
+
+    def _mutate(self, apply, op: Dict[str, Any], vecs: Optional[np.ndarray] = None):
+        self.reload_if_stale(wait=True)
+        if self.loaded_at is None:
+            raise RuntimeError("Index not found – run pipeline index/build first")
+        with self._lock:
+            # 사본에 적용 → 로그 기록 → 참조 교체 (검색은 막지 않음, 로그 실패 시 미반영)
+            index = self.index.clone()
+            info = apply(index)
+            self._log_delta(op, vecs)
+            self._swap_mutated(index, 1)
+        if self.index.needs_compaction(INDEX_COMPACT_RATIO):
+            self.compact(wait=False)
+        return info
+
+    def upsert_docs(self, docs: List[Doc]) -> Dict[str, int]:
+        """id 기준 문서 추가/교체. 전체 재색인 없이 메모리 인덱스와 delta log 에 반영."""
+        if not docs:
+            return {"upserted": 0, "replaced": 0}
+        doc_embedder, _ = self._embed_model()
+        embs = HybridIndex._normalize_rows(doc_embedder.embed([d.text for d in docs]))
+        return self._mutate(lambda index: index.upsert_docs(docs, doc_embedder, embs=embs),
+                            {"op": "upsert", "docs": [d.__dict__ for d in docs]}, embs)
+
+    def delete_docs(self, ids: List[str]) -> int:
+        """id 가 같은 문서를 삭제 (tombstone). 삭제된 행 수 반환."""
+        return self._mutate(lambda index: index.delete_docs(list(ids)),
+                            {"op": "delete", "ids": list(ids)})
+
+    def compact(self, wait: bool = True) -> bool:
+        """
+        tombstone / 추가분을 정리한 인덱스를 새 버전으로 저장하고 delta log 를 비운다.
+        재구성은 락 밖에서 하므로 검색/변경을 막지 않고, 그 사이 변경이 있었으면 결과를
+        버린다(False – 다음 변경 때 다시 시도). wait=False 면 백그라운드 스레드에서 실행.
+        """
+        if not wait:
+            threading.Thread(target=self.compact, name="index-compact", daemon=True).start()
+            return True
+        if not self._compact_lock.acquire(blocking=False):
+            return False
+        try:
+            base, gen = self.index, self._generation
+            compacted = base.compact()
+            with self._lock:
+                if gen != self._generation:
+                    return False
+                self._persist(compacted)
+                return self.load_index()
+        finally:
+            self._compact_lock.release()
+
+    def _persist(self, index: HybridIndex,
+                 hashes: Optional[List[str]] = None) -> Tuple[Dict[str, Any], str]:
+        """
+        새 버전 디렉터리에 index.bin + (압축 벡터 / IVF) + index_meta.json 을 모두 쓴 뒤
+        CURRENT 를 교체해 publish 하고 오래된 버전을 GC. (meta, 버전 디렉터리) 반환.
+        """
+        _, model = self._embed_model()
+        os.makedirs(self.index_dir, exist_ok=True)
+        vdir, version = new_version_dir(self.index_dir)
+        meta = {"N": index.N, "version": version,
+                "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "embed_model": model, "embed_backend": self.embed_backend,
+                "embed_dim": int(index.emb_matrix.shape[1])}
+        if hashes is None:
+            hashes = [content_hash(d.text, model) for d in index.docs]
+        save_index_file(vdir, index, hashes=hashes, meta=meta)
+        if self.quant:
+            index.quant = QuantizedVectors.quantize(index.emb_matrix, self.quant)
+            index.quant.save(vdir)
+        if self.backend == "ivf":
+            index.ann = IVFIndex.build(index.emb_matrix)
+            index.ann.save(vdir)
+        with open(os.path.join(vdir, "index_meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        publish_version(self.index_dir, version)
+        gc_versions(self.index_dir)
+        return meta, vdir
+
+    def index_status(self) -> Dict[str, Any]:
+        loaded = self.loaded_at is not None
+        return {
+            "loaded": loaded,
+            "index_version": self.index_version,
+            "docs": self.index.N - self.index.n_dead,
+            "deleted_rows": self.index.n_dead,
+            "pending_rows": self.index.n_tail,
+            "delta_ops": self.delta_ops,
+            "load_seconds": round(self.load_seconds, 4),
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S",
+                                       time.localtime(self.loaded_at)) if loaded else None,
+            "stale": self.is_stale() if loaded else None,
+            "vector_store": "mmap" if isinstance(self.index.emb_matrix, np.memmap)
+                            else "memory",
+            "vector_quant": self.index.quant.kind if self.index.quant else None,
+            "vector_backend": self.backend,
+            "search_strategy": SEARCH_STRATEGY,
+            "search_timings": self.index.stats.snapshot(),
+            "embed_backend": self.embed_backend,
+            "embed_cache": self.embedder.stats() if hasattr(self.embedder, "stats") else None,
+            "result_cache": self.results.stats(),
+            "index_dir": os.path.abspath(self.active_dir),
+            "index_root": os.path.abspath(self.index_dir),
+            "reload_error": self.reload_error,
+        }
+
+    def _iter_db_data_docs(self) -> Iterator[List[Doc]]:
+        """db_data/** 내 *.json/JSONL → INGEST_CHUNK_DOCS 개씩 Doc 묶음 (파일마다 한 번만 읽음)"""
+        from ..data.loaders import iter_jsonl_items, iter_json_items
         files = sorted(glob.glob(os.path.join(PREPROC_DIR, "*.jsonl"))) + \
                 sorted(glob.glob(os.path.join(DB_DIR, "*.json")))      + \
                 sorted(glob.glob(os.path.join(DB_DIR, "*.jsonl")))
 
-        docs: List[Doc] = []
         for fp in files:
             # ▶▶ 절대/상대 경로 혼합 문제 해결 ◀◀
             if os.path.commonpath(
                     [os.path.abspath(DB_DIR), os.path.abspath(fp)]
                 ) != os.path.abspath(DB_DIR):
                 continue
+            # 예전 pipeline.index() 가 남긴 staging 파일 – 전처리 결과와 같은 문서라 두 번 들어감
+            if os.path.abspath(fp) == os.path.abspath(os.path.join(DB_DIR, LEGACY_STAGING_FILE)):
+                continue
+
+            items = iter_jsonl_items(fp) if fp.endswith(".jsonl") else iter_json_items(fp)
+            chunk: List[Doc] = []
+            for d in items:
+                chunk.append(Doc(**d))
+                if len(chunk) >= INGEST_CHUNK_DOCS:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
 
-            with open(fp, "r", encoding="utf-8") as f:
-                if fp.endswith(".jsonl"):
-                    for line in f:
-                        docs.append(Doc(**json.loads(line)))
-                else:
-                    data = json.load(f)
-                    items = data if isinstance(data, list) else data.get("docs", [])
-                    for d in items:
-                        docs.append(Doc(**d))
+    def ingest_docs(self, chunks: Iterable[List[Doc]]) -> Dict[str, Any]:
+        """
+        Doc 묶음 스트림 → 새 인덱스 버전 (원본을 한 번만 읽는 단일 패스).
+          read     : 묶음을 읽어 Doc 으로 (chunks 제너레이터 소비 시간)
+          tokenize : 묶음마다 바로 토큰화 (add_docs 에서 다시 하지 않음)
+          embed    : 직전 인덱스에 없는 텍스트만 한 번에 임베딩 (embed_bulk 배치 / 체크포인트 유지)
+          index    : df / CSR / id 색인 / 벡터 행렬 구축
+          persist  : 버전 디렉터리 저장 + publish
+        단계별 초는 결과의 "timings" 에 담긴다.
+        """
+        timings = {"read": 0.0, "tokenize": 0.0, "embed": 0.0, "index": 0.0, "persist": 0.0}
+        index = HybridIndex()
+        docs: List[Doc] = []
+        toks: List[List[str]] = []
+        it = iter(chunks)
+        while True:
+            t0 = time.perf_counter()
+            chunk = next(it, None)
+            t1 = time.perf_counter()
+            timings["read"] += t1 - t0
+            if chunk is None:
+                break
+            toks.extend(index._tokenize(d.text) for d in chunk)
+            docs.extend(chunk)
+            timings["tokenize"] += time.perf_counter() - t1
 
         if not docs:
             return {"message": "No db_data docs found.", "counts": {"docs": 0}}
 
-        self.index = HybridIndex()
-        self.index.add_docs(docs, self.embedder)
-
-        # persist
-        os.makedirs(INDEX_DIR, exist_ok=True)
-        np.save(os.path.join(INDEX_DIR,"vectors.npy"), self.index.emb_matrix)
-        with open(os.path.join(INDEX_DIR,"docs.jsonl"),"w",encoding="utf-8") as f:
-            for d in self.index.docs:
-                f.write(json.dumps(d.__dict__, ensure_ascii=False) + "\n")
-        with open(os.path.join(INDEX_DIR,"doc_toks.jsonl"),"w",encoding="utf-8") as f:
-            for t in self.index.doc_toks:
-                f.write(json.dumps(t, ensure_ascii=False) + "\n")
-        with open(os.path.join(INDEX_DIR,"df.json"),"w",encoding="utf-8") as f:
-            json.dump(self.index.df, f, ensure_ascii=False)
-        with open(os.path.join(INDEX_DIR,"index_meta.json"),"w",encoding="utf-8") as f:
-            json.dump({"N": self.index.N}, f, ensure_ascii=False)
-
-        return {"message": f"Indexed {len(docs)} docs", "counts": {"docs": len(docs)}}
+        # 바뀌지 않은 문서는 직전 인덱스의 벡터를 재사용
+        t0 = time.perf_counter()
+        doc_embedder, model = self._embed_model()
+        embs, hashes, reuse = EmbeddingReuse(resolve_index_dir(self.index_dir)[0], model).embed(
+            [d.text for d in docs], doc_embedder,
+            checkpoint_dir=os.path.join(DB_DIR, EMBED_CHECKPOINT_DIR))
+        t1 = time.perf_counter()
+        timings["embed"] = t1 - t0
+
+        index.add_docs(docs, doc_embedder, embs=embs, toks=toks)
+        del toks
+        t2 = time.perf_counter()
+        timings["index"] = t2 - t1
+
+        with self._lock:
+            meta, vdir = self._persist(index, hashes)
+            # 방금 만든 인덱스가 곧 최신 버전이므로 다시 로드하지 않도록 기록
+            self._delta = DeltaLog(vdir)
+            self._mark_loaded(meta, self._stat_meta(), 0.0)
+            self._adopt(index, vdir, hold_version(vdir))
+            self._generation += 1
+        timings["persist"] = time.perf_counter() - t2
+
+        timings = {k: round(v, 4) for k, v in timings.items()}
+        timings["total"] = round(sum(timings.values()), 4)
+        return {"message": f"Indexed {len(docs)} docs",
+                "counts": {"docs": len(docs), **reuse},
+                "timings": timings}
+
+    def ingest_from_db_data(self) -> Dict[str, Any]:
+        # db_data/** 내 *.json/JSONL
+        return self.ingest_docs(self._iter_db_data_docs())
 
     # ------------- retrieve ------------- #
-    def retrieve(self, symptoms: List[str], top_k=8, alpha=None):
-        if not self.load_index():
-            raise RuntimeError("Index not found – run pipeline index/build first")
+    def _build_query(self, symptoms: List[str]) -> str:
+        return self._expand(symptoms)[1]
+
+    def _expand(self, symptoms: List[str]) -> Tuple[List[str], str]:
+        """(확장된 증상 목록, 검색 질의 문자열)"""
         aug = expand_symptoms(symptoms or [])
         
         # 증상 + 진료과 조합으로 검색하여 의료진 정보도 포함
         # 허리 통증 -> 허리 통증 + 정형외과 + 척추센터
+        # (DEPT_KEYWORD_ROUTES 중 증상마다 처음 맞은 그룹 – matcher 로 한 번에 매칭)
+        matcher = get_matcher()
         dept_keywords = []
         for symptom in aug:
-            if any(keyword in symptom.lower() for keyword in ['허리', '척추', '디스크', '관절']):
-                dept_keywords.extend(['정형외과', '척추센터', '척추비수술클리닉'])
-            elif any(keyword in symptom.lower() for keyword in ['두통', '머리', '어지러움']):
-                dept_keywords.extend(['신경과', '신경외과'])
-            elif any(keyword in symptom.lower() for keyword in ['소화', '배', '명치', '위']):
-                dept_keywords.extend(['내과', '소화기내과'])
-            elif any(keyword in symptom.lower() for keyword in ['무릎', '어깨', '팔', '다리']):
-                dept_keywords.extend(['정형외과', '관절센터'])
+            dept_keywords.extend(matcher.match(symptom).route_depts)
         
         # 증상 + 진료과 조합으로 검색
         combined_terms = aug + dept_keywords
-        query = " ; ".join(combined_terms)
-        
-        alpha = alpha if alpha is not None else \
-                float(os.getenv("HYBRID_ALPHA", "0.65"))
-        hits = self.index.search(query, self.embedder, alpha=alpha, top_k=top_k)
+        return aug, " ; ".join(combined_terms)
+
+    def _result_key(self, aug: List[str], top_k, alpha: float,
+                    filter: Optional[Dict[str, Any]], strategy: Optional[str],
+                    index: HybridIndex) -> Tuple:
+        """
+        결과 캐시 키: 정규화·정렬된 확장 증상 집합 + 검색 인자 + 인덱스 버전.
+        (같은 증상을 다른 순서로 말한 환자는 처음 검색한 결과를 공유한다)
+        id(index) 는 교체 직전에 시작한 검색 결과가 새 버전 키로 들어가지 않게 한다.
+        """
+        terms = tuple(sorted({normalize_text(t) for t in aug}))
+        flt = json.dumps(filter, sort_keys=True, ensure_ascii=False, default=list) if filter else None
+        return (terms, float(alpha), int(top_k), flt, (strategy or SEARCH_STRATEGY).lower(),
+                self.index_version, id(index))
+
+    def _ready(self) -> None:
+        self.reload_if_stale()
+        if self.loaded_at is None:
+            raise RuntimeError("Index not found – run pipeline index/build first")
+
+    @staticmethod
+    def _hits_to_dicts(hits: List[Tuple[Doc, float]]) -> List[Dict[str, Any]]:
         return [{"id": d.id, "text": d.text, "meta": d.meta, "score": s}
                 for d,s in hits]
 
+    def retrieve(self, symptoms: List[str], top_k=8, alpha=None,
+                 filter: Optional[Dict[str, Any]] = None, strategy: Optional[str] = None):
+        """
+        filter: 메타데이터 필터 식 (예: {"doctor_name": {"not_in": [...]}}) – 점수 계산 전에 적용
+        strategy: "hybrid"(전체 dense + BM25) | "two_stage"(BM25 후보만 dense 재채점), 기본 SEARCH_STRATEGY
+        """
+        self._ready()
+        aug, query = self._expand(symptoms)
+        alpha = alpha if alpha is not None else \
+                float(os.getenv("HYBRID_ALPHA", "0.65"))
+        index = self.index
+        key = self._result_key(aug, top_k, alpha, filter, strategy, index)
+        cached = self.results.get(key)
+        if cached is not None:
+            return cached
+        hits = self._hits_to_dicts(index.search(query, self.embedder, alpha=alpha, top_k=top_k,
+                                                filter=filter, strategy=strategy))
+        self.results.put(key, hits)
+        return hits
+
+    def retrieve_many(self, symptom_lists: List[List[str]], top_k=8, alpha=None,
+                      filter: Optional[Dict[str, Any]] = None, strategy: Optional[str] = None):
+        """
+        여러 환자의 증상 목록을 한 번에 검색 (triage / A2A 배치 호출용).
+        질의 임베딩은 한 번의 요청, 점수 계산은 행렬 곱 한 번으로 처리하며
+        결과는 입력 순서대로 retrieve() 를 각각 호출한 것과 같다.
+        결과 캐시에 없는 (중복 제거된) 질의만 검색한다.
+        """
+        self._ready()
+        alpha = alpha if alpha is not None else \
+                float(os.getenv("HYBRID_ALPHA", "0.65"))
+        # 검색 도중 인덱스가 교체되어도 배치 전체가 같은 스냅샷을 보도록 참조를 고정
+        index = self.index
+        keys, out, pending = [], [], {}
+        for syms in symptom_lists:
+            aug, query = self._expand(syms)
+            key = self._result_key(aug, top_k, alpha, filter, strategy, index)
+            keys.append(key)
+            out.append(self.results.get(key) if key not in pending else None)
+            if out[-1] is None:
+                pending.setdefault(key, query)
+        if pending:
+            found = index.search_many(list(pending.values()), self.embedder, alpha=alpha,
+                                      top_k=top_k, filter=filter, strategy=strategy)
+            fresh = {k: self._hits_to_dicts(h) for k, h in zip(pending, found)}
+            for k, hits in fresh.items():
+                self.results.put(k, hits)
+            out = [r if r is not None else [dict(h) for h in fresh[k]]
+                   for r, k in zip(out, keys)]
+        return out
+
+    # ------------- async ------------- #
+    async def aretrieve(self, symptoms: List[str], top_k=8, alpha=None,
+                        timeout: Optional[float] = None,
+                        filter: Optional[Dict[str, Any]] = None,
+                        strategy: Optional[str] = None):
+        """
+        retrieve 의 비동기 버전 (FastAPI / LangGraph ainvoke 용).
+        질의 임베딩은 aembed 로 기다리고, 문서가 ASYNC_OFFLOAD_DOCS 이상이면 점수 계산을
+        스레드 풀에서 실행한다. timeout(기본 RETRIEVE_TIMEOUT, 0 이면 없음)을 넘기거나
+        호출 task 가 취소되면 asyncio.TimeoutError / CancelledError 가 전파된다.
+        (이미 스레드에서 돌고 있는 점수 계산은 끝까지 실행되고 결과만 버려진다)
+        """
+        timeout = RETRIEVE_TIMEOUT if timeout is None else timeout
+        coro = self._aretrieve(symptoms, top_k, alpha, filter, strategy)
+        if timeout and timeout > 0:
+            return await asyncio.wait_for(coro, timeout)
+        return await coro
+
+    async def _aretrieve(self, symptoms: List[str], top_k, alpha, filter, strategy):
+        if self.loaded_at is None or self.is_stale():
+            # 최초 로드 / 대기 로드는 파일 I/O 라 스레드에서
+            await asyncio.to_thread(self._ready)
+        aug, query = self._expand(symptoms)
+        alpha = alpha if alpha is not None else \
+                float(os.getenv("HYBRID_ALPHA", "0.65"))
+        index = self.index
+        key = self._result_key(aug, top_k, alpha, filter, strategy, index)
+        cached = self.results.get(key)
+        if cached is not None:
+            return cached
+        qv = (await self.embedder.aembed([query]))[0]
+        if index.N >= ASYNC_OFFLOAD_DOCS:
+            hits = await asyncio.to_thread(index.search_embedded, query, qv, alpha, top_k,
+                                          filter, strategy)
+        else:
+            hits = index.search_embedded(query, qv, alpha=alpha, top_k=top_k, filter=filter,
+                                         strategy=strategy)
+        hits = self._hits_to_dicts(hits)
+        self.results.put(key, hits)
+        return hits
+
 # --------------------------------------------------------------------------- #
 # Shared Retriever (optional singleton)
 # --------------------------------------------------------------------------- #
@@ -2,10 +2,9 @@ from __future__ import annotations
 from typing import List, Dict, Any
 import os, yaml, re
 from .augmentation import canonical_title
+from .keywords import RULES_PATH
 from .utils import normalize_text, normalize_text_preserve_symbols, translate_symbols_to_text, normalize_keyboard_symbols_only
 
-RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "rules.yaml")
-
 class AdminRules:
     def __init__(self, path: str = RULES_PATH):
         self.path = path
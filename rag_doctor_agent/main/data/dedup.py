@@ -0,0 +1,217 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence
+import os, json, zlib
+import numpy as np
+from dotenv import load_dotenv
+
+from ..agent.utils import tokenize_ko_en
+
+load_dotenv()
+
+# --------------------------------------------------------------------------- #
+# 근접 중복 문서 묶기 (MinHash + LSH)
+#
+#   문서마다 tokenize_ko_en 토큰 k-shingle 집합의 MinHash 서명을 만들고,
+#   서명을 DEDUP_BANDS 개 band 로 잘라 (묶음 키, band, 값) 버킷에 넣는다.
+#   같은 버킷에 들어간 후보 쌍만 실제 shingle Jaccard 를 계산해 DEDUP_THRESHOLD 이상이면 합친다.
+#   묶음의 대표는 가장 먼저 나온 문서이고, meta 는 묶음 전체를 합친다 (merge_meta).
+#   묶음 키(dedup_key)가 같은 문서끼리만 비교한다: 팀 소개와 증상 문서는 합치지 않고,
+#   팀 소개는 의료진(doctor_name)이 같을 때만 합친다 (이름만 다른 두 의사를 한 문서로 만들면 안 됨).
+#   prepare 는 파일마다 dedup_jsonl 을 돌린 뒤 모든 결과 파일에 dedup_jsonl_files 를 한 번 더 돌려
+#   여러 원본(명단 / 시트)에 나뉘어 있는 같은 의사도 합친다. 기본으로 켜져 있다 (PREPARE_DEDUP=0 으로 끔).
+# --------------------------------------------------------------------------- #
+PREPARE_DEDUP   = os.getenv("PREPARE_DEDUP", "1").lower() in ("1", "true", "yes")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_NUM_PERM  = int(os.getenv("DEDUP_NUM_PERM", "64"))
+DEDUP_BANDS     = int(os.getenv("DEDUP_BANDS", "16"))
+DEDUP_SHINGLE   = int(os.getenv("DEDUP_SHINGLE", "1"))
+# 서명 계산 시 한 번에 처리하는 shingle 수 (num_perm × 이 값 uint64 행렬)
+DEDUP_CHUNK = 1 << 16
+
+# 묶는 규칙이 바뀌면 올린다 (manifest 의 dedup 서명이 바뀌어 다시 변환)
+DEDUP_VERSION = 2
+
+_PRIME = np.uint64(4294967311)   # 2^32 보다 큰 소수: a*x + b 가 uint64 안에서 넘치지 않음
+
+
+def dedup_signature() -> Optional[str]:
+    """prepare manifest 에 기록 – 설정이 바뀌면 다시 변환"""
+    if not PREPARE_DEDUP:
+        return None
+    return f"minhash-v{DEDUP_VERSION}-t{DEDUP_THRESHOLD}-p{DEDUP_NUM_PERM}-b{DEDUP_BANDS}-k{DEDUP_SHINGLE}"
+
+
+def shingles(text: str, k: Optional[int] = None) -> np.ndarray:
+    """토큰 k-shingle 의 crc32 (정렬·중복 제거, 프로세스와 무관하게 같은 값)"""
+    k = k or DEDUP_SHINGLE
+    toks = tokenize_ko_en(text or "")
+    if len(toks) < k:
+        grams = [" ".join(toks)] if toks else []
+    else:
+        grams = [" ".join(toks[i:i + k]) for i in range(len(toks) - k + 1)]
+    return np.unique(np.array([zlib.crc32(g.encode("utf-8")) for g in grams], dtype=np.uint64))
+
+
+class MinHasher:
+    """h_i(x) = (a_i * x + b_i) mod p 의 최솟값 num_perm 개 (여러 문서를 한 번에)"""
+
+    def __init__(self, num_perm: Optional[int] = None, seed: int = 1):
+        num_perm = num_perm or DEDUP_NUM_PERM
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)[:, None]
+
+    def signatures(self, sets: Sequence[np.ndarray]) -> np.ndarray:
+        """(문서 수, num_perm) 서명. 빈 집합은 최댓값으로 채움 (어느 것과도 같은 버킷이 아님)"""
+        out = np.full((len(sets), self.num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+        lo = 0
+        while lo < len(sets):
+            hi, total = lo, 0
+            while hi < len(sets) and (hi == lo or total + len(sets[hi]) <= DEDUP_CHUNK):
+                total += len(sets[hi])
+                hi += 1
+            rows = [i for i in range(lo, hi) if len(sets[i])]
+            if rows:
+                ids = np.concatenate([sets[i] for i in rows])
+                starts = np.cumsum([0] + [len(sets[i]) for i in rows[:-1]])
+                hv = (self.a * ids[None, :] + self.b) % _PRIME
+                out[rows] = np.minimum.reduceat(hv, starts, axis=1).T
+            lo = hi
+        return out
+
+
+def dedup_key(doc: Dict[str, Any]) -> str:
+    """같은 키끼리만 묶는다 – type, 팀 소개는 의료진 이름까지"""
+    typ = str(doc.get("type", ""))
+    if typ == "team":
+        return typ + "\x00" + str((doc.get("meta") or {}).get("doctor_name", "")).strip()
+    return typ
+
+
+def near_duplicate_groups(sets: Sequence[np.ndarray], keys: Sequence[str],
+                          threshold: Optional[float] = None,
+                          num_perm: Optional[int] = None,
+                          bands: Optional[int] = None) -> List[int]:
+    """문서별 대표 문서 번호 (자기 자신이면 대표). 대표는 묶음에서 가장 앞 문서."""
+    threshold = DEDUP_THRESHOLD if threshold is None else threshold
+    num_perm = num_perm or DEDUP_NUM_PERM
+    bands = bands or DEDUP_BANDS
+    n = len(sets)
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    sig = MinHasher(num_perm).signatures(sets)
+    rows = max(1, num_perm // max(1, bands))
+    for band in range(0, num_perm - rows + 1, rows):
+        buckets: Dict[Any, int] = {}
+        block = np.ascontiguousarray(sig[:, band:band + rows])
+        for i in range(n):
+            if not len(sets[i]):
+                continue
+            key = (keys[i], block[i].tobytes())
+            j = buckets.setdefault(key, i)
+            if j == i:
+                continue
+            ri, rj = find(i), find(j)
+            if ri == rj or keys[i] != keys[j]:
+                continue
+            inter = len(np.intersect1d(sets[i], sets[j], assume_unique=True))
+            if inter / (len(sets[i]) + len(sets[j]) - inter) >= threshold:
+                parent[max(ri, rj)] = min(ri, rj)
+    return [find(i) for i in range(n)]
+
+
+def merge_meta(metas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    묶음 meta 합치기 (대표 문서의 키 순서 우선).
+    문자열은 빈 값 / 'nan' 을 빼고 순서 유지 중복 제거 후 '/' 결합 (중복 컬럼 셀과 같은 방식),
+    그 밖의 값은 서로 다를 때만 목록으로 모은다.
+    """
+    keys = list(dict.fromkeys(k for m in metas for k in m))
+    out: Dict[str, Any] = {}
+    for k in keys:
+        vals = [m[k] for m in metas if k in m]
+        if all(isinstance(v, str) for v in vals):
+            parts = [p for v in vals for p in v.split("/")]
+            out[k] = "/".join(dict.fromkeys(p.strip() for p in parts if p.strip() and p.strip() != "nan"))
+        else:
+            distinct = list({json.dumps(v, sort_keys=True, ensure_ascii=False): v for v in vals}.values())
+            out[k] = distinct[0] if len(distinct) == 1 else distinct
+    return out
+
+
+def dedup_jsonl(path: str) -> Dict[str, int]:
+    """전처리 JSONL 한 파일 안의 근접 중복을 묶어 같은 자리에 다시 쓴다 (prepare 파일별 변환 단계)"""
+    st = dedup_jsonl_files([path])[path]
+    return {"docs": st["docs"], "collapsed": st["collapsed"]}
+
+
+def dedup_jsonl_files(paths: Sequence[str]) -> Dict[str, Dict[str, int]]:
+    """
+    전처리 JSONL 여러 파일을 하나의 문서 목록(paths 순서)으로 보고 근접 중복을 묶어 각 파일에 다시 쓴다.
+    대표 문서는 원래 파일 / 위치에 merged meta (+ merged_ids) 로 남고 나머지는 빠진다.
+    이미 묶인 대표끼리 다시 묶이면 merged_ids 를 이어 붙인다.
+    파일을 세 번 순차로 읽으며 문서 전체가 아니라 shingle / 중복 묶음 meta 만 메모리에 둔다.
+    파일별 {"docs": 남은 문서 수, "collapsed": 빠진 문서 수, "merged": 다른 문서를 흡수한 대표 수}
+    """
+    sets: List[np.ndarray] = []
+    keys: List[str] = []
+    starts: List[int] = []
+    for path in paths:
+        starts.append(len(sets))
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                d = json.loads(line)
+                sets.append(shingles(d.get("text", "")))
+                keys.append(dedup_key(d))
+    rep = near_duplicate_groups(sets, keys)
+    del sets
+    members: Dict[int, List[int]] = {}
+    for i, r in enumerate(rep):
+        if r != i:
+            members.setdefault(r, [r]).append(i)
+    bounds = list(zip(starts, starts[1:] + [len(rep)]))
+    stats = {p: {"docs": hi - lo, "collapsed": 0, "merged": 0} for p, (lo, hi) in zip(paths, bounds)}
+    if not members:
+        return stats
+
+    grouped = {i: r for r, ms in members.items() for i in ms}
+    metas: Dict[int, List[Dict[str, Any]]] = {r: [] for r in members}
+    ids: Dict[int, List[str]] = {r: [] for r in members}
+    for path, (lo, hi) in zip(paths, bounds):
+        if not any(i in grouped for i in range(lo, hi)):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for i, line in enumerate(f, lo):
+                r = grouped.get(i)
+                if r is not None:
+                    d = json.loads(line)
+                    meta = dict(d.get("meta") or {})
+                    prior = meta.pop("merged_ids", None) or []
+                    metas[r].append(meta)
+                    ids[r].extend(([] if i == r else [d.get("id")]) + list(prior))
+
+    for path, (lo, hi) in zip(paths, bounds):
+        if not any(i in grouped for i in range(lo, hi)):
+            continue
+        tmp = path + ".tmp"
+        with open(path, "r", encoding="utf-8") as f, open(tmp, "w", encoding="utf-8") as out:
+            for i, line in enumerate(f, lo):
+                if rep[i] != i:
+                    stats[path]["collapsed"] += 1
+                    continue
+                if i in members:
+                    d = json.loads(line)
+                    d["meta"] = {**merge_meta(metas[i]), "merged_ids": ids[i]}
+                    line = json.dumps(d, ensure_ascii=False) + "\n"
+                    stats[path]["merged"] += 1
+                out.write(line)
+        os.replace(tmp, path)
+        stats[path]["docs"] -= stats[path]["collapsed"]
+    return stats
@@ -1,9 +1,15 @@
 from __future__ import annotations
-from typing import List, Dict, Any
-import os, json, pandas as pd
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import os, json
+import numpy as np
+import pandas as pd
 from ..agent.utils import normalize_text
 from ..agent.augmentation import canonical_title
 
+# 전처리 결과(JSONL)에 영향을 주는 변경(컬럼 정규화 / 빌더 / 로더)이 있으면 올린다.
+# pipeline prepare 의 manifest 에 기록되어, 버전이 바뀌면 원본이 같아도 다시 변환한다.
+LOADER_VERSION = 2
+
 # ---- Normalizers (shared with legacy) ----
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     mapping = {}
@@ -26,103 +32,355 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 # ---- Builders ----
+# 행 단위 iterrows 대신 열 단위로 문자열을 만들고(NaN → 'nan' 마스킹, 구분자 결합, id 생성)
+# LOADER_CHUNK_ROWS 행씩 잘라 문서 묶음을 내보낸다. 결과는 기존 행 단위 빌더와 바이트 단위로 같다.
+LOADER_CHUNK_ROWS = int(os.getenv("LOADER_CHUNK_ROWS", "20000"))
+
+def _str_cells(col: np.ndarray) -> np.ndarray:
+    """셀 객체 → str(v) (object 배열)"""
+    return np.array([str(x) for x in col], dtype=object)
+
+def _strip(a: np.ndarray) -> np.ndarray:
+    return np.array([x.strip() for x in a], dtype=object)
+
+def _join_kept(cols: List[np.ndarray], keep: List[np.ndarray], sep: str) -> np.ndarray:
+    """행마다 keep 인 값만 sep 으로 결합 (" | ".join([p for p in parts if ...]) 의 열 단위 버전)"""
+    n = len(cols[0]) if cols else 0
+    out = np.full(n, "", dtype=object)
+    has = np.zeros(n, dtype=bool)
+    for c, k in zip(cols, keep):
+        more = k & has
+        out[more] = out[more] + sep + c[more]
+        first = k & ~has
+        out[first] = c[first]
+        has |= k
+    return out
+
+def _positions(df: pd.DataFrame, name: str) -> np.ndarray:
+    return np.flatnonzero(np.asarray([c == name for c in df.columns], dtype=bool))
+
+def _row_series(df: pd.DataFrame, raw: np.ndarray, r: int) -> pd.Series:
+    """iterrows 가 만드는 행 Series (중복 컬럼처럼 드문 경우의 행 단위 처리용)"""
+    return pd.Series(raw[r], index=df.columns, name=df.index[r])
+
+def _frame_cells(df: pd.DataFrame) -> np.ndarray:
+    """
+    iterrows 의 행 값과 같은 셀 객체 (object 2차원 배열).
+    df.values 기준이라 숫자 열만 있으면 공통 dtype 으로 올라가는 것까지 같다.
+    행 Series 를 만들 때 dtype 추론으로 값이 바뀌는 행(문자열 + None → NaN)은 드물어서
+    NaN 이 아닌 결측(None / pd.NA 등)이 있는 행만 실제 행 Series 로 만든다.
+    """
+    raw = df.values
+    cells = raw.astype(object)
+    if raw.dtype == object:
+        na = pd.isna(cells)
+        odd = {int(r) for r, c in np.argwhere(na) if not isinstance(cells[r, c], float)}
+        for r in odd:
+            cells[r] = _row_series(df, raw, r).values.astype(object)
+    return cells
+
+def _team_column(df: pd.DataFrame, cells: np.ndarray, name: str) -> np.ndarray:
+    """cell_to_str(row.get(name, "")).strip() – 중복 컬럼은 'nan'/빈 값 제외, 순서 유지 중복 제거 후 '/' 결합"""
+    pos = _positions(df, name)
+    n = cells.shape[0]
+    if len(pos) == 0:
+        return np.full(n, "", dtype=object)
+    if len(pos) == 1:
+        return _strip(_str_cells(cells[:, pos[0]]))
+    vals, keep = [], []
+    for p in pos:
+        raw = _str_cells(cells[:, p])
+        v = _strip(raw)
+        k = (raw != "nan") & (v != "")
+        for prev, pk in zip(vals, keep):
+            k &= ~(pk & (prev == v))
+        vals.append(v)
+        keep.append(k)
+    return _join_kept(vals, keep, "/")
+
+def _first_column(df: pd.DataFrame, cells: np.ndarray, names: List[str]) -> np.ndarray:
+    """str(row.get(a, row.get(b, ...""))).strip() – 있는 첫 컬럼의 값"""
+    n = cells.shape[0]
+    for name in names:
+        pos = _positions(df, name)
+        if len(pos) == 1:
+            return _strip(_str_cells(cells[:, pos[0]]))
+        if len(pos) > 1:
+            # 중복 컬럼이면 row.get 이 Series 를 돌려주므로 그 문자열 표현까지 기존과 같게
+            raw = df.values
+            return np.array([str(_row_series(df, raw, r).get(name)).strip() for r in range(n)],
+                            dtype=object)
+    return np.full(n, "", dtype=object)
+
+def _doc_ids(df: pd.DataFrame, source: str, kind: str) -> np.ndarray:
+    prefix = f"{os.path.basename(source)}-{kind}-"
+    return prefix + np.array([str(i) for i in df.index], dtype=object)
+
+def _iter_slices(df: pd.DataFrame, chunk_rows: Optional[int]) -> Iterator[pd.DataFrame]:
+    step = max(1, chunk_rows or LOADER_CHUNK_ROWS)
+    for a in range(0, len(df), step):
+        yield df.iloc[a:a + step]
+
+def iter_docs_from_team(df: pd.DataFrame, source: str,
+                        chunk_rows: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+    for part in _iter_slices(df, chunk_rows):
+        cells = _frame_cells(part)
+        dn = _team_column(part, cells, "doctor_name")
+        dp = _team_column(part, cells, "dept")
+        tl_raw = _team_column(part, cells, "title")
+        titles = {t: canonical_title(t or "") for t in set(tl_raw)}
+        tl = np.array([titles[t] for t in tl_raw], dtype=object)
+        sp = _team_column(part, cells, "specialty")
+        tr = _team_column(part, cells, "treats")
+        cols = [dn, dp, tl, sp, tr]
+        text = _join_kept(cols, [(c != "") & (c != "nan") for c in cols], " | ")
+        ids = _doc_ids(part, source, "team")
+        yield [{"id": i, "text": t,
+                "meta": {"doctor_name": a, "dept": b, "title": c, "specialty": d, "treats": e},
+                "source": source, "type": "team"}
+               for i, t, a, b, c, d, e in zip(ids, text, dn, dp, tl, sp, tr) if t]
+
+def iter_docs_from_symptom(df: pd.DataFrame, source: str,
+                           chunk_rows: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+    for part in _iter_slices(df, chunk_rows):
+        cells = _frame_cells(part)
+        sym = _first_column(part, cells, ["symptom", "symptoms", "keyword", "증상"])
+        dept = _first_column(part, cells, ["dept", "department", "진료과"])
+        note = _first_column(part, cells, ["note", "설명", "reason"])
+        text = sym + " | " + dept + " | " + note
+        raw_rows = np.flatnonzero((sym == "") & (dept == ""))
+        raw_meta: Dict[int, Dict[str, Any]] = {}
+        if len(raw_rows):
+            # 증상 / 진료과가 모두 비면 모든 셀을 'nan' 만 빼고 결합, meta 는 원본 행
+            strs = [_str_cells(cells[raw_rows, j]) for j in range(cells.shape[1])]
+            text[raw_rows] = _join_kept(strs, [s != "nan" for s in strs], " | ")
+            names = list(part.columns)
+            for r, row in zip(raw_rows, zip(*strs)):
+                raw_meta[int(r)] = {"raw": dict(zip(names, row))}
+        ids = _doc_ids(part, source, "sym")
+        yield [{"id": ids[r], "text": text[r],
+                "meta": raw_meta[r] if r in raw_meta else {"symptom": sym[r], "dept": dept[r], "note": note[r]},
+                "source": source, "type": "symptom"}
+               for r in range(len(part))]
+
 def build_docs_from_team(df: pd.DataFrame, source: str) -> List[Dict[str, Any]]:
-    docs = []
-    def cell_to_str(v):
-        import pandas as pd
-        if isinstance(v, pd.Series):
-            vals = [str(x) for x in v.values if str(x) != 'nan']
-            vals = list(dict.fromkeys([x.strip() for x in vals if x.strip()]))
-            return "/".join(vals)
-        return str(v)
-    for i, row in df.iterrows():
-        dn = cell_to_str(row.get("doctor_name", "")).strip()
-        dp = cell_to_str(row.get("dept", "")).strip()
-        tl = canonical_title(cell_to_str(row.get("title", "")).strip() or "")
-        sp = cell_to_str(row.get("specialty", "")).strip()
-        tr = cell_to_str(row.get("treats", "")).strip()
-        meta = {"doctor_name": dn, "dept": dp, "title": tl, "specialty": sp, "treats": tr}
-        parts = [dn, dp, tl, sp, tr]
-        text = " | ".join([p for p in parts if p and p != 'nan'])
-        if not text: 
-            continue
-        docs.append({"id": f"{os.path.basename(source)}-team-{i}", "text": text, "meta": meta, "source": source, "type": "team"})
-    return docs
+    return [d for chunk in iter_docs_from_team(df, source) for d in chunk]
 
 def build_docs_from_symptom(df: pd.DataFrame, source: str) -> List[Dict[str, Any]]:
-    docs = []
-    for i, row in df.iterrows():
-        sym = str(row.get("symptom", row.get("symptoms", row.get("keyword", row.get("증상", ""))))).strip()
-        dept = str(row.get("dept", row.get("department", row.get("진료과", "")))).strip()
-        note = str(row.get("note", row.get("설명", row.get("reason", "")))).strip()
-        if not sym and not dept:
-            text = " | ".join([str(x) for x in row.values if str(x) != 'nan'])
-            meta = {"raw": {k: str(v) for k, v in row.to_dict().items()}}
-        else:
-            meta = {"symptom": sym, "dept": dept, "note": note}
-            text = " | ".join([sym, dept, note])
-        docs.append({"id": f"{os.path.basename(source)}-sym-{i}", "text": text, "meta": meta, "source": source, "type": "symptom"})
-    return docs
+    return [d for chunk in iter_docs_from_symptom(df, source) for d in chunk]
+
+def _iter_frames_docs(frames: Iterable[pd.DataFrame], path: str) -> Iterator[List[Dict[str, Any]]]:
+    """DataFrame 묶음(같은 헤더) → 문서 묶음. 팀 / 증상 판단은 첫 묶음의 컬럼으로 한 번만"""
+    team = None
+    for df in frames:
+        df = normalize_columns(df)
+        if team is None:
+            # heuristic: detect if team vs symptom by column presence
+            team = "doctor_name" in df.columns and "dept" in df.columns
+        build = iter_docs_from_team if team else iter_docs_from_symptom
+        yield from build(df, path, chunk_rows=max(1, len(df)))
+
+# ---- Streaming readers ----
+# CSV 는 chunksize 로, XLSX 는 openpyxl read-only 로 LOADER_CHUNK_ROWS 행씩 읽는다.
+# 묶음마다 dtype 추론이 달라지지 않도록 셀은 모두 문자열(결측은 NaN)로 읽는다.
+# 그래서 숫자 셀은 원본 표기 그대로 문서 텍스트에 들어간다 (CSV "1.50" / "1", XLSX 정수 값은 "2").
+# 예전 추론 읽기(LOADER_VERSION 1)의 "1.5" / "1.0" 과 다를 수 있다.
+JSON_READ_CHARS = int(os.getenv("JSON_READ_CHARS", str(1 << 20)))
+
+# 결측으로 보는 셀 문자열 (pandas read_csv / read_excel 기본값과 같은 목록).
+# CSV / XLS 는 keep_default_na=False + na_values 로, XLSX 는 _xlsx_cell 에서 같은 목록을 쓴다.
+NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+
+def _chunk_size(chunk_rows: Optional[int]) -> int:
+    return max(1, chunk_rows or LOADER_CHUNK_ROWS)
+
+def _iter_csv_frames(path: str, chunk_rows: Optional[int]) -> Iterator[pd.DataFrame]:
+    # 묶음의 index 는 이어지므로 id(…-sym-{i}) 는 전체를 한 번에 읽을 때와 같다
+    with pd.read_csv(path, dtype=str, keep_default_na=False, na_values=NA_VALUES,
+                     chunksize=_chunk_size(chunk_rows)) as reader:
+        yield from reader
+
+def _xlsx_cell(v: Any) -> Any:
+    """openpyxl 셀 값 → read_excel 과 같은 문자열 (정수 float 은 정수로, 결측 표기는 NaN)"""
+    if v is None:
+        return np.nan
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    s = v if isinstance(v, str) else str(v)
+    return np.nan if s in NA_VALUES else s
+
+def _xlsx_columns(header: Tuple[Any, ...]) -> List[str]:
+    """read_excel 과 같은 컬럼 이름 (빈 칸 → 'Unnamed: j', 중복 → 'x.1', 'x.2' …)"""
+    cols: List[str] = []
+    seen: Dict[str, int] = {}
+    for j, v in enumerate(header):
+        name = f"Unnamed: {j}" if v is None or v == "" else str(v)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        cols.append(name)
+    return cols
+
+def _xlsx_header(ws) -> Tuple[Any, ...]:
+    header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+    width = len(header)
+    while width and header[width - 1] is None:
+        width -= 1
+    return tuple(header[:width])
+
+def _iter_xlsx_frames(path: str, chunk_rows: Optional[int]) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        # 시트 선택: 헤더 폭 + 시트 dimension 의 행 수만 보고 (시트 본문은 읽지 않음)
+        best = None
+        for ws in wb.worksheets:
+            header = _xlsx_header(ws)
+            rows = max((ws.max_row or 1) - 1, 0)
+            if best is None or (len(header) > len(best[1]) and rows >= best[2]):
+                best = (ws, header, rows)
+        if best is None or not best[1]:
+            return
+        ws, header, _ = best
+        cols = _xlsx_columns(header)
+        width, step = len(cols), _chunk_size(chunk_rows)
+        rows: List[List[Any]] = []
+        start, blank = 0, 0
+        for values in ws.iter_rows(min_row=2, values_only=True):
+            row = [_xlsx_cell(v) for v in values[:width]]
+            if all(isinstance(v, float) for v in row):
+                blank += 1                    # 중간의 빈 행은 유지, 끝의 빈 행은 버림 (read_excel 과 같음)
+                continue
+            rows.extend([[np.nan] * width] * blank)
+            blank = 0
+            rows.append(row + [np.nan] * (width - len(row)))
+            if len(rows) >= step:
+                yield pd.DataFrame(rows, columns=cols, index=range(start, start + len(rows)), dtype=object)
+                start += len(rows)
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows, columns=cols, index=range(start, start + len(rows)), dtype=object)
+    finally:
+        wb.close()
+
+def iter_jsonl_items(path: str) -> Iterator[Any]:
+    """JSONL 을 한 줄씩 (파싱 오류는 그대로 올림)"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+def iter_json_items(path: str) -> Iterator[Any]:
+    """
+    .json 문서 목록을 원소 단위로 읽는다. 최상위가 배열이면 JSON_READ_CHARS 씩 읽으며
+    raw_decode 로 원소를 하나씩 꺼내고, {"docs": [...]} 형식은 통째로 읽는다.
+    """
+    dec = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(JSON_READ_CHARS)
+        pos = len(buf) - len(buf.lstrip())
+        if not buf[pos:pos + 1] == "[":
+            f.seek(0)
+            payload = json.load(f)
+            if isinstance(payload, dict) and "docs" in payload:
+                yield from payload["docs"]
+            return
+        pos += 1
+        while True:
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buf):
+                    break
+                buf, pos = f.read(JSON_READ_CHARS), 0
+                if not buf:
+                    raise ValueError(f"unterminated JSON array: {path}")
+            if buf[pos] == "]":
+                return
+            while True:
+                try:
+                    item, pos = dec.raw_decode(buf, pos)
+                    break
+                except json.JSONDecodeError:
+                    more = f.read(JSON_READ_CHARS)
+                    if not more:
+                        raise
+                    buf, pos = buf[pos:] + more, 0
+            yield item
+            if pos > JSON_READ_CHARS:
+                buf, pos = buf[pos:], 0
 
 # ---- Loader registry ----
-def load_file_to_docs(path: str) -> List[Dict[str, Any]]:
+def _with_defaults(d: Dict[str, Any], path: str, i: int) -> Dict[str, Any]:
+    # ensure required fields
+    d.setdefault("id", f"{os.path.basename(path)}-{i}")
+    d.setdefault("text", "")
+    d.setdefault("meta", {})
+    d.setdefault("source", path)
+    d.setdefault("type", d.get("type", "external"))
+    return d
+
+# iter_file_docs 가 읽는 원본 확장자 (그 밖의 파일은 문서 0개)
+SUPPORTED_EXTS = (".csv", ".xlsx", ".xls", ".jsonl", ".json")
+
+def iter_file_docs(path: str, chunk_rows: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    원본 파일 → 문서 묶음(최대 chunk_rows 행) 제너레이터. 읽기 / 변환 오류는 그대로 올린다.
+    (파일 단위로 건너뛰는 처리는 load_file_to_docs / write_docs_jsonl 쪽)
+    """
     p = path.lower()
+    step = _chunk_size(chunk_rows)
+    if p.endswith(".csv"):
+        yield from _iter_frames_docs(_iter_csv_frames(path, step), path)
+    elif p.endswith(".xlsx"):
+        yield from _iter_frames_docs(_iter_xlsx_frames(path, step), path)
+    elif p.endswith(".xls"):
+        # 구형 .xls 는 openpyxl 이 읽지 못하므로 pandas 로 (헤더만 보고 시트 선택은 불가)
+        xls = pd.ExcelFile(path)
+        best = None
+        for sh in xls.sheet_names:
+            df = xls.parse(sh, dtype=str, keep_default_na=False, na_values=NA_VALUES)
+            if best is None or (df.shape[1] > best.shape[1] and df.shape[0] >= best.shape[0]):
+                best = df
+        yield from _iter_frames_docs([best.iloc[a:a + step] for a in range(0, len(best), step)], path)
+    elif p.endswith(".jsonl") or p.endswith(".json"):
+        items = iter_jsonl_items(path) if p.endswith(".jsonl") else iter_json_items(path)
+        chunk = []
+        for i, d in enumerate(items):
+            chunk.append(_with_defaults(d, path, i))
+            if len(chunk) >= step:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def load_file_to_docs(path: str) -> List[Dict[str, Any]]:
     try:
-        if p.endswith(".csv"):
-            df = pd.read_csv(path)
-            df = normalize_columns(df)
-            # heuristic: detect if team vs symptom by column presence
-            if "doctor_name" in df.columns and "dept" in df.columns:
-                return build_docs_from_team(df, path)
-            else:
-                return build_docs_from_symptom(df, path)
-        elif p.endswith(".xlsx") or p.endswith(".xls"):
-            xls = pd.ExcelFile(path)
-            best = None
-            for sh in xls.sheet_names:
-                df = xls.parse(sh)
-                if best is None or (df.shape[1] > best.shape[1] and df.shape[0] >= best.shape[0]):
-                    best = df
-            df = normalize_columns(best)
-            if "doctor_name" in df.columns and "dept" in df.columns:
-                return build_docs_from_team(df, path)
-            else:
-                return build_docs_from_symptom(df, path)
-        elif p.endswith(".jsonl"):
-            docs = []
-            with open(path, "r", encoding="utf-8") as f:
-                for line in f:
-                    d = json.loads(line)
-                    # ensure required fields
-                    d.setdefault("id", f"{os.path.basename(path)}-{len(docs)}")
-                    d.setdefault("text", "")
-                    d.setdefault("meta", {})
-                    d.setdefault("source", path)
-                    d.setdefault("type", d.get("type", "external"))
-                    docs.append(d)
-            return docs
-        elif p.endswith(".json"):
-            payload = json.load(open(path, "r", encoding="utf-8"))
-            docs = []
-            if isinstance(payload, list):
-                for i, d in enumerate(payload):
-                    d.setdefault("id", f"{os.path.basename(path)}-{i}")
-                    d.setdefault("text", "")
-                    d.setdefault("meta", {})
-                    d.setdefault("source", path)
-                    d.setdefault("type", d.get("type", "external"))
-                    docs.append(d)
-            elif isinstance(payload, dict) and "docs" in payload:
-                for i, d in enumerate(payload["docs"]):
-                    d.setdefault("id", f"{os.path.basename(path)}-{i}")
-                    d.setdefault("text", "")
-                    d.setdefault("meta", {})
-                    d.setdefault("source", path)
-                    d.setdefault("type", d.get("type", "external"))
-                    docs.append(d)
-            return docs
-        else:
-            return []
+        return [d for chunk in iter_file_docs(path) for d in chunk]
     except Exception as e:
         # Skip problematic file but continue pipeline
         return []
+
+def write_docs_jsonl(chunks: Iterable[List[Dict[str, Any]]], out_path: str) -> int:
+    """
+    문서 묶음을 받는 대로 JSONL 로 기록 (전체 문서 목록을 메모리에 모으지 않음).
+    임시 파일에 쓰고 끝나면 교체한다. 문서가 없거나 도중에 실패하면 아무것도 남기지 않고 0.
+    """
+    tmp = out_path + ".tmp"
+    n = 0
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                if chunk:
+                    f.write("".join(json.dumps(d, ensure_ascii=False) + "\n" for d in chunk))
+                    n += len(chunk)
+    except Exception:
+        n = 0
+    if n:
+        os.replace(tmp, out_path)
+    elif os.path.exists(tmp):
+        os.remove(tmp)
+    return n
@@ -1,6 +1,7 @@
 from __future__ import annotations
-import os, glob, json, shutil
-from typing import List, Dict, Any
+import os, glob, json, shutil, hashlib, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,8 +12,12 @@ RAW_DIR  = os.path.join(RAG_DATA_DIR, "raw_data")
 DB_DIR   = os.path.join(RAG_DATA_DIR, "db_data")
 PREPROC_DIR = os.path.join(DB_DIR, "preprocessed")
 INDEX_DIR   = os.path.join(DB_DIR, "index")
+# prepare: 원본 파일별 sha256 / LOADER_VERSION / 결과 파일 기록, 변환 프로세스 수(0 이면 CPU 수)
+MANIFEST_PATH   = os.path.join(PREPROC_DIR, "manifest.json")
+PREPARE_WORKERS = int(os.getenv("PREPARE_WORKERS", "0"))
 
-from .loaders import load_file_to_docs
+from .loaders import iter_file_docs, write_docs_jsonl, LOADER_VERSION, SUPPORTED_EXTS
+from . import dedup
 
 # --------------------------------------------------------------------------- #
 # Helpers
@@ -23,6 +28,38 @@ def _ensure_dirs() -> None:
     os.makedirs(PREPROC_DIR, exist_ok=True)
     os.makedirs(INDEX_DIR, exist_ok=True)
 
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _load_manifest() -> Dict[str, Any]:
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}}
+
+def _save_manifest(manifest: Dict[str, Any]) -> None:
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, MANIFEST_PATH)
+
+def _convert_file(fp: str, outp: str, dedup_on: bool = False) -> Tuple[str, int, float, int]:
+    """
+    원본 파일 하나 → JSONL (프로세스 풀 작업 단위) → dedup_on 이면 근접 중복 묶기.
+    (원본 경로, 문서 수, 초, 묶여서 빠진 문서 수)
+    """
+    t0 = time.perf_counter()
+    n = write_docs_jsonl(iter_file_docs(fp), outp)
+    collapsed = 0
+    if n and dedup_on:
+        collapsed = dedup.dedup_jsonl(outp)["collapsed"]
+    return fp, n - collapsed, time.perf_counter() - t0, collapsed
+
 def init() -> None:
     """폴더 구조만 생성"""
     _ensure_dirs()
@@ -40,74 +77,142 @@ def init() -> None:
 # --------------------------------------------------------------------------- #
 # Pipeline steps
 # --------------------------------------------------------------------------- #
-def prepare() -> None:
-    """raw_data → db_data/preprocessed 로 전처리(JSONL)"""
+def prepare(force: bool = False) -> None:
+    """
+    raw_data → db_data/preprocessed 로 전처리(JSONL).
+    manifest(원본 sha256 + LOADER_VERSION + 중복 묶기 설정)와 같은 파일은 건너뛰고, 바뀐 파일만
+    프로세스 풀(PREPARE_WORKERS)에서 변환한다. force=True 면 모두 다시 변환.
+    중복 묶기(기본 켜짐, PREPARE_DEDUP=0 으로 끔): 같은 type(팀 소개는 같은 의료진)의 근접 중복 문서를
+    MinHash/LSH 로 찾아 하나로 묶는다 (dedup.py). 변환한 파일마다 한 번, 그다음 모든 결과 파일을 모아
+    한 번 더 묶어 여러 원본(명단 / 시트)에 같은 의사가 있으면 합친다. 파일 간 묶기는 바뀐 파일이 있을 때만
+    다시 하고, 그 결과가 바뀐 파일(cross_collapsed / cross_merged)은 원본에서 다시 변환한 뒤 묶는다.
+    변환이 실패하거나 문서가 0개면 이전 결과와 manifest 기록을 유지한다 (failed 로 출력).
+    """
     _ensure_dirs()
 
-    # raw_data 안의 모든 파일 + (초기 호환) /mnt/data 경로 자동 감지
-    raw_files = sorted(glob.glob(os.path.join(RAW_DIR, "*")))
+    # raw_data 안의 지원 형식 파일 (README.md 등은 제외) + (초기 호환) /mnt/data 경로 자동 감지
+    raw_files = sorted(p for p in glob.glob(os.path.join(RAW_DIR, "*"))
+                       if p.lower().endswith(SUPPORTED_EXTS))
     if not raw_files:
         raw_files = [p for p in ["/mnt/data/medical_team_info.xlsx",
                                  "/mnt/data/barunjoint_symptoms.csv"]
                      if os.path.exists(p)]
 
-    used, total_docs = [], 0
+    dedup_sig = dedup.dedup_signature()
+    manifest = _load_manifest()
+    old_entries: Dict[str, Any] = manifest.get("files", {})
+    cross_prev: Dict[str, Any] = manifest.get("cross_dedup") or {}
+    entries: Dict[str, Any] = {}
+    todo: List[Tuple[str, str, bool]] = []
     for fp in raw_files:
-        docs = load_file_to_docs(fp)
-        if not docs:
-            continue
         base = os.path.splitext(os.path.basename(fp))[0]
         outp = os.path.join(PREPROC_DIR, f"{base}.jsonl")
-        with open(outp, "w", encoding="utf-8") as f:
-            for d in docs:
-                f.write(json.dumps(d, ensure_ascii=False) + "\n")
-        total_docs += len(docs)
-        used.append(fp)
+        st = os.stat(fp)
+        prev = old_entries.get(fp) or {}
+        # 크기 / mtime 이 같으면 기록된 해시를 그대로 사용 (큰 원본을 매번 읽지 않음)
+        same_stat = prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns
+        sha = prev["sha256"] if same_stat and prev.get("sha256") else _sha256(fp)
+        entry = {"sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                 "loader_version": LOADER_VERSION, "dedup": dedup_sig, "output": outp,
+                 "docs": prev.get("docs", 0), "collapsed": prev.get("collapsed", 0),
+                 "cross_collapsed": prev.get("cross_collapsed", 0),
+                 "cross_merged": prev.get("cross_merged", 0), "seconds": prev.get("seconds")}
+        entries[fp] = entry
+        unchanged = (not force and prev.get("sha256") == sha
+                     and prev.get("loader_version") == LOADER_VERSION
+                     and prev.get("dedup") == dedup_sig
+                     and (prev.get("docs", 0) == 0 or os.path.exists(outp)))
+        if not unchanged:
+            todo.append((fp, outp, dedup_sig is not None))
 
+    # 파일 간 중복 묶기는 변환 / 삭제된 파일이 있거나 설정이 바뀌었을 때만 다시 한다.
+    # 이전 파일 간 묶기로 내용이 바뀐 결과 파일은 원본에서 다시 변환해 파일별 결과로 되돌린다.
+    gone = [fp for fp in old_entries if fp not in entries]
+    cross_run = dedup_sig is not None and bool(todo or gone or cross_prev.get("signature") != dedup_sig)
+    if cross_run:
+        queued = {t[0] for t in todo}
+        todo += [(fp, e["output"], True) for fp, e in entries.items()
+                 if fp not in queued and (e.get("cross_collapsed") or e.get("cross_merged"))]
+
+    converted: Dict[str, float] = {}
+    workers = PREPARE_WORKERS or os.cpu_count() or 1
+    if len(todo) > 1 and workers > 1:
+        # pandas CSV / XLSX 파싱은 CPU 위주라 파일 단위로 프로세스 병렬
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as ex:
+            results = list(ex.map(_convert_file, *zip(*todo)))
+    else:
+        results = [_convert_file(*t) for t in todo]
+    failed: List[str] = []
+    for fp, n, sec, collapsed in results:
+        if n == 0:
+            # 변환 실패 / 빈 결과: 이전 결과 파일과 manifest 기록을 그대로 두고 다음 실행에서 다시 시도
+            failed.append(fp)
+            if fp in old_entries:
+                entries[fp] = old_entries[fp]
+            else:
+                del entries[fp]
+            continue
+        entries[fp].update(docs=n, collapsed=collapsed, cross_collapsed=0, cross_merged=0,
+                           seconds=round(sec, 4))
+        converted[fp] = round(sec, 4)
+
+    # raw_data 에서 사라진 파일의 전처리 결과는 인덱싱되지 않도록 제거
+    removed = []
+    outputs = {e["output"] for e in entries.values()}
+    for fp, e in old_entries.items():
+        if fp not in entries and e.get("output") not in outputs and os.path.exists(e.get("output", "")):
+            os.remove(e["output"])
+            removed.append(fp)
+
+    cross = cross_prev if dedup_sig is not None else {}
+    if cross_run:
+        outputs = {e["output"]: e for e in entries.values() if e["docs"] and os.path.exists(e["output"])}
+        stats = dedup.dedup_jsonl_files(list(outputs))
+        for outp, e in outputs.items():
+            e.update(docs=stats[outp]["docs"], cross_collapsed=stats[outp]["collapsed"],
+                     cross_merged=stats[outp]["merged"])
+        cross = {"signature": dedup_sig,
+                 "collapsed": sum(st["collapsed"] for st in stats.values())}
+
+    manifest = {"loader_version": LOADER_VERSION, "files": entries, "cross_dedup": cross}
+    _save_manifest(manifest)
+
+    used = [fp for fp, e in entries.items() if e["docs"]]
     print(json.dumps(
-        {"ok": True, "prepared_docs": total_docs, "files": used},
+        {"ok": True, "prepared_docs": sum(e["docs"] for e in entries.values()), "files": used,
+         "collapsed": sum(e["collapsed"] + e.get("cross_collapsed", 0) for e in entries.values()),
+         "dedup": {"enabled": dedup_sig is not None, "signature": dedup_sig,
+                   "collapsed_in_file": sum(e["collapsed"] for e in entries.values()),
+                   "collapsed_cross_file": sum(e.get("cross_collapsed", 0) for e in entries.values())},
+         "converted": len(converted), "skipped": len(raw_files) - len(todo),
+         "failed": failed, "removed": removed, "file_seconds": converted},
         ensure_ascii=False))
 
 def index() -> None:
     """
     db_data/** 내 *.json / *.jsonl 만 인덱싱.
     (raw_data 파일은 절대 인덱싱하지 않음)
+    전처리 결과를 한 번만 읽어 토큰화 → 임베딩 → 저장까지 이어서 처리하고 단계별 시간을 출력.
     """
     _ensure_dirs()
 
-    preproc  = sorted(glob.glob(os.path.join(PREPROC_DIR, "*.jsonl")))
-    roots    = sorted(glob.glob(os.path.join(DB_DIR, "*.json")))   \
-             + sorted(glob.glob(os.path.join(DB_DIR, "*.jsonl")))
-
-    staging = os.path.join(DB_DIR, "all_docs.jsonl")
-    cnt = 0
-    with open(staging, "w", encoding="utf-8") as out:
-        for path in preproc + roots:
-            # ▶▶ 절대/상대 경로 섞임 문제 해결 ◀◀
-            if os.path.commonpath(
-                    [os.path.abspath(DB_DIR), os.path.abspath(path)]
-                ) != os.path.abspath(DB_DIR):
-                # db_data 바깥 파일은 무시
-                continue
-
-            with open(path, "r", encoding="utf-8") as f:
-                if path.endswith(".jsonl"):
-                    for line in f:
-                        out.write(line if line.endswith("\n") else line + "\n")
-                        cnt += 1
-                else:  # .json
-                    data = json.load(f)
-                    items = data if isinstance(data, list) else data.get("docs", [])
-                    for d in items:
-                        out.write(json.dumps(d, ensure_ascii=False) + "\n")
-                        cnt += 1
+    # 예전 버전이 만들던 staging 파일(all_docs.jsonl)은 더 이상 쓰지 않음
+    from ..agent.retriever import Retriever, LEGACY_STAGING_FILE
+    staging = os.path.join(DB_DIR, LEGACY_STAGING_FILE)
+    if os.path.exists(staging):
+        os.remove(staging)
 
     # 실제 VectorDB 인덱스 빌드
-    from ..agent.retriever import Retriever
     info = Retriever().ingest_from_db_data()
+    counts = info.get("counts", {})
     print(json.dumps(
         {"ok": True,
-         "docs_indexed": info.get("counts", {}).get("docs", 0)},
+         "docs_indexed": counts.get("docs", 0),
+         "embeddings_reused": counts.get("reused", 0),
+         "embeddings_new": counts.get("embedded", 0),
+         "embed_docs_per_sec": counts.get("embed_docs_per_sec"),
+         "embed_resumed_batches": counts.get("embed_resumed_batches", 0),
+         "stage_seconds": info.get("timings")},
         ensure_ascii=False))
 
 def build() -> None:
@@ -117,16 +222,32 @@ def build() -> None:
     index()
 
 def show() -> None:
-    meta = os.path.join(INDEX_DIR, "index_meta.json")
+    from ..agent.retriever import resolve_index_dir
+    meta = os.path.join(resolve_index_dir(INDEX_DIR)[0], "index_meta.json")
     m = json.load(open(meta, "r", encoding="utf-8")) if os.path.exists(meta) else {}
     print(json.dumps(
         {"RAG_DATA_DIR": RAG_DATA_DIR, "index_meta": m},
         ensure_ascii=False))
 
+def convert() -> None:
+    """구버전 인덱스(vectors.npy / docs.jsonl / doc_toks.jsonl / df.json) → index.bin"""
+    from ..agent.retriever import convert_legacy_index
+    info = convert_legacy_index(INDEX_DIR)
+    print(json.dumps({"ok": True, **info}, ensure_ascii=False))
+
+def gc() -> None:
+    """CURRENT / 최근 버전 / 사용 중인 버전을 제외한 오래된 인덱스 버전 삭제"""
+    from ..agent.retriever import gc_versions
+    removed = gc_versions(INDEX_DIR)
+    print(json.dumps({"ok": True, "removed_versions": removed}, ensure_ascii=False))
+
 def clean() -> None:
     if os.path.exists(INDEX_DIR):
         for fn in os.listdir(INDEX_DIR):
-            try: os.remove(os.path.join(INDEX_DIR, fn))
+            p = os.path.join(INDEX_DIR, fn)
+            try:
+                if os.path.isdir(p): shutil.rmtree(p)
+                else: os.remove(p)
             except Exception: pass
     print(json.dumps({"ok": True, "cleaned": INDEX_DIR}, ensure_ascii=False))
 
@@ -137,14 +258,17 @@ def main() -> None:
     import sys
     if len(sys.argv) < 2:
         print("Usage: python -m rag_doctor_agent.data.pipeline "
-              "[init|prepare|index|build|show|clean]")
+              "[init|prepare [--force]|index|build|show|convert|gc|clean]")
         return
     cmd = sys.argv[1]
+    force = "--force" in sys.argv[2:]
     {"init":    init,
-     "prepare": prepare,
+     "prepare": lambda: prepare(force=force),
      "index":   index,
      "build":   build,
      "show":    show,
+     "convert": convert,
+     "gc":      gc,
      "clean":   clean}.get(cmd, lambda: print("Unknown command:", cmd))()
 
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+IVF 근사 최근접 이웃(IVFIndex, agent/ann.py) 테스트 (시드 고정 난수 행렬)
+- nprobe 후보 안에서 정확히 다시 점수를 매긴 recall@k 가 전수 비교 대비 임계값 이상
+- nprobe 를 늘리면 recall 이 줄지 않고, 모든 리스트를 보면 전수 비교와 같음
+- save / load 왕복 후 같은 후보
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.ann import IVFIndex
+
+K = 10
+
+
+def normalize(X):
+    return (X / np.linalg.norm(X, axis=1, keepdims=True)).astype("float32")
+
+
+def clustered(rng, n, dim=32, centers=40, noise=0.35):
+    C = normalize(rng.standard_normal((centers, dim)))
+    return normalize(C[rng.integers(0, centers, size=n)] + noise * rng.standard_normal((n, dim)) / np.sqrt(dim))
+
+
+def queries(rng, M, n, noise=0.2):
+    """데이터 근처의 질의 (문서 행 + 잡음)"""
+    X = M[rng.choice(M.shape[0], size=n, replace=False)]
+    return normalize(X + noise * rng.standard_normal(X.shape) / np.sqrt(X.shape[1]))
+
+
+def topk(M, q, ids=None):
+    ids = np.arange(M.shape[0]) if ids is None else ids
+    s = M[ids] @ q
+    return set(ids[np.argsort(-s, kind="stable")[:K]].tolist())
+
+
+def recall(ivf, M, Q, nprobe):
+    hit = [len(topk(M, q, ivf.candidates(q, nprobe)) & topk(M, q)) / K for q in Q]
+    return float(np.mean(hit))
+
+
+def test_recall_at_k():
+    rng = np.random.default_rng(0)
+    M = clustered(rng, 3000)
+    Q = queries(np.random.default_rng(1), M, 50)
+    ivf = IVFIndex.build(M, nprobe=16, seed=0)
+    assert ivf.N == 3000 and ivf.list_ptr[-1] == 3000
+    assert sorted(ivf.list_ids.tolist()) == list(range(3000))
+
+    r = [recall(ivf, M, Q, p) for p in (1, 4, ivf.nprobe, ivf.nlist // 2)]
+    assert r == sorted(r), r
+    assert r[2] >= 0.9, r
+    assert recall(ivf, M, Q, ivf.nlist) == 1.0
+    assert len(ivf.candidates(Q[0], ivf.nlist)) == 3000
+    assert len(ivf.candidates(Q[0])) < 3000 / 2
+    print(f"✅ nlist={ivf.nlist} recall@{K} (nprobe 1/4/{ivf.nprobe}/{ivf.nlist // 2}) = {r}")
+
+
+def test_save_load_round_trip():
+    rng = np.random.default_rng(2)
+    M = clustered(rng, 1000)
+    Q = queries(np.random.default_rng(3), M, 20)
+    saved = os.environ.pop("VECTOR_NPROBE", None)
+    try:
+        ivf = IVFIndex.build(M, nprobe=5, seed=0)
+        with tempfile.TemporaryDirectory() as d:
+            assert IVFIndex.load(d) is None
+            ivf.save(d)
+            assert os.listdir(d) == [IVFIndex.FILE]
+            back = IVFIndex.load(d)
+    finally:
+        if saved is not None:
+            os.environ["VECTOR_NPROBE"] = saved
+    assert (back.nlist, back.nprobe, back.nbytes) == (ivf.nlist, 5, ivf.nbytes)
+    for q in Q:
+        assert np.array_equal(back.candidates(q), ivf.candidates(q))
+        assert np.array_equal(back.candidates(q, 2), ivf.candidates(q, 2))
+    # 같은 시드면 같은 인덱스
+    assert np.array_equal(IVFIndex.build(M, nprobe=5, seed=0).list_ids, ivf.list_ids)
+    print("✅ save / load 왕복 후 같은 후보, 같은 시드면 같은 인덱스")
+
+
+if __name__ == "__main__":
+    print("🚀 IVF 근사 최근접 이웃 테스트 시작")
+    print("=" * 60)
+    test_recall_at_k()
+    test_save_load_round_trip()
+    print("\n🎉 모든 IVF 근사 최근접 이웃 테스트 완료!")
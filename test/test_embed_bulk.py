@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+OpenAIEmbeddingClient.embed_bulk 테스트 (네트워크 없이 가짜 embeddings API 사용)
+- 토큰/개수 상한에 맞춘 배치 분할, 입력 순서 유지
+- 중간 배치 실패 후 같은 입력으로 다시 실행하면 완료된 배치는 체크포인트에서 이어받기
+- 일시적 오류(rate limit / 연결 / 5xx)만 백오프 후 재시도, 그 밖의 오류는 기다리지 않고 바로 실패
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent import embeddings_openai as E
+from rag_doctor_agent.main.agent.embeddings_openai import OpenAIEmbeddingClient
+
+
+class FakeEmbeddings:
+    """텍스트 → 결정적 벡터. fail_on 에 든 텍스트가 포함된 요청은 실패"""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def create(self, model, input):
+        with self._lock:
+            self.calls.append(list(input))
+        if self.fail_on & set(input):
+            raise RuntimeError("rate limited")
+        data = []
+        for t in input:
+            rng = np.random.default_rng(sum(t.encode("utf-8")) + len(t))
+            data.append(SimpleNamespace(embedding=rng.standard_normal(16).tolist()))
+        return SimpleNamespace(data=data)
+
+
+def make_client(fail_on=()):
+    c = OpenAIEmbeddingClient.__new__(OpenAIEmbeddingClient)
+    c.model = "fake-embedding"
+    c.client = SimpleNamespace(embeddings=FakeEmbeddings(fail_on))
+    c.last_bulk_stats = {}
+    return c
+
+
+TEXTS = [f"문서 {i} 두통 발열 " * (1 + i % 7) for i in range(200)]
+
+
+def test_bulk_matches_single_and_respects_limits():
+    c = make_client()
+    expected = c.embed(TEXTS)
+    c.client.embeddings.calls.clear()
+    out = c.embed_bulk(TEXTS, max_tokens=300, max_items=16, max_workers=4)
+    assert np.allclose(out, expected)
+    for batch in c.client.embeddings.calls:
+        assert len(batch) <= 16
+        assert len(batch) == 1 or sum(c.count_tokens(t) for t in batch) <= 300
+    assert c.last_bulk_stats["batches"] == len(c.client.embeddings.calls)
+    print(f"✅ {c.last_bulk_stats['batches']} 배치, {c.last_bulk_stats['docs_per_sec']} docs/sec")
+
+
+def test_bulk_resumes_from_checkpoint():
+    with tempfile.TemporaryDirectory() as ckpt:
+        c = make_client(fail_on={TEXTS[150]})
+        try:
+            c.embed_bulk(TEXTS, checkpoint_dir=ckpt, max_items=20, max_workers=1, max_retries=0)
+            raise AssertionError("expected failure")
+        except RuntimeError:
+            pass
+
+        c = make_client()
+        out = c.embed_bulk(TEXTS, checkpoint_dir=ckpt, max_items=20, max_workers=2)
+        assert c.last_bulk_stats["resumed_batches"] > 0
+        sent = sum(len(b) for b in c.client.embeddings.calls)
+        assert sent < len(TEXTS)
+        assert np.allclose(out, make_client().embed(TEXTS))
+        assert os.listdir(ckpt) == []   # 완료 후 체크포인트 정리
+        print(f"✅ 이어받은 배치 {c.last_bulk_stats['resumed_batches']}, 재요청 {sent}/{len(TEXTS)}")
+
+
+class FakeStatusError(Exception):
+    """openai.APIStatusError 자리에 쓰는 상태 코드 오류"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FlakyEmbeddings(FakeEmbeddings):
+    """앞의 요청들은 errors 의 오류를 차례로 던지고 그 뒤로는 정상 응답"""
+
+    def __init__(self, errors):
+        super().__init__()
+        self.errors = list(errors)
+
+    def create(self, model, input):
+        if self.errors:
+            self.calls.append(list(input))
+            raise self.errors.pop(0)
+        return super().create(model, input)
+
+
+def test_retry_only_transient_errors():
+    saved = (E.APIStatusError, time.sleep)
+    sleeps = []
+    E.APIStatusError = FakeStatusError
+    time.sleep = sleeps.append
+    try:
+        c = make_client()
+        c.client.embeddings = FlakyEmbeddings([FakeStatusError(503), FakeStatusError(500)])
+        assert np.allclose(c._embed_with_retry(TEXTS[:3], max_retries=5), make_client().embed(TEXTS[:3]))
+        assert len(sleeps) == 2
+
+        for err in (FakeStatusError(400), ValueError("bad input")):
+            sleeps.clear()
+            c.client.embeddings = FlakyEmbeddings([err])
+            try:
+                c._embed_with_retry(TEXTS[:3], max_retries=5)
+                raise AssertionError("expected failure")
+            except type(err) as e:
+                assert e is err
+            assert sleeps == [] and len(c.client.embeddings.calls) == 1
+    finally:
+        E.APIStatusError, time.sleep = saved
+    print("✅ 5xx 는 백오프 후 재시도, 4xx / 입력 오류는 기다리지 않고 바로 실패")
+
+
+if __name__ == "__main__":
+    print("🚀 대량 임베딩 테스트 시작")
+    print("=" * 60)
+    test_bulk_matches_single_and_respects_limits()
+    test_bulk_resumes_from_checkpoint()
+    test_retry_only_transient_errors()
+    print("\n🎉 모든 대량 임베딩 테스트 완료!")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+임베딩 캐시(CachedEmbeddingClient) 테스트 (호출 수를 세는 가짜 임베더 사용)
+- 메모리 LRU: 용량을 넘으면 가장 오래 안 쓴 항목부터 빠짐
+- sqlite 디스크 계층: 새 클라이언트 인스턴스에서도 재사용
+- hits / disk_hits / misses 카운터와 내부 임베더 호출 수
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.embed_cache import CachedEmbeddingClient
+
+
+class CountingEmbedder:
+    """텍스트 → 결정적 벡터, 요청마다 받은 텍스트를 기록"""
+
+    model = "counting-stub"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        out = []
+        for t in texts:
+            rng = np.random.default_rng(sum(t.encode("utf-8")) + len(t))
+            out.append(rng.standard_normal(8).astype("float32"))
+        return np.vstack(out)
+
+    @property
+    def embedded(self):
+        return [t for c in self.calls for t in c]
+
+
+TEXTS = ["허리 통증", "두통 어지러움", "무릎 관절", "어깨 통증", "손목 저림"]
+
+
+def test_lru_eviction_at_capacity():
+    inner = CountingEmbedder()
+    c = CachedEmbeddingClient(inner, max_items=3, path="")
+    c.embed(TEXTS[:3])
+    c.embed([TEXTS[0]])                      # 0 을 최근 사용으로 → 가장 오래된 것은 1
+    c.embed([TEXTS[3]])                      # 용량 초과: 1 이 빠짐
+    assert c.stats()["size"] == 3
+    inner.calls.clear()
+    c.embed([TEXTS[0], TEXTS[2], TEXTS[3]])
+    assert inner.calls == []
+    c.embed([TEXTS[1]])
+    assert inner.embedded == [TEXTS[1]]
+
+    off = CachedEmbeddingClient(CountingEmbedder(), max_items=0, path="")
+    off.embed(TEXTS[:2])
+    off.embed(TEXTS[:2])
+    assert len(off.inner.calls) == 2 and off.stats()["size"] == 0
+    print("✅ LRU 용량을 넘으면 가장 오래 안 쓴 항목부터 제거 (0 이면 비활성)")
+
+
+def test_sqlite_tier_survives_new_instance():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "cache", "emb.sqlite")
+        first = CountingEmbedder()
+        a = CachedEmbeddingClient(first, max_items=2, path=path)
+        want = a.embed(TEXTS)
+        assert first.embedded == TEXTS
+
+        second = CountingEmbedder()
+        b = CachedEmbeddingClient(second, max_items=2, path=path)
+        got = b.embed(TEXTS + ["새 증상"])
+        assert np.allclose(got[:len(TEXTS)], want)
+        assert second.embedded == ["새 증상"]
+        assert b.stats()["disk_hits"] == len(TEXTS) and b.stats()["disk_path"] == path
+        a._db.close()
+        b._db.close()
+    print("✅ sqlite 디스크 계층은 새 인스턴스에서도 재사용 (누락분만 요청)")
+
+
+def test_counters():
+    with tempfile.TemporaryDirectory() as d:
+        inner = CountingEmbedder()
+        c = CachedEmbeddingClient(inner, max_items=2, path=os.path.join(d, "emb.sqlite"))
+        c.embed([TEXTS[0], TEXTS[1], TEXTS[0]])          # 한 요청 안의 중복은 한 번만 센다
+        assert (c.hits, c.disk_hits, c.misses) == (0, 0, 2)
+        c.embed([TEXTS[1]])                              # 메모리 적중
+        assert (c.hits, c.disk_hits, c.misses) == (1, 0, 2)
+        c.embed([TEXTS[2]])                              # 새 항목 → 0 이 LRU 에서 빠짐
+        c.embed([TEXTS[0]])                              # 디스크 적중
+        assert (c.hits, c.disk_hits, c.misses) == (1, 1, 3)
+        asyncio.run(c.aembed([TEXTS[0], TEXTS[3]]))       # 비동기 경로도 같은 카운터
+        assert (c.hits, c.disk_hits, c.misses) == (2, 1, 4)
+        assert inner.embedded == [TEXTS[0], TEXTS[1], TEXTS[2], TEXTS[3]]
+        assert c.stats()["hit_rate"] == round(3 / 7, 4)
+        c._db.close()
+    print(f"✅ hits / disk_hits / misses 카운터 ({c.stats()})")
+
+
+if __name__ == "__main__":
+    print("🚀 임베딩 캐시 테스트 시작")
+    print("=" * 60)
+    test_lru_eviction_at_capacity()
+    test_sqlite_tier_survives_new_instance()
+    test_counters()
+    print("\n🎉 모든 임베딩 캐시 테스트 완료!")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+로컬 해시 n-gram 임베딩(EMBED_BACKEND=local) 테스트
+- 결정적(배치 구성과 무관), 행 정규화, 비슷한 문장이 더 가까움
+- OpenAI 없이 HybridIndex 전체(dense + BM25 + rerank)로 검색 가능
+"""
+import os
+import sys
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.embeddings_local import LocalHashEmbeddingClient
+from rag_doctor_agent.main.agent.retriever import INDEX_DIR, HybridIndex, Retriever, read_index
+
+
+def load_docs():
+    return list(read_index(INDEX_DIR).docs)
+
+
+def test_local_embedding_deterministic():
+    c = LocalHashEmbeddingClient(dim=512)
+    texts = [d.text for d in load_docs()]
+    M = c.embed(texts)
+    assert M.shape == (len(texts), 512) and M.dtype == np.float32
+    assert np.allclose(np.linalg.norm(M, axis=1), 1.0, atol=1e-5)
+    # 배치 구성 / 새 인스턴스와 무관하게 같은 벡터
+    assert np.array_equal(M[7:9], LocalHashEmbeddingClient(dim=512).embed(texts[7:9]))
+    print("✅ 결정적 / 정규화")
+
+
+def test_local_embedding_similarity():
+    c = LocalHashEmbeddingClient()
+    a, b, d = c.embed(["허리 통증", "허리가 아파요", "두통 어지러움"])
+    assert a @ b > a @ d
+    print(f"✅ 유사도: {a @ b:.3f} > {a @ d:.3f}")
+
+
+def test_hybrid_search_offline():
+    c = LocalHashEmbeddingClient()
+    index = HybridIndex()
+    index.add_docs(load_docs(), c)
+    hits = index.search("허리 통증 ; 정형외과 ; 척추센터", c, top_k=5)
+    assert len(hits) == 5
+    assert any("허리" in d.text or "척추" in d.text for d, _ in hits)
+    print("✅ 오프라인 하이브리드 검색:", [d.id for d, _ in hits])
+
+
+def test_retriever_local_backend():
+    r = Retriever(embed_backend="local")
+    assert r.embedder.model.startswith("local-hash")
+    assert r.index_status()["embed_backend"] == "local"
+    print("✅ Retriever(embed_backend='local') – API 키 불필요")
+
+
+if __name__ == "__main__":
+    print("🚀 로컬 임베딩 테스트 시작")
+    print("=" * 60)
+    test_local_embedding_deterministic()
+    test_local_embedding_similarity()
+    test_hybrid_search_offline()
+    test_retriever_local_backend()
+    print("\n🎉 모든 로컬 임베딩 테스트 완료!")
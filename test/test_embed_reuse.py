@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+ingest 임베딩 재사용(EmbeddingReuse) 테스트 (호출 수를 세는 가짜 임베더 사용)
+- 같은 문서로 다시 빌드하면 아무것도 임베딩하지 않음
+- 두 빌드 사이에 문서 하나만 고치면 그 문서만 다시 임베딩하고 나머지는 직전 벡터를 재사용
+"""
+import os
+import sys
+import tempfile
+from dataclasses import replace
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.embeddings_local import LocalHashEmbeddingClient
+from rag_doctor_agent.main.agent.retriever import Doc, HybridIndex, Retriever
+
+
+class CountingEmbedder(LocalHashEmbeddingClient):
+    """로컬 해시 임베딩 + 요청받은 텍스트 기록"""
+
+    def __init__(self):
+        super().__init__(dim=64)
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return super().embed(texts)
+
+    @property
+    def embedded(self):
+        return [t for c in self.calls for t in c]
+
+
+def make_docs(n):
+    words = ["허리", "통증", "두통", "무릎", "관절", "정형외과", "신경과", "척추센터", "교수", "어지러움"]
+    return [Doc(id=f"d{i}", text=f"{i}번 " + " ".join(words[(i * k) % len(words)] for k in range(1, 6)),
+                meta={}, source="t", type="team") for i in range(n)]
+
+
+def build(index_dir, docs):
+    stub = CountingEmbedder()
+    r = Retriever(embed_backend="local", index_dir=index_dir)
+    r.embedder.inner = stub
+    info = r.ingest_docs([docs])
+    return r, stub, info["counts"]
+
+
+def test_only_edited_doc_is_reembedded():
+    docs = make_docs(30)
+    with tempfile.TemporaryDirectory() as d:
+        index_dir = os.path.join(d, "index")
+        _, stub, counts = build(index_dir, docs)
+        assert stub.embedded == [x.text for x in docs]
+        assert (counts["reused"], counts["embedded"]) == (0, 30)
+
+        _, stub, counts = build(index_dir, docs)
+        assert stub.calls == [] and (counts["reused"], counts["embedded"]) == (30, 0)
+
+        edited = list(docs)
+        edited[7] = replace(docs[7], text=docs[7].text + " 디스크 재활")
+        r, stub, counts = build(index_dir, edited)
+        assert stub.embedded == [edited[7].text]
+        assert (counts["reused"], counts["embedded"]) == (29, 1)
+
+        ref = HybridIndex()
+        ref.add_docs(edited, CountingEmbedder())
+        assert np.allclose(r.index.emb_matrix, ref.emb_matrix)
+    print("✅ 다시 빌드하면 재사용 30/30, 문서 하나를 고치면 그 문서만 새로 임베딩 (29 재사용 + 1)")
+
+
+if __name__ == "__main__":
+    print("🚀 임베딩 재사용 테스트 시작")
+    print("=" * 60)
+    test_only_edited_doc_is_reembedded()
+    print("\n🎉 모든 임베딩 재사용 테스트 완료!")
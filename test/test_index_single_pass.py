@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+단일 패스 인덱스 빌드(Retriever.ingest_docs / pipeline.index) 테스트
+- 묶음 단위로 읽고 미리 토큰화해도 문서 목록으로 한 번에 만든 인덱스와 같음
+- pipeline.index() 는 전처리 파일을 한 번씩만 읽고, 예전 all_docs.jsonl 은 인덱싱하지 않고 지움
+- 단계별 시간(read / tokenize / embed / index / persist) 출력
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent import retriever as R
+from rag_doctor_agent.main.agent.embeddings_local import LocalHashEmbeddingClient
+from rag_doctor_agent.main.agent.retriever import Doc, HybridIndex, Retriever
+from rag_doctor_agent.main.data import loaders, pipeline
+
+STAGES = ["read", "tokenize", "embed", "index", "persist", "total"]
+
+
+def make_docs(n):
+    words = ["허리", "통증", "두통", "무릎", "관절", "정형외과", "신경과", "척추센터", "교수", "어지러움"]
+    return [Doc(id=f"d{i}", text=" ".join(words[(i * k) % len(words)] for k in range(1, 6)),
+                meta={"dept": words[i % 3 + 5]}, source="t", type="team") for i in range(n)]
+
+
+@contextlib.contextmanager
+def data_dir():
+    names = [(R, "DB_DIR"), (R, "PREPROC_DIR"), (R, "INDEX_DIR"), (R, "EMBED_BACKEND"),
+             (R, "INGEST_CHUNK_DOCS"), (pipeline, "DB_DIR"), (pipeline, "PREPROC_DIR"),
+             (pipeline, "INDEX_DIR"), (pipeline, "RAW_DIR")]
+    saved = [(m, n, getattr(m, n)) for m, n in names]
+    with tempfile.TemporaryDirectory() as d:
+        db = os.path.join(d, "db_data")
+        for m in (R, pipeline):
+            m.DB_DIR = db
+            m.PREPROC_DIR = os.path.join(db, "preprocessed")
+            m.INDEX_DIR = os.path.join(db, "index")
+        pipeline.RAW_DIR = os.path.join(d, "raw_data")
+        R.EMBED_BACKEND = "local"
+        R.INGEST_CHUNK_DOCS = 7
+        try:
+            yield d
+        finally:
+            for m, n, v in saved:
+                setattr(m, n, v)
+
+
+def test_chunked_ingest_matches_add_docs():
+    docs = make_docs(40)
+    with data_dir():
+        r = Retriever(embed_backend="local")
+        info = r.ingest_docs(docs[i:i + 9] for i in range(0, len(docs), 9))
+        ref = HybridIndex()
+        ref.add_docs(docs, LocalHashEmbeddingClient())
+        assert info["counts"]["docs"] == 40 and list(info["timings"]) == STAGES
+        assert [d.id for d in r.index.docs] == [d.id for d in ref.docs]
+        assert r.index.doc_toks == ref.doc_toks and r.index.df == ref.df
+        assert np.allclose(r.index.emb_matrix, ref.emb_matrix)
+        for q in ["허리 통증", "두통 어지러움", "무릎 관절 정형외과"]:
+            qv = r.embedder.embed([q])[0]
+            assert r.index.search_embedded(q, qv, top_k=5) == ref.search_embedded(q, qv, top_k=5)
+    print(f"✅ 묶음 ingest == add_docs 한 번 ({info['timings']})")
+
+
+def test_pipeline_index_reads_each_file_once():
+    with data_dir():
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline.init()
+        docs = [{"id": d.id, "text": d.text, "meta": d.meta, "source": d.source, "type": d.type}
+                for d in make_docs(30)]
+        with open(os.path.join(pipeline.PREPROC_DIR, "a.jsonl"), "w", encoding="utf-8") as f:
+            for d in docs[:20]:
+                f.write(json.dumps(d, ensure_ascii=False) + "\n")
+        with open(os.path.join(pipeline.DB_DIR, "extra.json"), "w", encoding="utf-8") as f:
+            json.dump(docs[20:], f, ensure_ascii=False)
+        staging = os.path.join(pipeline.DB_DIR, "all_docs.jsonl")
+        with open(staging, "w", encoding="utf-8") as f:
+            for d in docs:
+                f.write(json.dumps(d, ensure_ascii=False) + "\n")
+
+        opened = []
+        orig_jsonl, orig_json = loaders.iter_jsonl_items, loaders.iter_json_items
+        loaders.iter_jsonl_items = lambda p: (opened.append(os.path.basename(p)), orig_jsonl(p))[1]
+        loaders.iter_json_items = lambda p: (opened.append(os.path.basename(p)), orig_json(p))[1]
+        try:
+            buf = io.StringIO()
+            with contextlib.redirect_stdout(buf):
+                pipeline.index()
+        finally:
+            loaders.iter_jsonl_items, loaders.iter_json_items = orig_jsonl, orig_json
+        out = json.loads(buf.getvalue())
+
+        assert out["docs_indexed"] == 30
+        assert out["embeddings_new"] == len({d["text"] for d in docs})
+        assert sorted(opened) == ["a.jsonl", "extra.json"]
+        assert not os.path.exists(staging)
+        assert list(out["stage_seconds"]) == STAGES
+    print(f"✅ pipeline.index 단일 패스 / staging 파일 제외 ({out['stage_seconds']})")
+
+
+if __name__ == "__main__":
+    print("🚀 단일 패스 인덱스 빌드 테스트 시작")
+    print("=" * 60)
+    test_chunked_ingest_matches_add_docs()
+    test_pipeline_index_reads_each_file_once()
+    print("\n🎉 모든 단일 패스 인덱스 빌드 테스트 완료!")
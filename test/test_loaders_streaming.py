@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+스트리밍 로더(iter_file_docs) 테스트
+- CSV: chunksize 로 읽어도 전체를 한 번에 읽은 결과(id 포함)와 같고, 메모리 최고치가 묶음 크기에 묶임
+- XLSX: read-only 로 읽고 헤더만 보고 시트 선택, 빈 행 / 결측 표기 / 중복 헤더가 read_excel 과 같음
+- 숫자 셀은 원본에 적힌 그대로 문서 텍스트에 들어감 ("1.50" / "1", 예전 추론 읽기의 "1.5" / "1.0" 아님)
+- JSON: 배열을 원소 단위로 읽어도 json.load 와 같고, 깨진 파일은 건너뜀
+"""
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import pandas as pd
+from openpyxl import Workbook
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.data import loaders
+from rag_doctor_agent.main.data.loaders import (
+    build_docs_from_symptom, build_docs_from_team, iter_file_docs, load_file_to_docs,
+    normalize_columns, write_docs_jsonl
+)
+
+
+def write_csv(path, n):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("증상,진료과,설명\n")
+        for i in range(n):
+            f.write(f"증상{i % 97} 통증,{'정형외과' if i % 3 else ''},{i if i % 5 else 'NA'}\n")
+
+
+def test_csv_chunks_match_full_read():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "sym.csv")
+        write_csv(path, 2500)
+        full = build_docs_from_symptom(normalize_columns(pd.read_csv(path, dtype=str)), path)
+        chunks = list(iter_file_docs(path, chunk_rows=400))
+        assert [len(c) for c in chunks] == [400] * 6 + [100]
+        assert [x for c in chunks for x in c] == full == load_file_to_docs(path)
+        assert full[-1]["id"] == "sym.csv-sym-2499"
+    print("✅ CSV 묶음 읽기 == 전체 읽기 (id 연속)")
+
+
+def test_na_tokens_match_read_csv_defaults():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "na.csv")
+        tokens = sorted(loaders.NA_VALUES - {""}) + ["n.a.", "-", "0", "Nan", "NONE"]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("증상,진료과\n")
+            f.writelines(f"{t},\n" for t in tokens)
+        got = pd.concat(loaders._iter_csv_frames(path, 4))
+        want = pd.read_csv(path, dtype=str)
+        assert got.isna().values.tolist() == want.isna().values.tolist()
+        assert got["증상"].dropna().tolist() == ["n.a.", "-", "0", "Nan", "NONE"]
+    print("✅ 결측 표기 목록이 read_csv 기본값과 같음")
+
+
+def test_numeric_cells_keep_source_text():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "num.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("symptom,dept,note\n두통,신경과,1.50\n요통,정형외과,1\n복통,내과,\n")
+        texts = [x["text"] for x in load_file_to_docs(path)]
+        assert texts == ["두통 | 신경과 | 1.50", "요통 | 정형외과 | 1", "복통 | 내과 | nan"]
+        # 예전처럼 dtype 을 추론해 읽으면 같은 셀이 "1.5" / "1.0" 이 된다 (LOADER_VERSION 2 부터 바뀜)
+        old = build_docs_from_symptom(normalize_columns(pd.read_csv(path)), path)
+        assert [x["text"] for x in old][:2] == ["두통 | 신경과 | 1.5", "요통 | 정형외과 | 1.0"]
+
+        xlsx = os.path.join(d, "num.xlsx")
+        wb = Workbook()
+        wb.active.append(["symptom", "dept", "note"])
+        for row in (["두통", "신경과", 2.0], ["요통", "정형외과", 2.5], ["복통", "내과", 3]):
+            wb.active.append(row)
+        wb.save(xlsx)
+        texts = [x["text"] for x in load_file_to_docs(xlsx)]
+        assert texts == ["두통 | 신경과 | 2", "요통 | 정형외과 | 2.5", "복통 | 내과 | 3"]
+    print("✅ 숫자 셀은 원본 표기 그대로 (CSV \"1.50\" / \"1\", XLSX 정수 값은 정수로)")
+
+
+def test_csv_streaming_memory_is_bounded():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "big.csv")
+        write_csv(path, 60000)
+        out = os.path.join(d, "big.jsonl")
+
+        tracemalloc.start()
+        n = write_docs_jsonl(iter_file_docs(path, chunk_rows=2000), out)
+        stream_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        docs = load_file_to_docs(path)
+        full_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert n == len(docs) == 60000
+        assert stream_peak * 4 < full_peak, (stream_peak, full_peak)
+    print(f"✅ 스트리밍 변환 최고 메모리 {stream_peak / 1e6:.1f}MB (전체 목록 {full_peak / 1e6:.1f}MB)")
+
+
+def test_xlsx_read_only_matches_read_excel():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "team.xlsx")
+        wb = Workbook()
+        small = wb.active
+        small.title = "요약"
+        small.append(["의료진명", "진료과"])
+        for i in range(3):
+            small.append([f"의사{i}", "내과"])
+        ws = wb.create_sheet("명단")
+        ws.append(["진료과", "진료과ID", "의료진명", "직함", "전문분야", "비고", "비고", None])
+        ws.append(["정형외과", 1, "김철수", "교수", "척추", "NA", 2.0])
+        ws.append([None, None, None, None, None, None, None])          # 중간 빈 행은 유지
+        ws.append(["신경과", 2, "이영희", "부교수", None, 2.5, ""])
+        ws.append(["", None, "", None, "두통", None, None])
+        ws.append([None] * 7)                                          # 끝의 빈 행은 버림
+        wb.save(path)
+
+        best = pd.read_excel(path, sheet_name="명단", dtype=str)
+        want = build_docs_from_team(normalize_columns(best), path)
+        got = [x for c in iter_file_docs(path, chunk_rows=2) for x in c]
+        assert got == want and [x["id"] for x in got] == ["team.xlsx-team-0", "team.xlsx-team-2", "team.xlsx-team-3"]
+
+        frames = list(loaders._iter_xlsx_frames(path, 2))
+        merged = pd.concat(frames)
+        assert list(merged.columns) == list(best.columns)
+        assert merged.astype(str).values.tolist() == best.astype(str).values.tolist()
+    print("✅ XLSX read-only / 헤더로 시트 선택 / 빈 행·결측·중복 헤더 처리가 read_excel 과 같음")
+
+
+def test_json_array_streaming():
+    items = [{"id": f"d{i}", "text": "허리 통증 " * (i % 7), "meta": {"k": [i, {"x": "]"}]}} for i in range(300)]
+    items.append({"text": "no id"})
+    saved = loaders.JSON_READ_CHARS
+    loaders.JSON_READ_CHARS = 64                    # 원소가 버퍼 경계에 걸치도록
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            arr = os.path.join(d, "arr.json")
+            with open(arr, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False, indent=1)
+            assert list(loaders.iter_json_items(arr)) == items
+            docs = load_file_to_docs(arr)
+            assert len(docs) == 301 and docs[-1]["id"] == "arr.json-300" and docs[-1]["type"] == "external"
+
+            wrapped = os.path.join(d, "wrapped.json")
+            with open(wrapped, "w", encoding="utf-8") as f:
+                json.dump({"docs": items[:5]}, f)
+            assert [x["id"] for x in load_file_to_docs(wrapped)] == ["d0", "d1", "d2", "d3", "d4"]
+
+            broken = os.path.join(d, "broken.json")
+            with open(broken, "w", encoding="utf-8") as f:
+                f.write(json.dumps(items[:50])[:-40])
+            assert load_file_to_docs(broken) == []
+            assert write_docs_jsonl(iter_file_docs(broken), os.path.join(d, "b.jsonl")) == 0
+            assert not os.path.exists(os.path.join(d, "b.jsonl"))
+    finally:
+        loaders.JSON_READ_CHARS = saved
+    print("✅ JSON 배열 원소 단위 읽기 == json.load / 깨진 파일은 건너뜀")
+
+
+if __name__ == "__main__":
+    print("🚀 스트리밍 로더 테스트 시작")
+    print("=" * 60)
+    test_csv_chunks_match_full_read()
+    test_na_tokens_match_read_csv_defaults()
+    test_numeric_cells_keep_source_text()
+    test_csv_streaming_memory_is_bounded()
+    test_xlsx_read_only_matches_read_excel()
+    test_json_array_streaming()
+    print("\n🎉 모든 스트리밍 로더 테스트 완료!")
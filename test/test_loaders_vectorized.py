@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+열 단위(vectorized) 문서 빌더 회귀 테스트
+- 번들 원본(barunjoint_symptoms.csv / medical_team_info.xlsx)의 JSONL 이 기존 iterrows 빌더와 바이트 단위로 같음
+- NaN / None / 숫자 / 공백 / 중복 컬럼 / 빈 행이 섞인 프레임에서도 같음
+- 묶음(chunk) 크기와 무관하게 같은 결과, write_docs_jsonl 은 실패 시 아무것도 남기지 않음
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.augmentation import canonical_title
+from rag_doctor_agent.main.data import pipeline
+from rag_doctor_agent.main.data.loaders import (
+    build_docs_from_symptom, build_docs_from_team, iter_docs_from_team, iter_file_docs,
+    load_file_to_docs, normalize_columns, write_docs_jsonl
+)
+
+RAW_SRC = os.path.join(os.path.dirname(pipeline.__file__), "raw_data")
+
+
+# ----- 기존(iterrows) 빌더 – 비교 기준 ----- #
+def legacy_team(df, source):
+    docs = []
+    def cell_to_str(v):
+        if isinstance(v, pd.Series):
+            vals = [str(x) for x in v.values if str(x) != 'nan']
+            vals = list(dict.fromkeys([x.strip() for x in vals if x.strip()]))
+            return "/".join(vals)
+        return str(v)
+    for i, row in df.iterrows():
+        dn = cell_to_str(row.get("doctor_name", "")).strip()
+        dp = cell_to_str(row.get("dept", "")).strip()
+        tl = canonical_title(cell_to_str(row.get("title", "")).strip() or "")
+        sp = cell_to_str(row.get("specialty", "")).strip()
+        tr = cell_to_str(row.get("treats", "")).strip()
+        meta = {"doctor_name": dn, "dept": dp, "title": tl, "specialty": sp, "treats": tr}
+        text = " | ".join([p for p in [dn, dp, tl, sp, tr] if p and p != 'nan'])
+        if not text:
+            continue
+        docs.append({"id": f"{os.path.basename(source)}-team-{i}", "text": text, "meta": meta, "source": source, "type": "team"})
+    return docs
+
+
+def legacy_symptom(df, source):
+    docs = []
+    for i, row in df.iterrows():
+        sym = str(row.get("symptom", row.get("symptoms", row.get("keyword", row.get("증상", ""))))).strip()
+        dept = str(row.get("dept", row.get("department", row.get("진료과", "")))).strip()
+        note = str(row.get("note", row.get("설명", row.get("reason", "")))).strip()
+        if not sym and not dept:
+            text = " | ".join([str(x) for x in row.values if str(x) != 'nan'])
+            meta = {"raw": {k: str(v) for k, v in row.to_dict().items()}}
+        else:
+            meta = {"symptom": sym, "dept": dept, "note": note}
+            text = " | ".join([sym, dept, note])
+        docs.append({"id": f"{os.path.basename(source)}-sym-{i}", "text": text, "meta": meta, "source": source, "type": "symptom"})
+    return docs
+
+
+def dumps(docs):
+    return "".join(json.dumps(d, ensure_ascii=False) + "\n" for d in docs).encode("utf-8")
+
+
+def random_frame(rng, columns, n):
+    pool = ["", " ", "  전문의 ", "교수", "정형외과", "정형외과 ", "nan", "허리 통증", "Dr. Kim", "부교수"]
+    def cell():
+        r = rng.random()
+        if r < 0.15:
+            return np.nan
+        if r < 0.2:
+            return None
+        if r < 0.3:
+            return rng.randint(0, 9)
+        if r < 0.35:
+            return rng.random()
+        return rng.choice(pool)
+    return pd.DataFrame([[cell() for _ in columns] for _ in range(n)], columns=columns,
+                        index=[rng.randint(0, 10 ** 6) for _ in range(n)])
+
+
+def test_bundled_files_byte_identical():
+    for name, legacy in [("barunjoint_symptoms.csv", legacy_symptom), ("medical_team_info.xlsx", legacy_team)]:
+        path = os.path.join(RAW_SRC, name)
+        if name.endswith(".csv"):
+            df = normalize_columns(pd.read_csv(path))
+        else:
+            df = normalize_columns(pd.read_excel(path))
+        expected = dumps(legacy(df, path))
+        assert expected and dumps(load_file_to_docs(path)) == expected
+        with tempfile.TemporaryDirectory() as d:
+            out = os.path.join(d, "out.jsonl")
+            assert write_docs_jsonl(iter_file_docs(path, chunk_rows=7), out) == expected.count(b"\n")
+            with open(out, "rb") as f:
+                assert f.read() == expected
+    print("✅ 번들 CSV / XLSX 결과가 기존 빌더와 바이트 단위로 같음")
+
+
+def test_random_frames_match_legacy():
+    rng = random.Random(0)
+    layouts = [
+        ["doctor_name", "dept", "title", "specialty", "treats"],
+        ["doctor_name", "doctor_name", "dept", "dept", "title", "비고"],
+        ["dept", "treats", "treats", "상세정보"],
+        ["symptom", "dept", "note"],
+        ["keyword", "진료과", "reason", "기타"],
+        ["증상", "증상", "dept"],
+        ["기타", "비고"],
+    ]
+    for cols in layouts:
+        for n in (0, 1, 5, 40):
+            df = random_frame(rng, cols, n)
+            assert dumps(build_docs_from_team(df, "x/t.csv")) == dumps(legacy_team(df, "x/t.csv")), cols
+            assert dumps(build_docs_from_symptom(df, "x/s.csv")) == dumps(legacy_symptom(df, "x/s.csv")), cols
+    # 숫자 열만 있으면 iterrows 가 공통 dtype(float)으로 올리는 것까지 같음
+    num = pd.DataFrame({"dept": [1, 2, 3], "note": [0.5, np.nan, 2.0]})
+    assert dumps(build_docs_from_symptom(num, "n.csv")) == dumps(legacy_symptom(num, "n.csv"))
+    print("✅ NaN / None / 숫자 / 중복 컬럼 / 빈 행이 섞인 프레임에서 기존과 동일")
+
+
+def test_chunks_and_failed_write():
+    df = random_frame(random.Random(1), ["doctor_name", "dept", "title"], 50)
+    whole = build_docs_from_team(df, "t.csv")
+    chunks = list(iter_docs_from_team(df, "t.csv", chunk_rows=8))
+    assert len(chunks) == 7 and [d for c in chunks for d in c] == whole
+
+    def broken():
+        yield whole[:3]
+        raise ValueError("bad row")
+    with tempfile.TemporaryDirectory() as d:
+        out = os.path.join(d, "out.jsonl")
+        assert write_docs_jsonl(broken(), out) == 0
+        assert os.listdir(d) == []
+    print("✅ 묶음 크기와 무관 / 실패 시 결과 파일 없음")
+
+
+def test_faster_than_iterrows():
+    rng = random.Random(2)
+    df = random_frame(rng, ["doctor_name", "dept", "dept", "title", "specialty", "treats"], 5000)
+    t0 = time.perf_counter()
+    old = legacy_team(df, "t.csv")
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = build_docs_from_team(df, "t.csv")
+    t_new = time.perf_counter() - t0
+    assert dumps(new) == dumps(old)
+    assert t_new < t_old, (t_new, t_old)
+    print(f"✅ 5000행: iterrows {t_old * 1000:.0f}ms → 열 단위 {t_new * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    print("🚀 열 단위 문서 빌더 테스트 시작")
+    print("=" * 60)
+    test_bundled_files_byte_identical()
+    test_random_frames_match_legacy()
+    test_chunks_and_failed_write()
+    test_faster_than_iterrows()
+    print("\n🎉 모든 열 단위 문서 빌더 테스트 완료!")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+증상 / 진료과 키워드 matcher(Aho-Corasick) 테스트
+- 오토마톤 결과 == 패턴마다 `in` 으로 검사한 결과
+- expand_symptoms / 질의 진료과 키워드 / fallback_depts_map 이 기존 반복 검사와 같음
+- rules.yaml 이 바뀔 때만 다시 컴파일
+- Agent3RAG 규칙 기반 폴백은 matcher 를 import 하지 못해도 같은 결과
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+import yaml
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.augmentation import expand_symptoms
+from rag_doctor_agent.main.agent.keywords import DEPT_KEYWORD_ROUTES, RULE_DEPT_MAP, SYMPTOM_CANON
+from rag_doctor_agent.main.agent.matcher import AhoCorasick, SymptomMatcher, get_matcher
+from rag_doctor_agent.main.agent.utils import normalize_text
+
+INPUTS = ["허리 통증", "두통과 메스꺼움", "Migraine with NAUSEA", "명치 통증이 있어요", "배가 아파요",
+          "무릎 관절", "속 울렁거림", "위가 쓰려요", "머리 어지러움", "팔 다리 저림", "",
+          "허리통증 복통", "심장질환 의심", "응급 사고", "목 등 통증", "고혈압 당뇨 검진"]
+FALLBACK = {"허리통증": ["정형외과"], "두통": ["신경과"], "복통": ["내과"], "통증": ["정형외과", "재활의학과"]}
+
+
+def naive_expand(symptoms):
+    out = []
+    for s in symptoms:
+        s0 = s.strip()
+        out.append(s0)
+        s_norm = normalize_text(s0)
+        for k, vals in SYMPTOM_CANON.items():
+            if normalize_text(k) in s_norm or any(normalize_text(v) in s_norm for v in vals):
+                out.extend([k] + vals)
+    return list(dict.fromkeys(out))
+
+
+def naive_route(symptom):
+    for keywords, depts in DEPT_KEYWORD_ROUTES:
+        if any(k in symptom.lower() for k in keywords):
+            return depts
+    return []
+
+
+def test_automaton_matches_naive():
+    rng = random.Random(0)
+    alphabet = "abc가나"
+    patterns = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(40)]
+    ac = AhoCorasick(patterns)
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert {patterns[i] for i in ac.find(text)} == {p for p in patterns if p in text}
+    print("✅ Aho-Corasick == 패턴별 부분 문자열 검사")
+
+
+def test_matcher_matches_loops():
+    m = SymptomMatcher(FALLBACK)
+    for s in INPUTS:
+        assert expand_symptoms([s]) == naive_expand([s])
+        for a in naive_expand([s]):
+            r = m.match(a)
+            assert list(r.route_depts) == naive_route(a)
+            assert list(r.fallback_depts) == [d for k, ds in FALLBACK.items() if k in a for d in ds]
+        r = m.match(s.lower())
+        assert list(r.rule_depts) == list(dict.fromkeys(d for k, d in RULE_DEPT_MAP.items() if k in s.lower()))
+    assert expand_symptoms(INPUTS) == naive_expand(INPUTS)
+    print("✅ canon / 진료과 라우팅 / fallback / 규칙 매핑 결과 동일")
+
+
+def test_rebuild_on_rules_change():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "rules.yaml")
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump({"fallback_depts_map": {"두통": ["신경과"]}}, f, allow_unicode=True)
+        m1 = get_matcher(path)
+        assert get_matcher(path) is m1
+        assert m1.match("두통 어지러움").fallback_depts == ("신경과",)
+        time.sleep(0.01)
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump({"fallback_depts_map": {"어지러움": ["이비인후과"]}}, f, allow_unicode=True)
+        m2 = get_matcher(path)
+        assert m2 is not m1 and m2.match("두통 어지러움").fallback_depts == ("이비인후과",)
+    print("✅ rules.yaml 변경 시에만 재컴파일")
+
+
+def test_rule_fallback_without_matcher():
+    from main.agents.agent3_rag import Agent3RAG
+    agent = Agent3RAG.__new__(Agent3RAG)             # RAG 파이프라인 초기화 없이 폴백만
+    inputs = [[s] for s in INPUTS] + [["허리", "두통"], ["기침"]]
+    expected = [agent._rule_based_recommendation(s, "") for s in inputs]
+
+    name = "rag_doctor_agent.main.agent.matcher"
+    saved = sys.modules.get(name)
+    sys.modules[name] = None                          # import 실패 흉내 (깨진 RAG 패키지 / yaml 없음)
+    try:
+        with redirect_stdout(StringIO()) as out:
+            got = [agent._rule_based_recommendation(s, "") for s in inputs]
+    finally:
+        if saved is None:
+            del sys.modules[name]
+        else:
+            sys.modules[name] = saved
+    assert got == expected and "matcher 사용 불가" in out.getvalue()
+    assert got[-1]["department"] == "내과"
+    print("✅ matcher 없이도 규칙 기반 폴백 결과 동일")
+
+
+if __name__ == "__main__":
+    print("🚀 키워드 matcher 테스트 시작")
+    print("=" * 60)
+    test_automaton_matches_naive()
+    test_matcher_matches_loops()
+    test_rebuild_on_rules_change()
+    test_rule_fallback_without_matcher()
+    print("\n🎉 모든 키워드 matcher 테스트 완료!")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+prepare 근접 중복 묶기(MinHash + LSH, data/dedup.py) 테스트
+- MinHash 일치율 ≈ shingle Jaccard, LSH 묶음 == 전수 비교(같은 type, 임계값 이상)
+- 팀 소개는 의료진 이름이 다르면 본문이 거의 같아도 묶지 않음
+- 대표는 먼저 나온 문서, meta 는 합쳐지고(merged_ids) 묶이지 않은 줄은 그대로
+- prepare: 번들 증상 CSV 가 줄어들고, 설정이 바뀌면 다시 변환
+- prepare: 여러 원본 명단에 같은 의사가 있으면 파일 간에도 묶고, 바뀐 파일이 있을 때만 다시 묶음
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.data import dedup, pipeline
+from rag_doctor_agent.main.data.dedup import (
+    MinHasher, dedup_jsonl, dedup_key, merge_meta, near_duplicate_groups, shingles
+)
+
+RAW_SRC = os.path.join(os.path.dirname(pipeline.__file__), "raw_data")
+WORDS = ["허리", "통증", "두통", "무릎", "관절", "정형외과", "신경과", "척추센터", "교수", "어지러움",
+         "어깨", "인공관절", "스포츠손상", "내시경", "비수술", "재활", "디스크", "협착증", "골절", "염좌"]
+
+
+def jaccard(a, b):
+    a, b = set(a.tolist()), set(b.tolist())
+    return len(a & b) / len(a | b)
+
+
+def random_texts(rng, n):
+    base = [rng.sample(WORDS, 8) for _ in range(n // 4)]
+    texts = []
+    for i in range(n):
+        t = list(base[i % len(base)])
+        for _ in range(rng.choice([0, 0, 1, 3])):       # 일부는 한두 단어만 바꾼 근접 중복
+            t[rng.randrange(len(t))] = rng.choice(WORDS)
+        texts.append(" | ".join(t))
+    return texts
+
+
+def test_minhash_estimates_jaccard():
+    rng = random.Random(0)
+    texts = random_texts(rng, 80)
+    sets = [shingles(t) for t in texts]
+    sig = MinHasher(256).signatures(sets)
+    err = [abs(float(np.mean(sig[i] == sig[j])) - jaccard(sets[i], sets[j]))
+           for i in range(40) for j in range(i + 1, 40)]
+    assert np.mean(err) < 0.05 and max(err) < 0.25, (np.mean(err), max(err))
+    print(f"✅ MinHash 일치율 ≈ Jaccard (평균 오차 {np.mean(err):.3f})")
+
+
+def test_lsh_groups_match_bruteforce():
+    rng = random.Random(1)
+    texts = random_texts(rng, 200)
+    types = ["team" if i % 5 else "symptom" for i in range(len(texts))]
+    sets = [shingles(t) for t in texts]
+    rep = near_duplicate_groups(sets, types, threshold=0.8)
+
+    pairs = [(i, j) for i in range(len(texts)) for j in range(i + 1, len(texts))
+             if types[i] == types[j] and jaccard(sets[i], sets[j]) >= 0.8]
+    found = sum(rep[i] == rep[j] for i, j in pairs)
+    assert pairs and found / len(pairs) > 0.97, (found, len(pairs))
+    for i, r in enumerate(rep):
+        assert r <= i and rep[r] == r and types[r] == types[i]
+    print(f"✅ LSH 묶음이 전수 비교 쌍의 {found}/{len(pairs)} 포함, type 별로만 묶음")
+
+
+def test_merge_meta():
+    metas = [{"doctor_name": "김재훈", "dept": "정형외과", "title": "교수", "treats": "nan"},
+             {"doctor_name": "김재훈", "dept": "재활의학과/정형외과", "title": "", "treats": ""},
+             {"doctor_name": "김재훈", "dept": "척추센터", "extra": {"a": 1}}]
+    assert merge_meta(metas) == {"doctor_name": "김재훈", "dept": "정형외과/재활의학과/척추센터",
+                                 "title": "교수", "treats": "", "extra": {"a": 1}}
+    assert merge_meta([{"raw": {"a": "1"}}, {"raw": {"a": "2"}}]) == {"raw": [{"a": "1"}, {"a": "2"}]}
+    print("✅ meta 병합 (문자열 '/' 결합, 그 밖의 값은 다를 때만 목록)")
+
+
+def test_dedup_jsonl_in_place():
+    docs = [
+        {"id": "a", "text": "김재훈 | 정형외과 | 어깨 무릎 관절내시경 스포츠손상", "meta": {"dept": "정형외과"}, "type": "team"},
+        {"id": "b", "text": "두통 | 신경과", "meta": {"dept": "신경과"}, "type": "symptom"},
+        {"id": "c", "text": "김재훈 | 정형외과 | 어깨 무릎 관절내시경 스포츠손상 ", "meta": {"dept": "척추센터"}, "type": "team"},
+        {"id": "d", "text": "두통 | 신경과", "meta": {"dept": "신경과"}, "type": "team"},
+        {"id": "e", "text": "", "meta": {}, "type": "team"},
+        {"id": "f", "text": "", "meta": {}, "type": "team"},
+    ]
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "x.jsonl")
+        lines = [json.dumps(x, ensure_ascii=False) + "\n" for x in docs]
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        assert dedup_jsonl(path) == {"docs": 5, "collapsed": 1}
+        with open(path, "r", encoding="utf-8") as f:
+            out = f.readlines()
+        assert [json.loads(l)["id"] for l in out] == ["a", "b", "d", "e", "f"]
+        assert json.loads(out[0])["meta"] == {"dept": "정형외과/척추센터", "merged_ids": ["c"]}
+        assert out[1:] == [lines[1], lines[3], lines[4], lines[5]]
+        assert dedup_jsonl(path) == {"docs": 5, "collapsed": 0}
+    print("✅ 대표 자리에 병합 meta, 나머지 줄은 바이트 그대로 / 빈 텍스트와 다른 type 은 묶지 않음")
+
+
+def test_team_docs_with_different_doctors_kept_apart():
+    spec = "척추 질환 디스크 협착증 인공관절 내시경 비수술"
+
+    def team(id_, name, dept):
+        return {"id": id_, "text": f"{name.strip()} | 정형외과 | 교수 | {spec}", "type": "team",
+                "meta": {"doctor_name": name, "dept": dept, "title": "교수", "specialty": spec}}
+    docs = [team("a", "김철수", "정형외과"), team("b", "이영희", "정형외과"), team("c", " 김철수", "척추센터")]
+    sets = [shingles(d["text"]) for d in docs]
+    assert jaccard(sets[0], sets[1]) >= 0.8                  # 본문만 보면 임계값 이상
+    assert near_duplicate_groups(sets, [d["type"] for d in docs], threshold=0.8)[1] == 0
+    assert near_duplicate_groups(sets, [dedup_key(d) for d in docs], threshold=0.8) == [0, 1, 0]
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "team.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(x, ensure_ascii=False) + "\n" for x in docs)
+        assert dedup_jsonl(path) == {"docs": 2, "collapsed": 1}
+        with open(path, "r", encoding="utf-8") as f:
+            out = [json.loads(l) for l in f]
+    assert [x["id"] for x in out] == ["a", "b"]
+    assert [x["meta"]["doctor_name"] for x in out] == ["김철수", "이영희"]
+    assert out[0]["meta"]["merged_ids"] == ["c"]
+    print("✅ 이름만 다른 두 의사의 팀 소개는 따로 남고, 같은 의사는 묶임")
+
+
+@contextlib.contextmanager
+def data_dir(raw_src=None):
+    names = ("RAW_DIR", "DB_DIR", "PREPROC_DIR", "INDEX_DIR", "MANIFEST_PATH", "PREPARE_WORKERS")
+    saved = {n: getattr(pipeline, n) for n in names}
+    saved_t, saved_on = dedup.DEDUP_THRESHOLD, dedup.PREPARE_DEDUP
+    dedup.PREPARE_DEDUP = True
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            pipeline.RAW_DIR = os.path.join(d, "raw_data")
+            pipeline.DB_DIR = os.path.join(d, "db_data")
+            pipeline.PREPROC_DIR = os.path.join(pipeline.DB_DIR, "preprocessed")
+            pipeline.INDEX_DIR = os.path.join(pipeline.DB_DIR, "index")
+            pipeline.MANIFEST_PATH = os.path.join(pipeline.PREPROC_DIR, "manifest.json")
+            pipeline.PREPARE_WORKERS = 2
+            if raw_src:
+                shutil.copytree(raw_src, pipeline.RAW_DIR)
+            else:
+                os.makedirs(pipeline.RAW_DIR)
+            yield d
+    finally:
+        for n, v in saved.items():
+            setattr(pipeline, n, v)
+        dedup.DEDUP_THRESHOLD, dedup.PREPARE_DEDUP = saved_t, saved_on
+
+
+def run(**kw):
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        pipeline.prepare(**kw)
+    return json.loads(buf.getvalue())
+
+
+def read_outputs():
+    out = {}
+    for name in sorted(os.listdir(pipeline.PREPROC_DIR)):
+        if name.endswith(".jsonl"):
+            with open(os.path.join(pipeline.PREPROC_DIR, name), encoding="utf-8") as f:
+                out[name] = [json.loads(l) for l in f]
+    return out
+
+
+def test_prepare_collapses_bundled_symptoms():
+    with data_dir(RAW_SRC):
+        first = run()
+        csv = os.path.join(pipeline.RAW_DIR, "barunjoint_symptoms.csv")
+        with open(os.path.join(pipeline.PREPROC_DIR, "barunjoint_symptoms.jsonl"), encoding="utf-8") as f:
+            texts = [json.loads(l)["text"] for l in f]
+        assert first["collapsed"] > 0 and len(texts) == len(set(texts))
+        with open(pipeline.MANIFEST_PATH, encoding="utf-8") as f:
+            entry = json.load(f)["files"][csv]
+        assert entry["docs"] == len(texts) and entry["dedup"] == dedup.dedup_signature()
+
+        assert first["dedup"]["enabled"] and first["dedup"]["signature"] == dedup.dedup_signature()
+        assert run()["converted"] == 0
+        dedup.DEDUP_THRESHOLD = 0.9
+        assert run()["converted"] == first["converted"]
+    print(f"✅ prepare 중복 묶기: {first['collapsed']}개 문서 병합, 설정이 바뀌면 다시 변환")
+
+
+def test_prepare_collapses_across_rosters():
+    spec = "척추 질환 디스크 협착증 인공관절 내시경 비수술"
+    header = "의료진명,진료과,직함,전문분야\n"
+    with data_dir():
+        a = os.path.join(pipeline.RAW_DIR, "a_roster.csv")
+        b = os.path.join(pipeline.RAW_DIR, "b_roster.csv")
+        with open(a, "w", encoding="utf-8") as f:
+            f.write(header + f"김철수,정형외과,교수,{spec}\n이영희,신경과,교수,두통 어지러움 뇌졸중\n")
+        with open(b, "w", encoding="utf-8") as f:
+            f.write(header + f"김철수,척추센터,교수,{spec}\n박민수,정형외과,교수,{spec}\n")
+
+        first = run()
+        assert first["prepared_docs"] == 3 and first["dedup"]["collapsed_cross_file"] == 1
+        out = read_outputs()
+        assert [d["meta"]["doctor_name"] for d in out["a_roster.jsonl"]] == ["김철수", "이영희"]
+        assert [d["meta"]["doctor_name"] for d in out["b_roster.jsonl"]] == ["박민수"]
+        kim = out["a_roster.jsonl"][0]["meta"]
+        assert kim["dept"] == "정형외과/척추센터" and kim["merged_ids"] == ["b_roster.csv-team-0"]
+
+        again = run()                                    # 바뀐 게 없으면 파일 간 묶기도 건너뜀
+        assert again["converted"] == 0 and again["prepared_docs"] == 3 and read_outputs() == out
+
+        with open(a, "a", encoding="utf-8") as f:
+            f.write("최지우,내과,교수,위염 소화불량\n")
+        changed = run()                                  # b 는 파일 간 묶기로 바뀌었으므로 함께 다시 변환
+        assert sorted(changed["file_seconds"]) == [a, b] and changed["prepared_docs"] == 4
+        incremental = read_outputs()
+        assert run(force=True)["prepared_docs"] == 4 and read_outputs() == incremental
+
+        os.remove(a)                                     # 대표가 있던 원본이 사라지면 b 의 김철수가 돌아옴
+        res = run()
+        assert res["removed"] == [a] and res["prepared_docs"] == 2
+        assert [d["meta"]["doctor_name"] for d in read_outputs()["b_roster.jsonl"]] == ["김철수", "박민수"]
+    print(f"✅ 원본 명단 간 같은 의사 묶기 ({first['dedup']}), 바뀐 파일이 있을 때만 다시 묶음")
+
+
+if __name__ == "__main__":
+    print("🚀 prepare 근접 중복 묶기 테스트 시작")
+    print("=" * 60)
+    test_minhash_estimates_jaccard()
+    test_lsh_groups_match_bruteforce()
+    test_merge_meta()
+    test_dedup_jsonl_in_place()
+    test_team_docs_with_different_doctors_kept_apart()
+    test_prepare_collapses_bundled_symptoms()
+    test_prepare_collapses_across_rosters()
+    print("\n🎉 모든 prepare 근접 중복 묶기 테스트 완료!")
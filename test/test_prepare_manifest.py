@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+pipeline prepare 의 manifest(원본 sha256 + LOADER_VERSION) 테스트
+- 두 번째 실행은 모두 건너뜀, 내용이 바뀐 파일만 다시 변환 (프로세스 풀)
+- LOADER_VERSION 이 바뀌면 전부 다시 변환, 사라진 원본의 결과는 제거
+- 다시 변환한 결과가 비거나 실패하면 이전 결과와 manifest 기록을 유지하고 다음 실행에서 다시 시도
+- 결과 JSONL 은 load_file_to_docs 를 직접 쓴 것과 같음
+"""
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.data import pipeline
+from rag_doctor_agent.main.data.loaders import load_file_to_docs
+
+RAW_SRC = os.path.join(os.path.dirname(pipeline.__file__), "raw_data")
+
+
+@contextlib.contextmanager
+def data_dir():
+    names = ("RAW_DIR", "DB_DIR", "PREPROC_DIR", "INDEX_DIR", "MANIFEST_PATH",
+             "PREPARE_WORKERS", "LOADER_VERSION")
+    saved = {n: getattr(pipeline, n) for n in names}
+    saved_dedup = pipeline.dedup.PREPARE_DEDUP
+    # 근접 중복 묶기는 test_prepare_dedup 에서 – 여기서는 변환 결과를 로더 출력과 그대로 비교
+    pipeline.dedup.PREPARE_DEDUP = False
+    with tempfile.TemporaryDirectory() as d:
+        pipeline.RAW_DIR = os.path.join(d, "raw_data")
+        pipeline.DB_DIR = os.path.join(d, "db_data")
+        pipeline.PREPROC_DIR = os.path.join(pipeline.DB_DIR, "preprocessed")
+        pipeline.INDEX_DIR = os.path.join(pipeline.DB_DIR, "index")
+        pipeline.MANIFEST_PATH = os.path.join(pipeline.PREPROC_DIR, "manifest.json")
+        pipeline.PREPARE_WORKERS = 2
+        shutil.copytree(RAW_SRC, pipeline.RAW_DIR)
+        try:
+            yield d
+        finally:
+            for n, v in saved.items():
+                setattr(pipeline, n, v)
+            pipeline.dedup.PREPARE_DEDUP = saved_dedup
+
+
+def run(**kw):
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        pipeline.prepare(**kw)
+    return json.loads(buf.getvalue())
+
+
+def test_skip_unchanged_and_reconvert_changed():
+    with data_dir():
+        first = run()
+        n_files = first["converted"]
+        assert first["skipped"] == 0 and first["prepared_docs"] > 0
+        for fp in first["files"]:
+            out = os.path.join(pipeline.PREPROC_DIR,
+                               os.path.splitext(os.path.basename(fp))[0] + ".jsonl")
+            with open(out, "r", encoding="utf-8") as f:
+                assert [json.loads(l) for l in f] == load_file_to_docs(fp)
+
+        again = run()
+        assert again["converted"] == 0 and again["skipped"] == n_files
+        assert again["prepared_docs"] == first["prepared_docs"]
+
+        csv = os.path.join(pipeline.RAW_DIR, "barunjoint_symptoms.csv")
+        with open(csv, "a", encoding="utf-8") as f:
+            f.write("새증상,정형외과,테스트\n")
+        changed = run()
+        assert list(changed["file_seconds"]) == [csv]
+        assert changed["prepared_docs"] == first["prepared_docs"] + 1
+        print(f"✅ 변경 없음 → 건너뜀, 바뀐 파일만 변환 ({changed['file_seconds']})")
+
+
+def test_loader_version_and_removed_files():
+    with data_dir():
+        first = run()
+        pipeline.LOADER_VERSION += 1
+        assert run()["converted"] == first["converted"]
+
+        xlsx = os.path.join(pipeline.RAW_DIR, "medical_team_info.xlsx")
+        os.remove(xlsx)
+        res = run()
+        assert res["removed"] == [xlsx] and res["converted"] == 0
+        assert not os.path.exists(os.path.join(pipeline.PREPROC_DIR, "medical_team_info.jsonl"))
+        assert run(force=True)["converted"] == first["converted"] - 1
+    print("✅ LOADER_VERSION 변경 시 재변환 / 삭제된 원본 결과 제거 / force")
+
+
+def test_failed_reconvert_keeps_previous_output():
+    with data_dir():
+        first = run()
+        csv = os.path.join(pipeline.RAW_DIR, "barunjoint_symptoms.csv")
+        out = os.path.join(pipeline.PREPROC_DIR, "barunjoint_symptoms.jsonl")
+        with open(out, "rb") as f:
+            good = f.read()
+        with open(pipeline.MANIFEST_PATH, encoding="utf-8") as f:
+            entry = json.load(f)["files"][csv]
+        with open(csv, "rb") as f:
+            original = f.read()
+
+        with open(csv, "w", encoding="utf-8") as f:
+            f.write("")                                             # 깨진(빈) 원본
+        empty = os.path.join(pipeline.RAW_DIR, "header_only.csv")
+        with open(empty, "w", encoding="utf-8") as f:
+            f.write("증상,진료과,설명\n")                            # 문서 0개인 새 원본
+        for _ in range(2):                                          # 기록이 남지 않으므로 매번 다시 시도
+            res = run()
+            assert sorted(res["failed"]) == sorted([csv, empty]) and res["converted"] == 0
+            assert res["prepared_docs"] == first["prepared_docs"] and res["removed"] == []
+            with open(out, "rb") as f:
+                assert f.read() == good
+            with open(pipeline.MANIFEST_PATH, encoding="utf-8") as f:
+                files = json.load(f)["files"]
+            assert files[csv] == entry and empty not in files
+            assert not os.path.exists(os.path.join(pipeline.PREPROC_DIR, "header_only.jsonl"))
+
+        os.remove(empty)
+        with open(csv, "wb") as f:
+            f.write(original)
+        res = run()                                                 # 원본을 되돌리면 기록된 sha256 과 같아 건너뜀
+        assert res["failed"] == [] and res["converted"] == 0
+        assert res["prepared_docs"] == first["prepared_docs"]
+        with open(out, "rb") as f:
+            assert f.read() == good
+    print("✅ 다시 변환한 결과가 비거나 실패하면 이전 결과 / manifest 기록 유지")
+
+
+if __name__ == "__main__":
+    print("🚀 prepare manifest 테스트 시작")
+    print("=" * 60)
+    test_skip_unchanged_and_reconvert_changed()
+    test_loader_version_and_removed_files()
+    test_failed_reconvert_keeps_previous_output()
+    print("\n🎉 모든 prepare manifest 테스트 완료!")
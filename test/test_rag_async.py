@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+비동기 검색(Retriever.aretrieve) 테스트
+- 결과가 동기 retrieve 와 같은지, 동시에 여러 요청을 처리할 수 있는지
+- 임베딩을 기다리는 동안 이벤트 루프가 막히지 않는지, timeout 이 동작하는지
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent import retriever as retriever_mod
+from rag_doctor_agent.main.agent.embed_cache import CachedEmbeddingClient
+from rag_doctor_agent.main.agent.embeddings_local import LocalHashEmbeddingClient
+from rag_doctor_agent.main.agent.result_cache import ResultCache
+from rag_doctor_agent.main.agent.retriever import (
+    INDEX_DIR, HybridIndex, Retriever, read_index, save_index_file
+)
+
+PATIENTS = [["허리 통증"], ["두통", "어지러움"], ["무릎 통증", "부기"], ["소화 불량"], []]
+
+
+class SlowEmbedder(LocalHashEmbeddingClient):
+    """원격 임베딩처럼 aembed 가 delay 초 동안 기다린다 (embed 는 sync 지연 없음)"""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.acalls = 0
+
+    async def aembed(self, texts):
+        self.acalls += 1
+        await asyncio.sleep(self.delay)
+        return self.embed(texts)
+
+
+def make_retriever(d, inner=None):
+    emb = LocalHashEmbeddingClient()
+    index = HybridIndex()
+    index.add_docs(list(read_index(INDEX_DIR).docs), emb)
+    save_index_file(d, index)
+    with open(os.path.join(d, "index_meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"N": index.N, "version": "v1", "embed_model": emb.model}, f)
+    r = Retriever(embed_backend="local", index_dir=d)
+    # 검색 경로 자체를 비교하므로 결과 캐시는 끔
+    r.results = ResultCache(max_items=0)
+    if inner is not None:
+        r.embedder = CachedEmbeddingClient(inner, max_items=0)
+    return r
+
+
+def ids(results):
+    return [[h["id"] for h in hits] for hits in results]
+
+
+def test_aretrieve_matches_retrieve():
+    with tempfile.TemporaryDirectory() as d:
+        r = make_retriever(d)
+        expected = [r.retrieve(p, top_k=5) for p in PATIENTS]
+
+        async def run():
+            return await asyncio.gather(*(r.aretrieve(p, top_k=5) for p in PATIENTS))
+
+        assert ids(asyncio.run(run())) == ids(expected)
+        # 큰 코퍼스 경로: 점수 계산을 스레드 풀에서
+        old = retriever_mod.ASYNC_OFFLOAD_DOCS
+        retriever_mod.ASYNC_OFFLOAD_DOCS = 0
+        try:
+            assert ids(asyncio.run(run())) == ids(expected)
+        finally:
+            retriever_mod.ASYNC_OFFLOAD_DOCS = old
+    print("✅ aretrieve == retrieve (동시 요청 / 스레드 오프로드)")
+
+
+def test_aretrieve_does_not_block_loop():
+    with tempfile.TemporaryDirectory() as d:
+        inner = SlowEmbedder(0.2)
+        r = make_retriever(d, inner)
+        r.retrieve(["허리 통증"])   # 인덱스 로드
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            t = asyncio.create_task(ticker())
+            t0 = time.perf_counter()
+            res = await asyncio.gather(*(r.aretrieve(p, top_k=5) for p in PATIENTS))
+            elapsed = time.perf_counter() - t0
+            t.cancel()
+            return res, ticks, elapsed
+
+        res, ticks, elapsed = asyncio.run(run())
+        assert len(res) == len(PATIENTS) and inner.acalls == len(PATIENTS)
+        # 5건의 0.2초 대기가 겹쳐서 진행되고, 그동안 다른 task 도 실행됨
+        assert elapsed < 0.2 * len(PATIENTS) * 0.6
+        assert ticks >= 5
+        print(f"✅ 동시 {len(PATIENTS)}건 {elapsed:.2f}s, 대기 중 다른 task {ticks}회 실행")
+
+
+def test_aretrieve_timeout():
+    with tempfile.TemporaryDirectory() as d:
+        r = make_retriever(d, SlowEmbedder(1.0))
+        r.retrieve(["허리 통증"])
+
+        async def run():
+            try:
+                await r.aretrieve(["두통"], timeout=0.05)
+            except asyncio.TimeoutError:
+                return True
+            return False
+
+        assert asyncio.run(run())
+    print("✅ timeout → asyncio.TimeoutError")
+
+
+def test_cached_aembed():
+    inner = SlowEmbedder(0.0)
+    c = CachedEmbeddingClient(inner)
+    a = asyncio.run(c.aembed(["허리 통증", "두통"]))
+    b = asyncio.run(c.aembed(["두통", "허리 통증"]))
+    assert inner.acalls == 1 and (a[::-1] == b).all()
+    assert c.stats()["hits"] == 2
+    print("✅ CachedEmbeddingClient.aembed 캐시 적중")
+
+
+if __name__ == "__main__":
+    print("🚀 비동기 검색 테스트 시작")
+    print("=" * 60)
+    test_aretrieve_matches_retrieve()
+    test_aretrieve_does_not_block_loop()
+    test_aretrieve_timeout()
+    test_cached_aembed()
+    print("\n🎉 모든 비동기 검색 테스트 완료!")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+배치 검색(HybridIndex.search_many / Retriever.retrieve_many) 테스트
+- 질의별 결과가 단건 search / retrieve 와 같은지 (float32, fp16 압축, tail 이 있는 인덱스)
+- 배치 전체에 임베딩 요청이 한 번만 나가는지
+"""
+import json
+import os
+import sys
+import tempfile
+from dataclasses import replace
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.embeddings_local import LocalHashEmbeddingClient
+from rag_doctor_agent.main.agent.result_cache import ResultCache
+from rag_doctor_agent.main.agent.retriever import (
+    INDEX_DIR, Doc, HybridIndex, QuantizedVectors, Retriever, read_index,
+    save_index_file
+)
+from rag_doctor_agent.benchmarks.common import sample_queries
+
+QUERIES = sample_queries() + ["허리 통증 ; 정형외과 ; 척추센터", "무릎 관절 ; 관절센터",
+                              "두통 어지러움", "없는단어"]
+
+
+class CountingEmbedder(LocalHashEmbeddingClient):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        return super().embed(texts)
+
+
+def same_hits(a, b):
+    """id 순서와 점수가 같은지 (BLAS gemv / gemm 반올림 차이만 허용)"""
+    return [d.id for d, _ in a] == [d.id for d, _ in b] and \
+           np.allclose([s for _, s in a], [s for _, s in b], atol=1e-5)
+
+
+def build(emb):
+    docs = list(read_index(INDEX_DIR).docs)
+    index = HybridIndex()
+    index.add_docs(docs[:150], emb)
+    # tail 버퍼 / tombstone 이 있는 상태도 함께 확인
+    index.add_docs(docs[150:], emb)
+    index.upsert_docs([replace(docs[5], text=docs[5].text + " 허리 디스크"),
+                       Doc(id="new-1", text="무릎 관절 통증 신규 의료진", meta={})], emb)
+    return index
+
+
+def test_search_many_matches_search():
+    emb = CountingEmbedder()
+    index = build(emb)
+    assert index.n_tail and index.n_dead
+    single = [index.search(q, emb, top_k=8) for q in QUERIES]
+    emb.calls = 0
+    batch = index.search_many(QUERIES, emb, top_k=8)
+    assert emb.calls == 1
+    assert len(batch) == len(QUERIES)
+    assert all(same_hits(a, b) for a, b in zip(single, batch))
+
+    # SEARCH_BATCH 보다 큰 배치는 나눠서 점수 행렬을 만든다
+    many = QUERIES * 20
+    index.SEARCH_BATCH = 16
+    assert all(same_hits(a, b) for a, b in
+               zip(single * 20, index.search_many(many, emb, top_k=8)))
+    assert index.search_many([], emb) == []
+    print(f"✅ search_many == search ({len(QUERIES)}개 질의, 임베딩 요청 1회)")
+
+
+def test_search_many_quantized():
+    emb = LocalHashEmbeddingClient()
+    index = build(emb).compact()
+    index.quant = QuantizedVectors.quantize(index.emb_matrix, "fp16")
+    single = [index.search(q, emb, top_k=8) for q in QUERIES]
+    batch = index.search_many(QUERIES, emb, top_k=8)
+    assert all(same_hits(a, b) for a, b in zip(single, batch))
+    print("✅ fp16 압축 인덱스에서도 동일")
+
+
+def test_retrieve_many_matches_retrieve():
+    emb = LocalHashEmbeddingClient()
+    patients = [["허리 통증"], ["두통", "어지러움"], ["무릎 통증", "부기"], [], ["소화 불량"]]
+    with tempfile.TemporaryDirectory() as d:
+        index = HybridIndex()
+        index.add_docs(list(read_index(INDEX_DIR).docs), emb)
+        save_index_file(d, index)
+        with open(os.path.join(d, "index_meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"N": index.N, "version": "v1", "embed_model": emb.model}, f)
+        r = Retriever(embed_backend="local", index_dir=d)
+        r.results = ResultCache(max_items=0)   # 캐시 적중이 아닌 검색 결과끼리 비교
+        single = [r.retrieve(p, top_k=5) for p in patients]
+        batch = r.retrieve_many(patients, top_k=5)
+    assert [[h["id"] for h in hs] for hs in batch] == [[h["id"] for h in hs] for hs in single]
+    assert np.allclose([h["score"] for hs in batch for h in hs],
+                       [h["score"] for hs in single for h in hs], atol=1e-5)
+    print("✅ retrieve_many == retrieve")
+
+
+if __name__ == "__main__":
+    print("🚀 배치 검색 테스트 시작")
+    print("=" * 60)
+    test_search_many_matches_search()
+    test_search_many_quantized()
+    test_retrieve_many_matches_retrieve()
+    print("\n🎉 모든 배치 검색 테스트 완료!")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+메타데이터 prefilter(search(filter=...)) 테스트
+- 필터 결과 = 전체 점수에서 조건에 맞는 문서만 골라 순위를 매긴 것과 같음
+- 라벨 부분 일치("정형외과" ↔ "정형외과/O.P"), not_in / provider / 잘못된 필드
+- index.bin 에 저장된 색인, 증분 upsert / delete 반영
+"""
+import os
+import sys
+import tempfile
+from dataclasses import replace
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.embeddings_local import LocalHashEmbeddingClient
+from rag_doctor_agent.main.agent.meta_index import META_FIELDS, MetaIndex
+from rag_doctor_agent.main.agent.retriever import (
+    INDEX_DIR, Doc, HybridIndex, QuantizedVectors, read_index, save_index_file
+)
+from rag_doctor_agent.main.agent.utils import tokenize_ko_en
+from rag_doctor_agent.benchmarks.common import sample_queries
+
+EMB = LocalHashEmbeddingClient()
+QUERIES = sample_queries() + ["허리 통증 ; 정형외과 ; 척추센터", "두통 어지러움 ; 신경과"]
+
+
+def build():
+    index = HybridIndex()
+    index.add_docs(list(read_index(INDEX_DIR).docs), EMB)
+    return index
+
+
+def expected(index, query, mask, top_k=8, alpha=0.65):
+    """전체 hybrid 점수 → 조건에 맞는 행만 → pool → overlap rerank (search 와 같은 규칙)"""
+    qv = EMB.embed([query])[0]
+    h = alpha * (index.embeddings() @ qv) + (1 - alpha) * index._bm25_like(query)
+    rows = np.flatnonzero(mask)
+    pool = rows[np.argsort(-h[rows], kind="stable")][:top_k * 3]
+    at = set(tokenize_ko_en(query))
+    out = []
+    for i in pool:
+        bt = set(tokenize_ko_en(index.docs[i].text))
+        ov = len(at & bt) / (len(at | bt) + 1e-8) if at and bt else 0.0
+        out.append((index.docs[i].id, float(h[i] + 0.05 * ov)))
+    out.sort(key=lambda x: -x[1])
+    return out[:top_k]
+
+
+def same(hits, exp):
+    return [d.id for d, _ in hits] == [i for i, _ in exp] and \
+           np.allclose([s for _, s in hits], [s for _, s in exp], atol=1e-5)
+
+
+def test_filtered_search_matches_postfilter():
+    index = build()
+    for flt in ({"dept": "정형외과"}, {"provider": True},
+                {"dept": ["내과", "신경과"], "doctor_name": {"not_in": ["김재훈"]}}):
+        mask = index.filter_mask(flt)
+        assert 0 < mask.sum() < index.N
+        for q in QUERIES:
+            assert same(index.search(q, EMB, top_k=8, filter=flt), expected(index, q, mask))
+    print("✅ filter 검색 == 전체 점수 후 필터")
+
+
+def test_filter_semantics():
+    index = build()
+    docs = index.docs
+    ortho = index.filter_mask({"dept": "정형외과"})
+    assert all("정형외과" in docs[i].meta.get("dept", "") for i in np.flatnonzero(ortho))
+    assert (index.filter_mask({"dept": "정형외과/O.P"}) == ortho).all()
+    kim = index.filter_mask({"doctor_name": "김재훈"})
+    assert kim.sum() >= 1
+    assert not (index.filter_mask({"doctor_name": {"not_in": ["김재훈"]}}) & kim).any()
+    prov = index.filter_mask({"provider": True})
+    assert (prov | index.filter_mask({"provider": False})).all() and not \
+           (prov & index.filter_mask({"provider": False})).any()
+    hits = index.search("무릎 통증", EMB, top_k=5, filter={"doctor_name": {"in": ["김재훈"]}})
+    assert hits and all(d.meta["doctor_name"].startswith("김재훈") for d, _ in hits)
+    assert index.search("무릎", EMB, filter={"dept": "없는과"}) == []
+    for bad in ({"specialty": "x"}, {"dept": {"eq": "x"}}):
+        try:
+            index.filter_mask(bad)
+            assert False, bad
+        except ValueError:
+            pass
+    print(f"✅ 필터 식 (정형외과 {int(ortho.sum())}건, provider {int(prov.sum())}건)")
+
+
+def test_meta_index_persisted():
+    index = build()
+    with tempfile.TemporaryDirectory() as d:
+        save_index_file(d, index)
+        loaded = read_index(d)
+        assert loaded.meta_index is not None
+        built = MetaIndex.build(index.docs)
+        for field in META_FIELDS:
+            assert loaded.meta_index.values(field) == built.values(field)
+        for flt in ({"dept": "정형외과"}, {"provider": True}, {"doctor_name": "김재훈"}):
+            assert (loaded.filter_mask(flt) == index.filter_mask(flt)).all()
+        hits = loaded.search("허리 통증", EMB, filter={"provider": True})
+        assert hits and all(d.meta.get("doctor_name") for d, _ in hits)
+        del loaded
+    print("✅ index.bin 에 저장된 메타 색인")
+
+
+def test_filter_after_mutations():
+    index = build()
+    index.filter_mask({"provider": True})      # 색인을 먼저 만든 뒤 변경
+    kim = [d for d in index.docs if d.meta.get("doctor_name", "").startswith("김재훈")]
+    index.delete_docs([kim[0].id])
+    index.upsert_docs([Doc(id="new-doc", text="무릎 관절 통증 신규 의료진",
+                           meta={"doctor_name": "박신규/D999", "dept": "정형외과/O.P"})], EMB)
+    hits = index.search("무릎 관절 통증", EMB, top_k=50, filter={"dept": "정형외과"})
+    ids = [d.id for d, _ in hits]
+    assert "new-doc" in ids and kim[0].id not in ids
+    assert [d.id for d, _ in index.search("무릎", EMB, filter={"doctor_name": "박신규"})] == ["new-doc"]
+    assert index.clone().filter_mask({"doctor_name": "박신규"}).sum() == 1
+    print("✅ upsert / delete 후 필터 반영")
+
+
+def test_filter_quantized():
+    index = build().compact()
+    index.quant = QuantizedVectors.quantize(index.emb_matrix, "fp16")
+    for flt in ({"dept": "정형외과"}, {"provider": False}):
+        mask = index.filter_mask(flt)
+        for q in QUERIES:
+            hits = index.search(q, EMB, top_k=8, filter=flt)
+            rows = {i for i in np.flatnonzero(mask)}
+            assert hits and {d.id for d, _ in hits} <= {index.docs[i].id for i in rows}
+    print("✅ fp16 압축 인덱스에서도 필터 적용")
+
+
+if __name__ == "__main__":
+    print("🚀 메타데이터 필터 테스트 시작")
+    print("=" * 60)
+    test_filtered_search_matches_postfilter()
+    test_filter_semantics()
+    test_meta_index_persisted()
+    test_filter_after_mutations()
+    test_filter_quantized()
+    print("\n🎉 모든 메타데이터 필터 테스트 완료!")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+HybridIndex 증분 변경(upsert / delete / compact)과 delta log 테스트
+- 변경 후 검색 결과가 살아남은 문서로 처음부터 만든 인덱스와 같은지 확인
+- OpenAI 없이 저장된 인덱스 + 로컬 해시 임베딩만 사용
+"""
+import json
+import os
+import sys
+import tempfile
+from dataclasses import replace
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.embeddings_local import LocalHashEmbeddingClient
+from rag_doctor_agent.main.agent.retriever import (
+    INDEX_DIR, Doc, HybridIndex, Retriever, read_index, save_index_file
+)
+from rag_doctor_agent.benchmarks.common import sample_queries
+
+QUERIES = sample_queries() + ["허리 통증 ; 정형외과 ; 척추센터", "무릎 관절 ; 관절센터"]
+EMB = LocalHashEmbeddingClient()
+
+
+def base_docs():
+    # 저장된 인덱스에는 같은 id 가 두 번씩 들어 있으므로 첫 번째 것만 사용
+    seen, docs = set(), []
+    for d in read_index(INDEX_DIR).docs:
+        if d.id not in seen:
+            seen.add(d.id)
+            docs.append(d)
+    return docs
+
+
+def build(docs):
+    index = HybridIndex()
+    index.add_docs(docs, EMB)
+    return index
+
+
+def results(index, embedder=EMB):
+    return [[(d.id, round(s, 5)) for d, s in index.search(q, embedder, top_k=8)]
+            for q in QUERIES]
+
+
+def mutations(docs):
+    """(삭제할 id, upsert 할 문서) – 교체 3건 + 신규 2건"""
+    deleted = [docs[1].id, docs[10].id, docs[-1].id]
+    upserts = [replace(docs[3], text=docs[3].text + " 허리 디스크 재활"),
+               replace(docs[20], text="무릎 관절 통증 전문 진료"),
+               replace(docs[40], text=docs[40].text.replace("통증", "저림")),
+               Doc(id="new-1", text="허리 통증 척추센터 신규 의료진", meta={"type": "doctor"}),
+               Doc(id="new-2", text="두통 어지러움 신경과 신규 안내", meta={})]
+    return deleted, upserts
+
+
+def expected_docs(docs, deleted, upserts):
+    gone = set(deleted) | {d.id for d in upserts}
+    return [d for d in docs if d.id not in gone] + upserts
+
+
+def test_upsert_delete_matches_rebuild():
+    docs = base_docs()
+    deleted, upserts = mutations(docs)
+    index = build(docs)
+    assert index.delete_docs(deleted) == len(deleted)
+    info = index.upsert_docs(upserts, EMB)
+    assert info == {"upserted": 5, "replaced": 3}
+
+    rebuilt = build(expected_docs(docs, deleted, upserts))
+    assert index.N - index.n_dead == rebuilt.N
+    assert dict(index.df) == dict(rebuilt.df)
+    assert results(index) == results(rebuilt)
+    print(f"✅ upsert/delete == 재빌드 (tombstone {index.n_dead}, tail {index.n_tail})")
+
+
+def test_compact_preserves_results():
+    docs = base_docs()
+    deleted, upserts = mutations(docs)
+    index = build(docs)
+    index.delete_docs(deleted)
+    index.upsert_docs(upserts, EMB)
+    assert index.needs_compaction(0.05)
+    compacted = index.compact()
+    assert compacted.n_dead == 0 and compacted.n_tail == 0 and not compacted.inv.delta
+    assert [d.id for d in compacted.docs] == [d.id for d in expected_docs(docs, deleted, upserts)]
+    assert results(compacted) == results(index)
+    print("✅ compact 후 결과 동일")
+
+
+def test_clone_isolates_snapshot():
+    index = build(base_docs()[:30])
+    before = results(index)
+    c = index.clone()
+    c.delete_docs([index.docs[0].id])
+    c.add_docs([Doc(id="x", text="허리 통증 정형외과", meta={})], EMB)
+    assert results(index) == before and index.N == 30 and index.n_dead == 0
+    print("✅ clone 원본은 변경되지 않음")
+
+
+def test_vector_growth_amortized():
+    index = build(base_docs()[:10])
+    buffers = set()
+    for i in range(1000):
+        index.add_docs([Doc(id=f"g{i}", text=f"증상 {i} 통증", meta={})], EMB)
+        buffers.add(id(index.emb_tail))
+    assert index.N == 1010 and index.n_tail == 1000
+    assert len(buffers) <= 6          # 64 → 128 → … → 1024
+    assert np.allclose(index.embeddings()[-1], EMB.embed(["증상 999 통증"])[0], atol=1e-6)
+    print(f"✅ 벡터 1000건 추가 중 재할당 {len(buffers)}회")
+
+
+def test_delta_log_replay():
+    docs = base_docs()
+    deleted, upserts = mutations(docs)
+    with tempfile.TemporaryDirectory() as d:
+        index = build(docs)
+        save_index_file(d, index)
+        with open(os.path.join(d, "index_meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"N": index.N, "version": "v1", "embed_model": EMB.model}, f)
+
+        writer = Retriever(embed_backend="local", index_dir=d)
+        reader = Retriever(embed_backend="local", index_dir=d)
+        assert writer.load_index() and reader.load_index()
+
+        writer.delete_docs(deleted[:1])
+        writer.upsert_docs(upserts)
+        # 다른 프로세스: 로그에 추가된 변경만 반영
+        assert reader.reload_if_stale(wait=True)
+        assert reader.index_version == writer.index_version == "v1+2"
+        writer.delete_docs(deleted[1:])
+        assert reader.reload_if_stale(wait=True)
+        fresh = Retriever(embed_backend="local", index_dir=d)
+        assert fresh.load_index() and fresh.index_version == "v1+3"
+
+        expected = results(build(expected_docs(docs, deleted, upserts)))
+        for r in (writer, reader, fresh):
+            assert results(r.index, r.embedder) == expected
+
+        # compaction: 새 버전 디렉터리로 publish → 로그는 이전 버전에 남음
+        assert writer.compact()
+        assert os.path.exists(os.path.join(d, "CURRENT")) and writer.delta_ops == 0
+        assert reader.reload_if_stale(wait=True) and reader.index.n_dead == 0
+        assert reader.index_version == writer.index_version != "v1+3"
+        assert results(reader.index, reader.embedder) == expected
+        del writer, reader, fresh
+    print("✅ delta log 재생 / compaction")
+
+
+if __name__ == "__main__":
+    print("🚀 증분 인덱스 테스트 시작")
+    print("=" * 60)
+    test_upsert_delete_matches_rebuild()
+    test_compact_preserves_results()
+    test_clone_isolates_snapshot()
+    test_vector_growth_amortized()
+    test_delta_log_replay()
+    print("\n🎉 모든 증분 인덱스 테스트 완료!")
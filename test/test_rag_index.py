@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+RAG 검색 인덱스(HybridIndex) 테스트
+- OpenAI 호출 없이 저장된 db_data/index 만으로 실행
+"""
+import os
+import sys
+import json
+import math
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.retriever import (
+    INDEX_DIR, INDEX_FILE, InvertedIndex, HybridIndex, read_index, convert_legacy_index
+)
+from rag_doctor_agent.main.agent.utils import tokenize_ko_en
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "rag_doctor_agent", "tests")
+
+
+def load_doc_toks():
+    return list(read_index(INDEX_DIR, mmap=True).doc_toks)
+
+
+def load_sample_queries():
+    queries = []
+    for fn in sorted(os.listdir(SAMPLES_DIR)):
+        if fn.startswith("sample_") and fn.endswith(".json"):
+            with open(os.path.join(SAMPLES_DIR, fn), "r", encoding="utf-8") as f:
+                queries.append(" ; ".join(json.load(f).get("symptoms", [])))
+    return queries
+
+
+def legacy_bm25(doc_toks, df, query, k1=1.2, b=0.75):
+    """역색인 도입 전 문서 전체를 순회하던 BM25 구현 (비교 기준)"""
+    N = len(doc_toks)
+    q_toks = tokenize_ko_en(query)
+    avgdl = np.mean([len(t) for t in doc_toks]) + 1e-8
+    idf = {t: math.log((N - df.get(t, 0) + 0.5) / (df.get(t, 0) + 0.5) + 1)
+           for t in set(q_toks)}
+    scores = np.zeros(N, dtype="float32")
+    for i, toks in enumerate(doc_toks):
+        dl = len(toks) + 1e-8
+        tf = {}
+        for t in toks:
+            tf[t] = tf.get(t, 0) + 1
+        s = 0.0
+        for t in q_toks:
+            ft = tf.get(t, 0)
+            if t not in idf or ft == 0:
+                continue
+            s += idf[t] * (ft * (k1 + 1)) / (ft + k1 * (1 - b + b * dl / avgdl))
+        scores[i] = s
+    if scores.max() > 0:
+        scores = scores / (scores.max() + 1e-8)
+    return scores
+
+
+def test_inverted_index_matches_legacy_bm25():
+    """역색인 BM25 점수가 기존 전체 순회 구현과 같은지 확인"""
+    doc_toks = load_doc_toks()
+    df = dict(read_index(INDEX_DIR, mmap=True).df)
+    inv = InvertedIndex.build(doc_toks)
+
+    for query in load_sample_queries() + ["허리 통증 ; 정형외과 ; 척추센터"]:
+        expected = legacy_bm25(doc_toks, df, query)
+        got = inv.score(tokenize_ko_en(query))
+        assert np.allclose(expected, got, atol=1e-5), query
+    print("✅ 역색인 BM25 == 기존 BM25")
+
+
+def test_inverted_index_roundtrip():
+    """bm25.npz 저장/로드 후에도 동일한 점수"""
+    import tempfile
+    doc_toks = load_doc_toks()
+    inv = InvertedIndex.build(doc_toks)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, InvertedIndex.FILE)
+        inv.save(path)
+        loaded = InvertedIndex.load(path)
+    q = tokenize_ko_en("무릎 통증 ; 관절센터")
+    assert loaded.N == inv.N and loaded.vocab == inv.vocab
+    assert np.array_equal(loaded.score(q), inv.score(q))
+    print("✅ bm25.npz 저장/로드")
+
+
+def test_binary_index_matches_legacy_layout():
+    """구버전 레이아웃 → index.bin 변환 후 문서/토큰/df/벡터/검색 결과가 같은지 확인"""
+    import shutil
+    import tempfile
+    legacy = read_index(INDEX_DIR, mmap=True)
+
+    class IndexEmbedder:   # 질의 = 저장된 문서 벡터 (OpenAI 불필요)
+        def embed(self, texts):
+            return np.asarray(legacy.emb_matrix[[len(t) % legacy.N for t in texts]])
+
+    with tempfile.TemporaryDirectory() as d:
+        for fn in os.listdir(INDEX_DIR):
+            if fn != INDEX_FILE:
+                shutil.copy(os.path.join(INDEX_DIR, fn), d)
+        info = convert_legacy_index(d)
+        for fn in ["vectors.npy", "docs.jsonl", "doc_toks.jsonl", "df.json"]:
+            os.remove(os.path.join(d, fn))
+        binary = read_index(d, mmap=True)
+        assert info["docs"] == binary.N == legacy.N
+        assert np.array_equal(np.asarray(binary.emb_matrix), np.asarray(legacy.emb_matrix))
+        for i in [0, 1, legacy.N // 2, legacy.N - 1]:
+            assert binary.docs[i] == legacy.docs[i]
+            assert binary.doc_toks[i] == legacy.doc_toks[i]
+        assert dict(binary.df) == dict(legacy.df)
+        emb = IndexEmbedder()
+        for q in load_sample_queries() + ["허리 통증 ; 정형외과 ; 척추센터"]:
+            a = [(doc.id, round(s, 5)) for doc, s in legacy.search(q, emb, top_k=8)]
+            b = [(doc.id, round(s, 5)) for doc, s in binary.search(q, emb, top_k=8)]
+            assert a == b, q
+        del binary   # memmap 해제 후 임시 디렉터리 삭제
+    print(f"✅ index.bin == 구버전 레이아웃 ({info['index_bytes']} / {info['legacy_bytes']} bytes)")
+
+
+def test_top_indices_matches_full_sort():
+    """부분 선택(argpartition) top-k 가 전체 정렬 결과와 같은지 확인"""
+    rng = np.random.default_rng(0)
+    scores = rng.random(5000).astype("float32")
+    for k in [1, 8, 24, 5000, 6000]:
+        expected = np.argsort(-scores, kind="stable")[:k]
+        assert np.array_equal(HybridIndex._top_indices(scores, k), expected), k
+    print("✅ top-k 부분 선택")
+
+
+if __name__ == "__main__":
+    print("🚀 RAG 인덱스 테스트 시작")
+    print("=" * 60)
+    test_inverted_index_matches_legacy_bm25()
+    test_inverted_index_roundtrip()
+    test_binary_index_matches_legacy_layout()
+    test_top_indices_matches_full_sort()
+    print("\n🎉 모든 인덱스 테스트 완료!")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+overlap rerank(문서별 term id 집합) / 단계별 검색 시간 테스트
+- InvertedIndex.overlap == 질의·본문을 토큰화해서 계산한 Jaccard (CSR 행 + append 된 문서)
+- search / search_many 가 bm25 / dense / rerank 단계 시간을 누적
+"""
+import os
+import sys
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.embeddings_local import LocalHashEmbeddingClient
+from rag_doctor_agent.main.agent.retriever import (
+    INDEX_DIR, Doc, HybridIndex, SearchStats, read_index
+)
+from rag_doctor_agent.main.agent.utils import tokenize_ko_en
+from rag_doctor_agent.benchmarks.common import sample_queries
+
+EMB = LocalHashEmbeddingClient()
+QUERIES = sample_queries() + ["허리 통증 ; 정형외과 ; 척추센터", "qqqzzz"]
+
+
+def jaccard(a, b):
+    at, bt = set(tokenize_ko_en(a)), set(tokenize_ko_en(b))
+    return len(at & bt) / (len(at | bt) + 1e-8) if at and bt else 0.0
+
+
+def build():
+    index = HybridIndex()
+    index.add_docs(list(read_index(INDEX_DIR).docs), EMB)
+    index.add_docs([Doc(id="tail-1", text="허리 통증 척추센터 신규 의료진", meta={}),
+                    Doc(id="tail-2", text="", meta={})], EMB)
+    return index
+
+
+def test_overlap_matches_tokenized_jaccard():
+    index = build()
+    assert index.inv.tail_terms          # 빌드 후 append 된 문서 포함
+    rows = np.arange(index.N)
+    for q in QUERIES:
+        ov = index.inv.overlap(tokenize_ko_en(q), rows)
+        assert ov.tolist() == [jaccard(q, d.text) for d in index.docs]
+    assert index.inv.overlap([], rows[:3]).tolist() == [0.0, 0.0, 0.0]
+    print("✅ term id 교집합 == 토큰화 Jaccard")
+
+
+def test_stage_timings():
+    index = build()
+    index.search(QUERIES[0], EMB)
+    index.search_many(QUERIES[:3], EMB)
+    snap = index.stats.snapshot()
+    assert set(snap) == set(SearchStats.STAGES)
+    assert all(v["calls"] == 4 and v["total_ms"] > 0 for v in snap.values())
+    assert index.clone().stats is index.stats
+    print("✅ 단계별 시간:", {k: v["avg_ms"] for k, v in snap.items()})
+
+
+if __name__ == "__main__":
+    print("🚀 overlap rerank 테스트 시작")
+    print("=" * 60)
+    test_overlap_matches_tokenized_jaccard()
+    test_stage_timings()
+    print("\n🎉 모든 overlap rerank 테스트 완료!")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+압축 벡터(float16 / int8) 검색의 recall@k 테스트 (float32 검색 대비)
+- tests/sample_*.json 증상으로 질의를 만들고, OpenAI 없이 저장된 인덱스 벡터만 사용
+- 질의 벡터: 질의 BM25 상위 문서 임베딩의 평균 (같은 임베딩 공간의 pseudo 질의)
+"""
+import os
+import sys
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.retriever import (
+    INDEX_DIR, HybridIndex, InvertedIndex, QuantizedVectors, Doc, read_index
+)
+from rag_doctor_agent.benchmarks.common import load_real_doc_toks, sample_queries
+
+TOP_K = 8
+
+
+class PseudoQueryEmbedder:
+    """질의 문자열 → BM25 상위 문서 임베딩 평균 (결정적)"""
+
+    def __init__(self, index: HybridIndex):
+        self.index = index
+
+    def embed(self, texts):
+        out = []
+        for t in texts:
+            bm = self.index._bm25_like(t)
+            top = np.argsort(-bm, kind="stable")[:5]
+            v = np.asarray(self.index.emb_matrix[top]).mean(axis=0)
+            out.append(v / (np.linalg.norm(v) + 1e-8))
+        return np.vstack(out).astype("float32")
+
+
+def build_index(quant=None, rescore_k=256):
+    index = HybridIndex()
+    index.doc_toks = load_real_doc_toks()
+    index.N = len(index.doc_toks)
+    index.docs = [Doc(id=str(i), text=" ".join(t), meta={}) for i, t in enumerate(index.doc_toks)]
+    index.inv = InvertedIndex.build(index.doc_toks)
+    index.set_embeddings(read_index(INDEX_DIR, mmap=True).emb_matrix, normalized=True)
+    if quant:
+        index.quant = QuantizedVectors.quantize(index.emb_matrix, quant)
+        index.rescore_k = rescore_k
+    return index
+
+
+def recall_at_k(quant, rescore_k):
+    exact = build_index()
+    approx = build_index(quant, rescore_k)
+    embedder = PseudoQueryEmbedder(exact)
+    recalls = []
+    for q in sample_queries():
+        a = {d.id for d, _ in exact.search(q, embedder, top_k=TOP_K)}
+        b = {d.id for d, _ in approx.search(q, embedder, top_k=TOP_K)}
+        recalls.append(len(a & b) / max(len(a), 1))
+    return float(np.mean(recalls))
+
+
+def test_quantized_recall_with_rescoring():
+    """재채점 후보가 충분하면 float32 검색과 같은 top-k"""
+    for kind in QuantizedVectors.KINDS:
+        r = recall_at_k(kind, rescore_k=256)
+        print(f"📊 {kind} recall@{TOP_K} (rescore 256): {r:.3f}")
+        assert r >= 0.99, kind
+
+
+def test_quantized_candidate_recall():
+    """재채점 후보를 top_k*3 으로 줄여도 압축 점수만으로 후보를 거의 놓치지 않음"""
+    for kind in QuantizedVectors.KINDS:
+        r = recall_at_k(kind, rescore_k=TOP_K * 3)
+        print(f"📊 {kind} recall@{TOP_K} (rescore {TOP_K * 3}): {r:.3f}")
+        assert r >= 0.95, kind
+
+
+def test_quantized_memory():
+    """압축 행렬 크기: fp16 = 1/2, int8 ≈ 1/4"""
+    M = read_index(INDEX_DIR, mmap=True).emb_matrix
+    assert QuantizedVectors.quantize(M, "fp16").nbytes * 2 == M.nbytes
+    assert QuantizedVectors.quantize(M, "int8").codes.nbytes * 4 == M.nbytes
+    print("✅ 압축 행렬 크기")
+
+
+if __name__ == "__main__":
+    print("🚀 압축 벡터 검색 테스트 시작")
+    print("=" * 60)
+    test_quantized_recall_with_rescoring()
+    test_quantized_candidate_recall()
+    test_quantized_memory()
+    print("\n🎉 모든 압축 벡터 테스트 완료!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+2단계 검색(strategy="two_stage") 테스트
+- BM25 후보 → 후보만 dense 재채점: 점수는 전체 hybrid 와 같은 식, 결과는 hybrid 와 거의 같음
+- 후보가 모자라면 전체 hybrid 로 처리, filter / tombstone / IVF probe / search_many 반영
+"""
+import os
+import sys
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent import retriever
+from rag_doctor_agent.main.agent.ann import IVFIndex
+from rag_doctor_agent.main.agent.embeddings_local import LocalHashEmbeddingClient
+from rag_doctor_agent.main.agent.retriever import INDEX_DIR, HybridIndex, read_index
+from rag_doctor_agent.benchmarks.common import sample_queries
+
+EMB = LocalHashEmbeddingClient()
+QUERIES = sample_queries() + ["허리 통증 ; 정형외과 ; 척추센터", "무릎 관절 ; 관절센터"]
+
+
+def build():
+    index = HybridIndex()
+    index.add_docs(list(read_index(INDEX_DIR).docs), EMB)
+    return index
+
+
+def search(index, q, strategy, **kw):
+    return [(d.id, round(s, 5)) for d, s in index.search(q, EMB, top_k=8, strategy=strategy, **kw)]
+
+
+def test_two_stage_close_to_hybrid():
+    index = build()
+    recalls = []
+    for q in QUERIES:
+        full = dict(search(index, q, "hybrid"))
+        two = search(index, q, "two_stage")
+        assert len(two) == 8
+        # 두 결과에 모두 있는 문서는 같은 점수 (같은 hybrid 식 + overlap)
+        assert all(s == full[i] for i, s in two if i in full)
+        recalls.append(len(set(full) & {i for i, _ in two}) / len(full))   # 저장 인덱스는 id 중복
+    assert np.mean(recalls) >= 0.8
+    print(f"✅ two_stage recall@8 vs hybrid = {np.mean(recalls):.3f}")
+
+
+def test_fallback_without_lexical_hits():
+    index = build()
+    q = "qqqzzz xyzzy"
+    assert search(index, q, "two_stage") == search(index, q, "hybrid")
+    print("✅ BM25 후보 부족 → 전체 hybrid")
+
+
+def test_filter_and_tombstones():
+    index = build()
+    q = "허리 통증 ; 정형외과 ; 척추센터"
+    top = search(index, q, "two_stage")
+    index.delete_docs([top[0][0]])
+    hits = index.search(q, EMB, top_k=8, strategy="two_stage", filter={"provider": True})
+    assert hits and top[0][0] not in {d.id for d, _ in hits}
+    assert all(d.meta.get("doctor_name") or d.meta.get("의료진명") for d, _ in hits)
+    print("✅ filter / tombstone 반영")
+
+
+def test_ann_probe_and_batch():
+    index = build()
+    index.ann = IVFIndex.build(index.emb_matrix, nlist=8)
+    q = QUERIES[0]
+    old = retriever.TWO_STAGE_NPROBE
+    try:
+        retriever.TWO_STAGE_NPROBE = 8      # 모든 리스트 probe → 전 문서가 후보 = 전수 hybrid
+        assert search(index, q, "two_stage") == search(_without_ann(index), q, "hybrid")
+    finally:
+        retriever.TWO_STAGE_NPROBE = old
+    many = index.search_many(QUERIES, EMB, top_k=8, strategy="two_stage")
+    assert [[(d.id, round(s, 5)) for d, s in hits] for hits in many] == \
+           [search(index, q, "two_stage") for q in QUERIES]
+    print("✅ IVF probe 후보 / search_many 동일")
+
+
+def _without_ann(index):
+    c = index.clone()
+    c.ann = None
+    return c
+
+
+def test_unknown_strategy():
+    index = build()
+    try:
+        index.search("허리", EMB, strategy="dense_only")
+    except ValueError:
+        print("✅ 알 수 없는 strategy → ValueError")
+        return
+    raise AssertionError("ValueError expected")
+
+
+if __name__ == "__main__":
+    print("🚀 2단계 검색 테스트 시작")
+    print("=" * 60)
+    test_two_stage_close_to_hybrid()
+    test_fallback_without_lexical_hits()
+    test_filter_and_tombstones()
+    test_ann_probe_and_batch()
+    test_unknown_strategy()
+    print("\n🎉 모든 2단계 검색 테스트 완료!")
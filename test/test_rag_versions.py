@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+버전 디렉터리 publish / hot swap / GC 테스트
+- 빌드 결과는 versions/<v>/ 에 쓰고 CURRENT 를 원자적으로 교체
+- 실행 중인 Retriever 는 검색을 막지 않고 백그라운드에서 새 버전으로 교체
+- 사용 중(holder)이거나 최근 버전은 GC 에서 보존
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.embeddings_local import LocalHashEmbeddingClient
+from rag_doctor_agent.main.agent.retriever import (
+    INDEX_DIR, HOLDERS_DIR, VERSIONS_DIR, HybridIndex, Retriever, gc_versions,
+    hold_version, read_index, resolve_index_dir, save_index_file
+)
+
+EMB = LocalHashEmbeddingClient()
+
+
+def make_root(d, docs):
+    """flat 레이아웃 인덱스 (기존 배포 형태)"""
+    index = HybridIndex()
+    index.add_docs(docs, EMB)
+    save_index_file(d, index)
+    with open(os.path.join(d, "index_meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"N": index.N, "version": "flat", "embed_model": EMB.model}, f)
+    return index
+
+
+def wait_for(cond, timeout=10.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_publish_and_background_swap():
+    docs = list(read_index(INDEX_DIR).docs)
+    with tempfile.TemporaryDirectory() as d:
+        make_root(d, docs[:40])
+        reader = Retriever(embed_backend="local", index_dir=d)
+        assert reader.load_index() and reader.index_version == "flat"
+        assert resolve_index_dir(d) == (d, None)
+
+        writer = Retriever(embed_backend="local", index_dir=d)
+        writer.load_index()
+        writer.upsert_docs(docs[40:45])   # compaction 임계치 미만
+        assert writer.compact()
+        vdir, version = resolve_index_dir(d)
+        assert vdir == os.path.join(d, VERSIONS_DIR, version)
+        assert writer.index_version == version and writer.active_dir == vdir
+
+        # 백그라운드 교체: 호출은 바로 반환하고 기존 인덱스로 검색 가능
+        old = reader.index
+        assert reader.reload_if_stale(wait=False) is False
+        assert reader.index is old or reader.index_version == version
+        reader.index.search("허리 통증", reader.embedder, top_k=3)
+        assert wait_for(lambda: reader.index_version == version)
+        assert reader.index.N == 45 and reader.active_dir == vdir
+        assert reader.index_status()["reload_error"] is None
+        print(f"✅ publish → 백그라운드 교체 ({version})")
+
+
+def test_gc_keeps_current_and_held_versions():
+    docs = list(read_index(INDEX_DIR).docs)[:20]
+    with tempfile.TemporaryDirectory() as d:
+        make_root(d, docs)
+        r = Retriever(embed_backend="local", index_dir=d)
+        r.load_index()
+        versions = []
+        for i in range(4):
+            r.upsert_docs(docs[i:i + 1])
+            r.compact()
+            versions.append(r.index_version)
+        vroot = os.path.join(d, VERSIONS_DIR)
+        # compaction 마다 GC: CURRENT + 최근 2개 외에는 r 이 더 이상 잡고 있지 않음
+        assert sorted(os.listdir(vroot)) == versions[-2:]
+
+        # 다른 프로세스가 잡고 있는 버전 / 종료된 프로세스의 holder
+        held = hold_version(os.path.join(vroot, versions[-2]))
+        dead = os.path.join(vroot, versions[-1], HOLDERS_DIR, "999999999-dead")
+        open(dead, "w").close()
+        r.upsert_docs(docs[5:6])
+        r.compact()
+        r.upsert_docs(docs[6:7])
+        r.compact()
+        left = sorted(os.listdir(vroot))
+        assert versions[-2] in left and versions[-1] not in left
+        assert resolve_index_dir(d)[1] == r.index_version in left
+
+        os.remove(held)
+        assert gc_versions(d, keep=0) == [v for v in left if v != r.index_version]
+        assert os.listdir(vroot) == [r.index_version]
+        assert r.index.search("허리 통증", r.embedder, top_k=3)
+        print(f"✅ GC: 사용 중 버전 보존, 나머지 삭제 (남은 버전 {left})")
+
+
+if __name__ == "__main__":
+    print("🚀 인덱스 버전 테스트 시작")
+    print("=" * 60)
+    test_publish_and_background_swap()
+    test_gc_keeps_current_and_held_versions()
+    print("\n🎉 모든 인덱스 버전 테스트 완료!")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+검색 결과 캐시(ResultCache / Retriever.retrieve 앞단) 테스트
+- LRU 크기 제한 / TTL 만료 / 통계
+- 꺼낸 결과의 중첩 meta 를 고쳐도 캐시와 다른 호출자의 결과는 그대로 (깊은 복사)
+- 같은 증상 집합(순서·대소문자 무관)은 적중, top_k / alpha / filter 가 다르면 미스
+- upsert 로 인덱스가 교체되면 비워지고 새 결과를 돌려줌, retrieve_many / aretrieve 도 공유
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+# 프로젝트 루트를 Python 경로에 추가 (rag_doctor_agent 패키지 임포트)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_doctor_agent.main.agent.embeddings_local import LocalHashEmbeddingClient
+from rag_doctor_agent.main.agent.result_cache import ResultCache
+from rag_doctor_agent.main.agent.retriever import (
+    INDEX_DIR, Doc, HybridIndex, Retriever, read_index, save_index_file
+)
+
+
+def make_retriever(d):
+    emb = LocalHashEmbeddingClient()
+    index = HybridIndex()
+    index.add_docs(list(read_index(INDEX_DIR).docs), emb)
+    save_index_file(d, index)
+    with open(os.path.join(d, "index_meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"N": index.N, "version": "v1", "embed_model": emb.model}, f)
+    r = Retriever(embed_backend="local", index_dir=d)
+    r.results = ResultCache(max_items=64, ttl=60)
+    return r
+
+
+def test_lru_and_ttl():
+    c = ResultCache(max_items=2, ttl=0.05)
+    c.put("a", [{"id": 1}])
+    c.put("b", [{"id": 2}])
+    assert c.get("a") == [{"id": 1}]
+    c.put("c", [{"id": 3}])                 # 가장 오래 안 쓴 b 가 밀려남
+    assert c.get("b") is None and c.get("c") == [{"id": 3}]
+    c.get("a")[0]["id"] = 99                # 꺼낸 결과를 바꿔도 캐시는 그대로
+    assert c.get("a") == [{"id": 1}]
+    time.sleep(0.06)
+    assert c.get("a") is None
+    st = c.stats()
+    assert st["hits"] == 4 and st["misses"] == 2 and st["expired"] == 1 and st["size"] == 1
+    assert ResultCache(max_items=0).get("a") is None
+    print("✅ LRU / TTL / 통계")
+
+
+def test_nested_meta_is_not_shared():
+    c = ResultCache(max_items=4, ttl=0)
+    hits = [{"id": "d1", "score": 0.9, "meta": {"dept": "정형외과", "tags": ["허리"]}}]
+    c.put("k", hits)
+    hits[0]["meta"]["dept"] = "바뀜"                 # 넣은 뒤 원본을 고쳐도 캐시는 그대로
+    first = c.get("k")
+    first[0]["meta"]["dept"] = "내과"
+    first[0]["meta"]["tags"].append("두통")
+    second = c.get("k")
+    assert second == [{"id": "d1", "score": 0.9, "meta": {"dept": "정형외과", "tags": ["허리"]}}]
+    assert second[0]["meta"] is not first[0]["meta"]
+
+    with tempfile.TemporaryDirectory() as d:
+        r = make_retriever(d)
+        before = r.retrieve(["허리 통증"], top_k=3)
+        got = r.retrieve(["허리 통증"], top_k=3)
+        for h in got:
+            h["meta"]["dept"] = "변경"
+        assert r.retrieve(["허리 통증"], top_k=3) == before
+    print("✅ 꺼낸 결과의 meta 를 고쳐도 캐시 항목은 그대로")
+
+
+def test_retrieve_hits_and_keys():
+    with tempfile.TemporaryDirectory() as d:
+        r = make_retriever(d)
+        first = r.retrieve(["허리 통증", "두통"], top_k=5)
+        assert r.retrieve(["두통", "허리 통증 "], top_k=5) == first
+        assert r.results.stats()["hits"] == 1
+        r.retrieve(["허리 통증", "두통"], top_k=3)
+        r.retrieve(["허리 통증", "두통"], top_k=5, alpha=0.3)
+        r.retrieve(["허리 통증", "두통"], top_k=5, filter={"provider": True})
+        st = r.index_status()["result_cache"]
+        assert st["hits"] == 1 and st["misses"] == 4 and st["size"] == 4
+
+        many = r.retrieve_many([["허리 통증", "두통"], ["무릎"], ["무릎"]], top_k=5)
+        assert many[0] == first and many[1] == many[2]
+        assert asyncio.run(r.aretrieve(["무릎"], top_k=5)) == many[1]
+        assert r.results.stats()["hits"] == 3
+    print("✅ 증상 집합 키 적중 / 인자별 분리 / retrieve_many·aretrieve 공유")
+
+
+def test_invalidated_on_swap():
+    with tempfile.TemporaryDirectory() as d:
+        r = make_retriever(d)
+        before = r.retrieve(["허리 통증"], top_k=3)
+        r.upsert_docs([Doc(id="new-1", text="허리 통증 허리 통증 척추센터 정형외과 신규", meta={})])
+        assert r.results.stats()["size"] == 0 and r.results.stats()["invalidations"] == 1
+        after = r.retrieve(["허리 통증"], top_k=3)
+        assert after != before and "new-1" in [h["id"] for h in after]
+        del r
+    print("✅ 인덱스 교체 시 캐시 무효화")
+
+
+if __name__ == "__main__":
+    print("🚀 결과 캐시 테스트 시작")
+    print("=" * 60)
+    test_lru_and_ttl()
+    test_nested_meta_is_not_shared()
+    test_retrieve_hits_and_keys()
+    test_invalidated_on_swap()
+    print("\n🎉 모든 결과 캐시 테스트 완료!")